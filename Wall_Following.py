@@ -1,54 +1,20 @@
+import argparse
+import os
 import pygame
 import math
+import sys
 import time
 
-pygame.init()
-WIDTH, HEIGHT = 1000, 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Wall Following with PID Control")
-clock = pygame.time.Clock()
-
-# Track setup
-track = pygame.Surface((WIDTH, HEIGHT))
-track.fill((255, 255, 255))  # background putih
-
-track_path = [
-    (200, 150), (800, 150),
-    (800, 200), (850, 300), (800, 400),
-    (800, 450), (200, 450),
-    (200, 400), (150, 300), (200, 200),
-    (200, 150)
-]
-pygame.draw.lines(track, (0, 0, 0), False, track_path, 10)
-
-# Robot setup
-robot_x, robot_y = 210, 300
-angle = 0
-speed = 2
-sensor_side_distance = 30  # jarak sensor samping
-sensor_front_distance = 40
-
-# PID parameters
-Kp = 0.008
-Ki = 0.0001
-Kd = 0.002
-
-integral = 0
-prev_error = 0
-prev_time = time.time()
-
-def get_distance_to_wall(x, y, angle, max_distance=60):
-    for dist in range(max_distance):
-        check_x = int(x + math.cos(angle) * dist)
-        check_y = int(y + math.sin(angle) * dist)
-        if check_x < 0 or check_x >= WIDTH or check_y < 0 or check_y >= HEIGHT:
-            return max_distance
-        color = track.get_at((check_x, check_y))
-        if color == pygame.Color(0, 0, 0):
-            return dist
-    return max_distance
-
-def draw_robot(x, y, angle):
+# frame_capture is shared with the pygame simulation in robot-maze-simulation/src
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "robot-maze-simulation", "src"))
+from frame_capture import FrameCapture, add_capture_arguments, default_capture_steps, use_headless_display
+from ray_sensor import fan_angles
+from wall_following_metrics import MetricsLog, TrackMetrics
+from wall_following_sim import (FPS, HEIGHT, WIDTH, WallFollowingSim, build_track, build_track_geometry,
+                                sensor_front_distance, sensor_side_distance)
+
+
+def draw_robot(screen, sim, x, y, angle, fan=0):
     pygame.draw.circle(screen, (0, 100, 255), (int(x), int(y)), 12)
 
     left_angle = angle + math.pi / 2
@@ -68,55 +34,115 @@ def draw_robot(x, y, angle):
     pygame.draw.circle(screen, (0, 255, 0), (int(right_sx), int(right_sy)), 5)
     pygame.draw.circle(screen, (255, 255, 0), (int(front_sx), int(front_sy)), 5)
 
-    left_dist = get_distance_to_wall(x, y, left_angle)
-    right_dist = get_distance_to_wall(x, y, right_angle)
-    front_dist = get_distance_to_wall(x, y, front_angle)
-
-    return left_dist, right_dist, front_dist
-
-running = True
-while running:
-    screen.blit(track, (0, 0))
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-    left_dist, right_dist, front_dist = draw_robot(robot_x, robot_y, angle)
-
-    # PID control for angle correction based on side distance error
-    error = left_dist - right_dist
-
-    current_time = time.time()
-    dt = current_time - prev_time if current_time - prev_time > 0 else 1e-16
-
-    integral += error * dt
-    derivative = (error - prev_error) / dt
-
-    correction = Kp * error + Ki * integral + Kd * derivative
-
-    prev_error = error
-    prev_time = current_time
-
-    # Safety check front sensor: slow down or stop if too close
-    if front_dist < 20:
-        current_speed = max(0.5, speed * (front_dist / 20))  # slow down proportionally
-    else:
-        current_speed = speed
-
-    angle -= correction  # adjust heading angle with correction
-
-    # Move robot forward
-    robot_x += current_speed * math.cos(angle)
-    robot_y += current_speed * math.sin(angle)
-
-    # Draw robot heading line
-    heading_length = 25
-    heading_x = robot_x + math.cos(angle) * heading_length
-    heading_y = robot_y + math.sin(angle) * heading_length
-    pygame.draw.line(screen, (255, 0, 0), (robot_x, robot_y), (heading_x, heading_y), 3)
-
-    pygame.display.flip()
-    clock.tick(60)
-
-pygame.quit()
+    # Optional sensor fan, all rays in one cast
+    if fan > 0:
+        angles = fan_angles(angle, fan)
+        for ray_angle, dist in zip(angles, sim.cast(x, y, angles)):
+            end = (x + math.cos(ray_angle) * dist, y + math.sin(ray_angle) * dist)
+            pygame.draw.line(screen, (180, 180, 180), (x, y), end, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wall Following with PID Control")
+    parser.add_argument("--fan", type=int, default=0, metavar="N",
+                        help="also cast and draw an N-ray sensor fan around the robot (e.g. 16)")
+    parser.add_argument("--sensor", choices=["raster", "analytic"], default="raster",
+                        help="probe the drawn track pixels, or intersect the rays with the track segments exactly")
+    parser.add_argument("--dt", type=float, default=1 / FPS, help="simulated seconds per step (fixed)")
+    parser.add_argument("--headless", action="store_true",
+                        help="run --steps steps (default 3600) without a window and print the final state")
+    parser.add_argument("--metrics", metavar="LOG",
+                        help="stream per-step tracking metrics to a .csv file or a compact binary log")
+    parser.add_argument("--log-every", type=int, default=1, help="log metrics every N steps")
+    add_capture_arguments(parser)
+    args = parser.parse_args()
+
+    # Robot setup (start pose and PID gains as before, see wall_following_sim.py)
+    track_geometry = build_track_geometry()
+    sim = WallFollowingSim(dt=args.dt, start=(210, 300), start_angle=0,
+                           track=track_geometry if args.sensor == "analytic" else None)
+
+    # Lap and tracking-error metrics against the track centre line
+    metrics_log = MetricsLog(args.metrics, args.log_every) if args.metrics else None
+    metrics = TrackMetrics(track_geometry, args.dt, float(sim.x), float(sim.y), metrics_log)
+
+    def step_simulation():
+        sim.step()
+        metrics.update(sim.x, sim.y, sim.angle)
+
+    def print_metrics():
+        summary = metrics.summary()
+        print(f"laps={summary['laps']:.2f} progress={summary['progress']:.0f}px "
+              f"cross-track rms={summary['rms_cross_track']:.1f}px max={summary['max_cross_track']:.1f}px "
+              f"heading error={math.degrees(summary['mean_abs_heading_error']):.1f} deg "
+              f"best lap={summary['best_lap_time']:.2f} s"
+              + (f" LOST (off track {summary['off_track_time']:.1f} s)" if summary["lost"] else ""))
+        if metrics_log:
+            metrics_log.close()
+            print(f"{metrics_log.rows_written} metric records written to {args.metrics}")
+
+    if args.headless:
+        steps = 3600 if args.steps is None else args.steps
+        start_time = time.perf_counter()
+        for _ in range(steps):
+            step_simulation()
+        state = sim.state()
+        elapsed = time.perf_counter() - start_time
+        print(f"{steps} steps ({state['time']:.1f} s simulated) in {elapsed:.2f} s, "
+              f"{state['time'] / elapsed:.0f}x real time")
+        print(f"x={state['x']:.2f} y={state['y']:.2f} angle={math.degrees(state['angle']) % 360:.2f} deg")
+        print_metrics()
+        return
+
+    if args.capture:
+        use_headless_display()
+        default_capture_steps(args)
+
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Wall Following with PID Control")
+    clock = pygame.time.Clock()
+    capture = FrameCapture(args.capture, args.every, args.fps) if args.capture else None
+
+    # Track setup
+    track = build_track()
+
+    running = True
+    try:
+        while running:
+            screen.blit(track, (0, 0))
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+
+            # Robot and sensors at the current pose, then one fixed-dt step
+            draw_robot(screen, sim, float(sim.x), float(sim.y), float(sim.angle), args.fan)
+            step_simulation()
+
+            # Draw robot heading line
+            robot_x, robot_y, angle = float(sim.x), float(sim.y), float(sim.angle)
+            heading_length = 25
+            heading_x = robot_x + math.cos(angle) * heading_length
+            heading_y = robot_y + math.sin(angle) * heading_length
+            pygame.draw.line(screen, (255, 0, 0), (robot_x, robot_y), (heading_x, heading_y), 3)
+
+            if args.steps is not None and sim.steps >= args.steps:
+                running = False
+
+            if capture:
+                # Headless: no frame limit; the step is the same fixed dt as in a live run
+                capture.step(screen)
+            else:
+                pygame.display.flip()
+                clock.tick(FPS)
+    finally:
+        # Also on Ctrl-C or an error, so the video is flushed and finalized
+        if capture:
+            capture.close()
+    pygame.quit()
+    print_metrics()
+
+
+if __name__ == "__main__":
+    main()
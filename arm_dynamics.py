@@ -0,0 +1,310 @@
+# State-vector model of the nozzle arm with its PID controllers, and
+# adaptive integrators for it (used by robot_kinematics.py and nozzleoutputplot.py)
+import argparse
+import math
+import time
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+# Constants (as in robot_kinematics.py / nozzleoutputplot.py)
+L1, L2 = 1.0, 1.0
+g = 9.81
+wheel_radius = 0.2
+wheel_offset = 0.6
+target_nozzle_height = 1.2
+platform_speed = 0.4  # m/s, the scripts move 0.02 per 0.05 s frame
+
+
+def road_profile(x):
+    return 0.2 * np.sin(0.8 * x)
+
+
+def road_slope(x):
+    return 0.16 * np.cos(0.8 * x)
+
+
+class ArmModel:
+    """
+    Arm joints and PID integral as one ODE, y' = f(t, y)
+
+    State is [theta1, theta2, theta1_dot, theta2_dot, integral of the
+    nozzle height error]. Both joint PIDs act on the nozzle height error
+    like in the scripts; the derivative term uses the exact error rate
+    instead of a finite difference, so the right-hand side is smooth and
+    an adaptive integrator can take long steps where the response is slow.
+    """
+
+    def __init__(self, Kp1=200, Ki1=2, Kd1=0.3, Kp2=200, Ki2=2, Kd2=0.2,
+                 target=target_nozzle_height, speed=platform_speed, start_x=0.5,
+                 terrain=road_profile, terrain_slope=road_slope):
+        self.gains = np.array([[Kp1, Ki1, Kd1], [Kp2, Ki2, Kd2]], dtype=float)
+        self.target = target
+        self.speed = speed
+        self.start_x = start_x
+        self.terrain = terrain
+        self.terrain_slope = terrain_slope
+
+    def initial_state(self, theta1=math.radians(60), theta2=math.radians(-60)):
+        return np.array([theta1, theta2, 0.0, 0.0, 0.0])
+
+    def base(self, t):
+        # Height of the arm base and its rate of change at time t
+        x = self.start_x + self.speed * t
+        height = (self.terrain(x - wheel_offset) + self.terrain(x + wheel_offset)) / 2 + wheel_radius
+        rate = self.speed * (self.terrain_slope(x - wheel_offset) + self.terrain_slope(x + wheel_offset)) / 2
+        return height, rate
+
+    def nozzle_height(self, t, y):
+        # Works on a single state or on states stacked along the last axis
+        return self.base(t)[0] + L1 * np.sin(y[0]) + L2 * np.sin(y[0] + y[1])
+
+    def derivative(self, t, y):
+        theta1, theta2, omega1, omega2, integral = y
+        base_y, base_rate = self.base(t)
+        s1, c1 = math.sin(theta1), math.cos(theta1)
+        s12, c12 = math.sin(theta1 + theta2), math.cos(theta1 + theta2)
+        error = self.target - (base_y + L1 * s1 + L2 * s12)
+        error_rate = -(base_rate + L1 * c1 * omega1 + L2 * c12 * (omega1 + omega2))
+        (kp1, ki1, kd1), (kp2, ki2, kd2) = self.gains
+        tau1 = kp1 * error + ki1 * integral + kd1 * error_rate
+        tau2 = kp2 * error + ki2 * integral + kd2 * error_rate
+        return np.array([omega1, omega2, tau1 - g * s1, tau2 - g * s12, error])
+
+    def euler(self, t_eval, dt=0.05, finite_difference=True):
+        """
+        Semi-implicit Euler at a fixed step, t_eval sampled by linear interpolation
+
+        With finite_difference (the scripts' own scheme) the PID derivative
+        is a difference of the error over one step, starting from
+        prev_error = 0, and heights match robot_kinematics.py /
+        nozzleoutputplot.py exactly for the same gains. That is not the
+        ODE of derivative(): the first step sees the error jump from 0 (a
+        derivative kick) and the difference lags the true rate. Without
+        finite_difference the derivative term is the exact error rate, so
+        this integrates the same model as rk45() and converges to it as
+        dt shrinks.
+        """
+        steps = int(math.ceil(t_eval[-1] / dt)) + 1
+        states = np.empty((steps, 5))
+        theta1, theta2, omega1, omega2, integral = self.initial_state()
+        prev_error = 0.0
+        (kp1, ki1, kd1), (kp2, ki2, kd2) = self.gains
+        for k in range(steps):
+            states[k] = theta1, theta2, omega1, omega2, integral
+            base_y, base_rate = self.base(k * dt)
+            s1, s12 = math.sin(theta1), math.sin(theta1 + theta2)
+            error = self.target - (base_y + L1 * s1 + L2 * s12)
+            if finite_difference:
+                integral += error * dt
+                derivative = (error - prev_error) / dt
+                prev_error = error
+            else:
+                derivative = -(base_rate + L1 * math.cos(theta1) * omega1
+                               + L2 * math.cos(theta1 + theta2) * (omega1 + omega2))
+            tau1 = kp1 * error + ki1 * integral + kd1 * derivative
+            tau2 = kp2 * error + ki2 * integral + kd2 * derivative
+            if not finite_difference:
+                integral += error * dt
+            omega1 += (tau1 - g * s1) * dt
+            omega2 += (tau2 - g * s12) * dt
+            theta1 += omega1 * dt
+            theta2 += omega2 * dt
+        times = np.arange(steps) * dt
+        y = np.column_stack([np.interp(t_eval, times, states[:, i]) for i in range(5)])
+        return {"t": t_eval, "y": y, "nfev": steps, "steps": steps, "rejected": 0}
+
+
+class Counter:
+    # Wraps f(t, y) and counts calls
+    def __init__(self, fun):
+        self.fun = fun
+        self.calls = 0
+
+    def __call__(self, t, y):
+        self.calls += 1
+        return self.fun(t, y)
+
+
+def _error_norm(error, y, y_new, rtol, atol):
+    scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+    return math.sqrt(np.mean((error / scale) ** 2))
+
+
+def _initial_step(fun, t, y, f0, order, rtol, atol):
+    # Hairer, Norsett & Wanner's starting step heuristic
+    scale = atol + rtol * np.abs(y)
+    d0 = math.sqrt(np.mean((y / scale) ** 2))
+    d1 = math.sqrt(np.mean((f0 / scale) ** 2))
+    h0 = 1e-6 if d0 < 1e-5 or d1 < 1e-5 else 0.01 * d0 / d1
+    f1 = fun(t + h0, y + h0 * f0)
+    d2 = math.sqrt(np.mean(((f1 - f0) / scale) ** 2)) / h0
+    if max(d1, d2) <= 1e-15:
+        h1 = max(1e-6, h0 * 1e-3)
+    else:
+        h1 = (0.01 / max(d1, d2)) ** (1 / (order + 1))
+    return min(100 * h0, h1)
+
+
+# Dormand-Prince 5(4) tableau, error weights and dense output coefficients
+_DP_C = np.array([0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1])
+_DP_A = [
+    np.array([]),
+    np.array([1 / 5]),
+    np.array([3 / 40, 9 / 40]),
+    np.array([44 / 45, -56 / 15, 32 / 9]),
+    np.array([19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729]),
+    np.array([9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656]),
+]
+_DP_B = np.array([35 / 384, 0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84])
+_DP_E = np.array([71 / 57600, 0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40])
+_DP_P = np.array([
+    [1, -8048581381 / 2820520608, 8663915743 / 2820520608, -12715105075 / 11282082432],
+    [0, 0, 0, 0],
+    [0, 131558114200 / 32700410799, -68118460800 / 10900136933, 87487479700 / 32700410799],
+    [0, -1754552775 / 470086768, 14199869525 / 1410260304, -10690763975 / 1880347072],
+    [0, 127303824393 / 49829197408, -318862633887 / 49829197408, 701980252875 / 199316789632],
+    [0, -282668133 / 205662961, 2019193451 / 616988883, -1453857185 / 822651844],
+    [0, 40617522 / 29380423, -110615467 / 29380423, 69997945 / 29380423],
+])
+
+
+def _rk45_step(fun, t, y, f, h):
+    K = np.empty((7, len(y)))
+    K[0] = f
+    for i in range(1, 6):
+        K[i] = fun(t + _DP_C[i] * h, y + h * (_DP_A[i] @ K[:i]))
+    y_new = y + h * (_DP_B @ K[:6])
+    K[6] = fun(t + h, y_new)
+    error = h * (_DP_E @ K)
+    # Dense output: y(t + s h) = y + h * Q @ [s, s^2, s^3, s^4]
+    Q = K.T @ _DP_P
+    return y_new, K[6], error, lambda s: y[:, None] + h * (Q @ s ** np.arange(1, 5)[:, None])
+
+
+def rk45(fun, t_span, y0, t_eval, rtol=1e-6, atol=1e-8, max_step=math.inf):
+    """
+    Integrate y' = fun(t, y) with adaptive Dormand-Prince 5(4) steps
+
+    The step size follows the local error estimate, not the sample grid:
+    samples in t_eval are read off each step's 4th order dense output, so
+    a fine output grid costs no extra steps.
+
+    Args:
+        fun: Right-hand side, returns an array like y
+        t_span: (t0, t1)
+        y0: Initial state
+        t_eval: Increasing sample times inside t_span
+        rtol, atol: Error tolerances
+        max_step: Upper bound on the step size
+
+    Returns:
+        Dict with 't', 'y' (len(t_eval), n), 'nfev' (calls to fun),
+        'steps' and 'rejected'
+    """
+    fun = Counter(fun)
+    t, t_end = float(t_span[0]), float(t_span[1])
+    y = np.asarray(y0, dtype=float)
+    t_eval = np.asarray(t_eval, dtype=float)
+    out = np.empty((len(t_eval), len(y)))
+    filled = np.searchsorted(t_eval, t, side="left")
+    out[:filled] = y
+    steps = rejected = 0
+
+    f = fun(t, y)
+    h = min(_initial_step(fun, t, y, f, 4, rtol, atol), max_step)
+    while filled < len(t_eval) and t < t_end:
+        h = min(h, max_step, t_end - t)
+        y_new, f_new, error, dense = _rk45_step(fun, t, y, f, h)
+        err = _error_norm(error, y, y_new, rtol, atol)
+        if not err <= 1:
+            # Rejected (or blew up): retry with a smaller step
+            rejected += 1
+            h *= max(0.2, 0.9 * err ** -0.2) if np.isfinite(err) else 0.2
+            if h < 1e-12:
+                raise RuntimeError(f"Step size underflow at t={t}")
+            continue
+
+        j = np.searchsorted(t_eval, t + h, side="right")
+        if j > filled:
+            out[filled:j] = dense((t_eval[filled:j] - t) / h).T
+            filled = j
+        t, y, f = t + h, y_new, f_new
+        steps += 1
+        h *= min(10.0, 0.9 * err ** -0.2) if err > 0 else 10.0
+
+    out[filled:] = y
+    return {"t": t_eval, "y": out, "nfev": fun.calls, "steps": steps, "rejected": rejected}
+
+
+def simulate(model, duration, sample_dt=0.05, method="rk45", **options):
+    """
+    Nozzle arm response sampled every sample_dt seconds
+
+    Args:
+        model: ArmModel
+        duration: Simulated seconds
+        sample_dt: Output spacing
+        method: 'rk45' (adaptive, options rtol/atol/max_step) or 'euler'
+            (fixed step, options dt and finite_difference, see ArmModel.euler)
+
+    Returns:
+        Dict with 't', 'y', 'nfev', 'steps', 'rejected' and 'height', the
+        nozzle height at each sample
+    """
+    t_eval = np.arange(0.0, duration + sample_dt / 2, sample_dt)
+    if method == "rk45":
+        result = rk45(model.derivative, (0.0, t_eval[-1]), model.initial_state(), t_eval, **options)
+    elif method == "euler":
+        result = model.euler(t_eval, **options)
+    else:
+        raise ValueError(f"Unknown method: {method}")
+    result["height"] = model.nozzle_height(t_eval, result["y"].T)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the fixed step and adaptive integrators on the nozzle arm")
+    parser.add_argument("--duration", type=float, default=600, help="simulated seconds")
+    parser.add_argument("--sample", type=float, default=0.05, help="output sample spacing in seconds")
+    parser.add_argument("--rtol", type=float, default=1e-6)
+    parser.add_argument("--atol", type=float, default=1e-8)
+    parser.add_argument("--plot", action="store_true")
+    args = parser.parse_args()
+
+    model = ArmModel()
+    reference = simulate(model, args.duration, args.sample, "rk45", rtol=1e-10, atol=1e-12)
+    # The scripts' scheme first, then both integrators on the same ODE (exact derivative
+    # term), so evaluation counts can be compared at matching errors
+    runs = [("scripts dt=0.05", "euler", {"dt": 0.05}),
+            ("euler dt=0.05", "euler", {"dt": 0.05, "finite_difference": False}),
+            ("euler dt=0.005", "euler", {"dt": 0.005, "finite_difference": False}),
+            ("euler dt=0.001", "euler", {"dt": 0.001, "finite_difference": False}),
+            ("euler dt=0.0002", "euler", {"dt": 0.0002, "finite_difference": False}),
+            ("rk45 rtol=1e-3", "rk45", {"rtol": 1e-3, "atol": 1e-5}),
+            ("rk45 rtol=1e-4", "rk45", {"rtol": 1e-4, "atol": 1e-6}),
+            (f"rk45 rtol={args.rtol:g}", "rk45", {"rtol": args.rtol, "atol": args.atol})]
+    print(f"{'method':>18} {'evaluations':>12} {'rejected':>9} {'max error (m)':>14} {'time (s)':>9}")
+    results = {}
+    for name, method, options in runs:
+        start = time.perf_counter()
+        result = simulate(model, args.duration, args.sample, method, **options)
+        elapsed = time.perf_counter() - start
+        error = np.abs(result["height"] - reference["height"]).max()
+        print(f"{name:>18} {result['nfev']:12d} {result['rejected']:9d} {error:14.2e} {elapsed:9.2f}")
+        results[name] = result
+
+    if args.plot:
+        plt.figure(figsize=(10, 6))
+        for name, result in results.items():
+            plt.plot(result["t"], result["height"], label=name)
+        plt.axhline(target_nozzle_height, color="gray", linestyle="--", label="Target")
+        plt.xlabel("Time (s)")
+        plt.ylabel("Nozzle Height (m)")
+        plt.legend()
+        plt.grid(True)
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
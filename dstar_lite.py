@@ -0,0 +1,191 @@
+# Incremental replanning (D* Lite) on a TrackGraph for lanes that get blocked mid-route
+import heapq
+import math
+
+
+class DStarLite:
+    """
+    D* Lite route from a moving start to a fixed goal
+
+    The search runs backwards from the goal and keeps its state (g, rhs
+    and the open queue) between queries. When an edge weight changes only
+    the nodes whose cost-to-goal is affected are re-expanded, so replanning
+    after a blocked lane costs a fraction of a new search.
+    """
+
+    def __init__(self, graph, start, goal):
+        self.graph = graph
+        self.goal = graph._lookup(goal)
+        self.start = graph._lookup(start)
+        self.last_expanded = 0
+
+        # Incoming edges as (source node, CSR slot); the weights are read
+        # from the graph on use so edge updates show up automatically
+        n = len(graph)
+        self._incoming = [[] for _ in range(n)]
+        indptr, indices = graph._indptr, graph._indices
+        for u in range(n):
+            for i in range(indptr[u], indptr[u + 1]):
+                self._incoming[indices[i]].append((u, i))
+        self._reset()
+
+    def _reset(self):
+        self._scale = self.graph.heuristic_scale
+        self._km = 0.0
+        self._last = self.start
+        self._g = {}
+        self._rhs = {self.goal: 0.0}
+        self._queue = []
+        self._queued = {}
+        self._push(self.goal)
+
+    # ------------------------------------------------------------------
+    # Core
+
+    def _h(self, a, b):
+        xs, ys = self.graph._xs, self.graph._ys
+        return self._scale * math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    def _key(self, u):
+        best = min(self._g.get(u, math.inf), self._rhs.get(u, math.inf))
+        return (best + self._h(self.start, u) + self._km, best)
+
+    def _push(self, u):
+        key = self._key(u)
+        self._queued[u] = key
+        heapq.heappush(self._queue, (key, u))
+
+    def _top_key(self):
+        # Skip heap entries superseded by a later push or removal
+        queue = self._queue
+        while queue and self._queued.get(queue[0][1]) != queue[0][0]:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else (math.inf, math.inf)
+
+    def _update_vertex(self, u):
+        if self._g.get(u, math.inf) != self._rhs.get(u, math.inf):
+            self._push(u)
+        else:
+            self._queued.pop(u, None)
+
+    def _best_successor_cost(self, u):
+        graph, g = self.graph, self._g
+        best = math.inf
+        for i in range(graph._indptr[u], graph._indptr[u + 1]):
+            cost = graph._weights[i] + g.get(graph._indices[i], math.inf)
+            if cost < best:
+                best = cost
+        return best
+
+    def _compute_shortest_path(self):
+        g, rhs, weights = self._g, self._rhs, self.graph._weights
+        expanded = 0
+        while True:
+            top = self._top_key()
+            start_g = g.get(self.start, math.inf)
+            start_rhs = rhs.get(self.start, math.inf)
+            if not (top < self._key(self.start) or start_rhs != start_g):
+                break
+            key, u = heapq.heappop(self._queue)
+            del self._queued[u]
+            new_key = self._key(u)
+            if key < new_key:
+                self._push(u)
+                continue
+
+            expanded += 1
+            g_u = g.get(u, math.inf)
+            rhs_u = rhs.get(u, math.inf)
+            if g_u > rhs_u:
+                # Overconsistent: settle u and improve its predecessors
+                g[u] = rhs_u
+                for p, i in self._incoming[u]:
+                    if p != self.goal:
+                        cost = weights[i] + rhs_u
+                        if cost < rhs.get(p, math.inf):
+                            rhs[p] = cost
+                            self._update_vertex(p)
+            else:
+                # Underconsistent: u got worse, re-derive whatever relied on it
+                g[u] = math.inf
+                for p, i in self._incoming[u] + [(u, None)]:
+                    if p == self.goal:
+                        continue
+                    if i is None or rhs.get(p, math.inf) == weights[i] + g_u:
+                        rhs[p] = self._best_successor_cost(p)
+                    self._update_vertex(p)
+        self.last_expanded = expanded
+
+    # ------------------------------------------------------------------
+    # Public API
+
+    def plan(self):
+        """
+        Current shortest route from the start to the goal
+
+        Returns:
+            (path, cost): list of node ids and total weight, or ([], inf)
+            if the goal cannot be reached
+        """
+        self._compute_shortest_path()
+        graph, g = self.graph, self._g
+        cost = g.get(self.start, math.inf)
+        if cost == math.inf:
+            return [], math.inf
+
+        path = [self.start]
+        u = self.start
+        while u != self.goal and len(path) <= len(graph):
+            best, best_v = math.inf, None
+            for i in range(graph._indptr[u], graph._indptr[u + 1]):
+                v = graph._indices[i]
+                c = graph._weights[i] + g.get(v, math.inf)
+                if c < best:
+                    best, best_v = c, v
+            if best_v is None:
+                return [], math.inf
+            u = best_v
+            path.append(u)
+        return [graph.node_ids[i] for i in path], cost
+
+    def move_to(self, node):
+        # The robot advanced along the route; keys stay valid through km
+        u = self.graph._lookup(node)
+        self._km += self._h(self._last, u)
+        self._last = u
+        self.start = u
+
+    def update_edge(self, node1, node2, weight):
+        """
+        Change an edge weight in the graph and repair the search state
+
+        Use float('inf') to close the edge. The next plan() call only
+        re-expands the part of the graph the change affects.
+        """
+        graph = self.graph
+        u, v = graph._lookup(node1), graph._lookup(node2)
+        arcs = [(u, i) for i in graph._edge_slots(u, v)]
+        if not graph.directed:
+            arcs += [(v, i) for i in graph._edge_slots(v, u)]
+        old = [(a, i, graph._weights[i]) for a, i in arcs]
+        graph.set_edge_weight(node1, node2, weight)
+
+        if self._scale > 0 and graph.heuristic_scale < self._scale:
+            # The edge got cheaper than the heuristic allows for, which
+            # would make it inadmissible: start the search over
+            self._reset()
+            return
+
+        rhs, g = self._rhs, self._g
+        for a, i, c_old in old:
+            b = graph._indices[i]
+            if a == self.goal:
+                continue
+            if c_old > weight:
+                rhs[a] = min(rhs.get(a, math.inf), weight + g.get(b, math.inf))
+            elif rhs.get(a, math.inf) == c_old + g.get(b, math.inf):
+                rhs[a] = self._best_successor_cost(a)
+            self._update_vertex(a)
+
+    def close_edge(self, node1, node2):
+        self.update_edge(node1, node2, math.inf)
@@ -1,7 +1,15 @@
+import argparse
+import csv
+import json
+import math
+import sys
+from collections import defaultdict
+
 import matplotlib.pyplot as plt
 import networkx as nx
 
-def main():
+
+def read_interactive():
     # Input node coordinates
     print("Enter nodes in the format: node_name x y (type 'done' to finish):")
     nodes = {}
@@ -22,6 +30,141 @@ def main():
         u, v, w = line.split()
         edges.append((u, v, float(w)))
 
+    return nodes, edges
+
+
+def read_rows(path):
+    # Rows of a CSV (comma separated), whitespace separated text or JSON list file
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            data = json.load(f)
+        yield from data
+        return
+
+    with open(path, newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = csv.reader(f)
+        else:
+            rows = (line.split() for line in f)
+        for row in rows:
+            if not row or row[0].startswith("#"):
+                continue
+            yield row
+
+
+def _numeric_rows(rows, numeric_from):
+    # Skip a header row (non-numeric where numbers are expected)
+    for i, row in enumerate(rows):
+        try:
+            values = [float(v) for v in row[numeric_from:]]
+        except ValueError:
+            if i == 0:
+                continue
+            raise ValueError(f"Bad row: {row}") from None
+        yield [str(v) for v in row[:numeric_from]] + values
+
+
+def load_graph(nodes_path, edges_path):
+    """
+    Build the graph from node and edge files in one pass each
+
+    Node rows are name, x, y and edge rows node1, node2, weight; an edge
+    naming a node that is not in the node rows raises ValueError. A JSON
+    file may also be an object with "nodes" and "edges" lists, in which
+    case it can be passed as both arguments.
+    """
+    G = nx.Graph()
+    if nodes_path.lower().endswith(".json") and nodes_path == edges_path:
+        with open(nodes_path) as f:
+            data = json.load(f)
+        if not (isinstance(data, dict) and "nodes" in data and "edges" in data):
+            raise ValueError(f"{nodes_path} is not a JSON graph with 'nodes' and 'edges' lists")
+        node_rows, edge_rows = data["nodes"], data["edges"]
+    else:
+        node_rows, edge_rows = read_rows(nodes_path), read_rows(edges_path)
+
+    G.add_nodes_from((name, {"pos": (x, y)}) for name, x, y in _numeric_rows(node_rows, 1))
+    edges = list(_numeric_rows(edge_rows, 2))
+    # networkx would add an unknown end as a new node without a position
+    unknown = sorted({name for u, v, _ in edges for name in (u, v) if name not in G})
+    if unknown:
+        raise ValueError(f"Edges name nodes missing from {nodes_path}: {', '.join(unknown)}")
+    G.add_weighted_edges_from(edges)
+    return G
+
+
+def load_queries(path):
+    # Rows of source, target
+    rows = read_rows(path)
+    queries = [(str(row[0]), str(row[1])) for row in rows]
+    if queries and queries[0] in (("source", "target"), ("start", "end")):
+        queries = queries[1:]
+    return queries
+
+
+def shortest_path(G, source, target):
+    # Path and length from a single (bidirectional) search
+    try:
+        total_weight, path = nx.bidirectional_dijkstra(G, source, target, weight="weight")
+    except (nx.NetworkXNoPath, nx.NodeNotFound):
+        return None, math.inf
+    return path, total_weight
+
+
+def run_queries(G, queries):
+    """
+    Answer a batch of (source, target) queries
+
+    Sources asked for more than once get one full search whose tree
+    answers all of their targets.
+
+    Returns:
+        List of (source, target, path, length) in query order, path is
+        None when the target cannot be reached
+    """
+    targets_by_source = defaultdict(set)
+    for source, target in queries:
+        targets_by_source[source].add(target)
+
+    answers = {}
+    for source, targets in targets_by_source.items():
+        if len(targets) == 1 or source not in G:
+            for target in targets:
+                answers[(source, target)] = shortest_path(G, source, target)
+            continue
+        lengths, paths = nx.single_source_dijkstra(G, source, weight="weight")
+        for target in targets:
+            answers[(source, target)] = (paths.get(target), lengths.get(target, math.inf))
+
+    return [(source, target, *answers[(source, target)]) for source, target in queries]
+
+
+def write_results(results, out):
+    writer = csv.writer(out)
+    writer.writerow(["source", "target", "length", "path"])
+    for source, target, path, length in results:
+        writer.writerow([source, target, length, "->".join(path) if path else ""])
+
+
+def draw_path(G, path, source, target):
+    pos = nx.get_node_attributes(G, 'pos')
+    edge_labels = nx.get_edge_attributes(G, 'weight')
+
+    plt.figure(figsize=(10, 6))
+    nx.draw(G, pos, with_labels=True, node_color='lightblue', node_size=500, font_weight='bold')
+    nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels)
+
+    # Highlight the shortest path
+    path_edges = list(zip(path, path[1:]))
+    nx.draw_networkx_edges(G, pos, edgelist=path_edges, edge_color='red', width=2)
+
+    plt.title(f"Shortest path from {source} to {target}")
+    plt.show()
+
+
+def interactive():
+    nodes, edges = read_interactive()
+
     # Create graph
     G = nx.Graph()
     for name, pos in nodes.items():
@@ -34,27 +177,51 @@ def main():
     source = input("\nEnter start node: ")
     target = input("Enter destination node: ")
 
-    try:
-        path = nx.dijkstra_path(G, source=source, target=target, weight="weight")
-        total_weight = nx.dijkstra_path_length(G, source=source, target=target, weight="weight")
-        print(f"Shortest path: {' -> '.join(path)} (Total weight: {total_weight})")
+    path, total_weight = shortest_path(G, source, target)
+    if path is None:
+        print(f"No path found from {source} to {target}.")
+        return
+    print(f"Shortest path: {' -> '.join(path)} (Total weight: {total_weight})")
+    draw_path(G, path, source, target)
+
 
-        # Draw graph
-        pos = nx.get_node_attributes(G, 'pos')
-        edge_labels = nx.get_edge_attributes(G, 'weight')
+def main():
+    parser = argparse.ArgumentParser(description="Shortest paths on a weighted graph (interactive without arguments)")
+    parser.add_argument("--nodes", help="node file (CSV/text rows 'name x y', or JSON)")
+    parser.add_argument("--edges", help="edge file (CSV/text rows 'node1 node2 weight', or JSON); "
+                                        "may be omitted when --nodes is a JSON graph with both lists")
+    parser.add_argument("--queries", help="query file with 'source target' rows")
+    parser.add_argument("--output", help="CSV file for the results (default: stdout)")
+    parser.add_argument("--plot", action="store_true", help="draw the path of the first query")
+    args = parser.parse_args()
 
-        plt.figure(figsize=(10, 6))
-        nx.draw(G, pos, with_labels=True, node_color='lightblue', node_size=500, font_weight='bold')
-        nx.draw_networkx_edge_labels(G, pos, edge_labels=edge_labels)
+    if not args.nodes:
+        interactive()
+        return
+    if not args.queries:
+        parser.error("--queries is required with --nodes")
+    if not args.edges:
+        if not args.nodes.lower().endswith(".json"):
+            parser.error("--edges is required unless --nodes is a JSON graph with 'nodes' and 'edges'")
+        args.edges = args.nodes
 
-        # Highlight the shortest path
-        path_edges = list(zip(path, path[1:]))
-        nx.draw_networkx_edges(G, pos, edgelist=path_edges, edge_color='red', width=2)
+    try:
+        G = load_graph(args.nodes, args.edges)
+    except ValueError as e:
+        parser.error(str(e))
+    queries = load_queries(args.queries)
+    results = run_queries(G, queries)
+
+    if args.output:
+        with open(args.output, "w", newline="") as out:
+            write_results(results, out)
+    else:
+        write_results(results, sys.stdout)
+
+    if args.plot and results and results[0][2]:
+        source, target, path, _ = results[0]
+        draw_path(G, path, source, target)
 
-        plt.title(f"Shortest path from {source} to {target}")
-        plt.show()
-    except nx.NetworkXNoPath:
-        print(f"No path found from {source} to {target}.")
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,12 @@
-import heapq
 import matplotlib.pyplot as plt
+from matplotlib.animation import FuncAnimation
 import numpy as np
 import time
 
+from track_ch import ContractionHierarchy
+from route_cache import RouteCache
+from track_graph import TrackGraph
+
 # Sample input data
 # Format for nodes: [node_id, x_coordinate, y_coordinate] 
 INPUT_NODES = [
@@ -40,32 +44,16 @@ INPUT_EDGES = [
 
 START_NODE = 1
 END_NODE = 8
+ROUTING_METHOD = "dijkstra"  # "dijkstra", "astar", "ch" (contraction hierarchy) or "cached"
+CH_FILE = "track_graph.ch.npz"  # Preprocessed hierarchy, rebuilt when the graph changes
+ANIMATION_SPEED = 2.0  # Edge weight covered per second of playback
+ANIMATION_FPS = 30
 
-def dijkstra(graph, start, end):
-    queue = [(0, start)]
-    min_cost = {start: 0}
-    previous_nodes = {start: None}
-
-    while queue:
-        current_cost, current_node = heapq.heappop(queue)
-
-        if current_node == end:
-            break
-
-        for neighbor, weight in graph[current_node]['edges'].items():
-            cost = current_cost + weight
-            if neighbor not in min_cost or cost < min_cost[neighbor]:
-                min_cost[neighbor] = cost
-                previous_nodes[neighbor] = current_node
-                heapq.heappush(queue, (cost, neighbor))
-
-    path = []
-    while end is not None:
-        path.append(end)
-        end = previous_nodes[end]
-    path.reverse()
-
-    return path, min_cost[path[-1]] if path else float('inf')
+# The track is compiled once (nodes and edges undirected, into the CSR
+# track graph), and its route cache lives as long as the graph, so every
+# repeated request in this process is answered from it
+TRACK = TrackGraph.from_lists(INPUT_NODES, INPUT_EDGES)
+ROUTES = RouteCache(TRACK)
 
 def draw_graph(graph, path=None):
     plt.figure(figsize=(10, 6))
@@ -95,7 +83,21 @@ def draw_graph(graph, path=None):
     plt.axis('equal')
     plt.show()
 
-def animate_movement(path, graph):
+def path_timeline(path, graph):
+    # Node coordinates along the path and the cumulative weight at each node
+    points = np.array([graph[node]['coords'] for node in path], dtype=float)
+    weights = [graph[a]['edges'][b] for a, b in zip(path, path[1:])]
+    return points, np.concatenate([[0.0], np.cumsum(weights)])
+
+def position_at(progress, points, cumulative):
+    # Position after covering `progress` weight units along the path
+    progress = min(max(progress, 0.0), cumulative[-1])
+    i = min(np.searchsorted(cumulative, progress, side='right') - 1, len(points) - 2)
+    span = cumulative[i + 1] - cumulative[i]
+    fraction = (progress - cumulative[i]) / span if span > 0 else 1.0
+    return points[i] + (points[i + 1] - points[i]) * fraction
+
+def animate_movement(path, graph, speed=ANIMATION_SPEED, fps=ANIMATION_FPS):
     fig, ax = plt.subplots(figsize=(10, 6))
     plt.xlim(-1, 1)
     plt.ylim(-1, 1)
@@ -112,56 +114,62 @@ def animate_movement(path, graph):
             neighbor_x, neighbor_y = graph[neighbor]['coords']
             ax.plot([x, neighbor_x], [y, neighbor_y], 'k-', alpha=0.5)
 
-    # Animate the movement
-    for i in range(len(path) - 1):
-        start = graph[path[i]]['coords']
-        end = graph[path[i + 1]]['coords']
-        for j in range(100):
-            ax.scatter(start[0] + (end[0] - start[0]) * j / 100, 
-                       start[1] + (end[1] - start[1]) * j / 100, 
-                       color='red', s=100)
-            plt.pause(0.05)
-        plt.scatter(end[0], end[1], color='red', s=100)  # Mark the end node
-
+    if len(path) < 2:
+        plt.show()
+        return None
+
+    # One marker artist moved every frame; only it is redrawn (blitting),
+    # so a frame costs the same however long the path is. Its position
+    # follows wall-clock time, each edge taking weight / speed seconds.
+    points, cumulative = path_timeline(path, graph)
+    marker, = ax.plot([], [], 'o', color='red', markersize=10, animated=True)
+    clock = {'start': None}
+
+    def init():
+        marker.set_data([], [])
+        return marker,
+
+    def update(_):
+        now = time.perf_counter()
+        if clock['start'] is None:
+            clock['start'] = now
+        progress = (now - clock['start']) * speed
+        x, y = position_at(progress, points, cumulative)
+        marker.set_data([x], [y])
+        if progress >= cumulative[-1]:
+            animation.event_source.stop()
+        return marker,
+
+    animation = FuncAnimation(fig, update, init_func=init, interval=1000 / fps,
+                              blit=True, cache_frame_data=False)
     plt.show()
+    return animation
 
 def main():
-    graph = {}
-    
-    # Input number of nodes
-    # num_nodes = int(input("Enter the number of nodes: "))
-    
-
-    # Input node coordinates
-    # print("Enter the nodes with their coordinates in the format 'node x y':")
-    for input_node in INPUT_NODES:
-        # node_input = input().strip().split()
-        node = int(input_node[0])
-        x = float(input_node[1])
-        y = float(input_node[2])
-        graph[node] = {'coords': (x, y), 'edges': {}}
-
-    # Input edges and weights
-    # num_edges = int(input("Enter the number of edges: "))
-    # print("Enter the edges in the format 'node1 node2 weight':")
-    for input_edge in INPUT_EDGES:
-        # edge_input = input().strip().split()
-        node1 = int(input_edge[0])
-        node2 = int(input_edge[1])
-        weight = int(input_edge[2])
-        graph[node1]['edges'][node2] = weight
-        graph[node2]['edges'][node1] = weight  # Assuming undirected graph
+    track = TRACK
+    graph = track.to_dict()  # Dict form for drawing
 
     # Input start and end nodes
     # start_node = int(input("Enter the start node: "))
     # end_node = int(input("Enter the end node: "))
 
     # Find the shortest path
-    path, total_weight = dijkstra(graph, START_NODE, END_NODE)
+    if ROUTING_METHOD == "ch":
+        hierarchy = ContractionHierarchy.load_or_build(track, CH_FILE)
+        path, total_weight = hierarchy.shortest_path(START_NODE, END_NODE)
+        expanded = hierarchy.last_settled
+    elif ROUTING_METHOD == "cached":
+        path, total_weight = ROUTES.shortest_path(START_NODE, END_NODE)
+        expanded = track.last_expanded
+    else:
+        path, total_weight = track.shortest_path(START_NODE, END_NODE, method=ROUTING_METHOD)
+        expanded = track.last_expanded
 
-    # Output the result
+    # Output the result (in the weight type of INPUT_EDGES)
+    total_weight = track.weight_value(total_weight)
     if path:
         print(f"The shortest path from node {START_NODE} to node {END_NODE} is: {' -> '.join(map(str, path))} with total weight {total_weight}.")
+        print(f"Route found with {ROUTING_METHOD}, {expanded} nodes expanded.")
         
         # Draw the graph
         draw_graph(graph, path)
@@ -0,0 +1,186 @@
+# Grid world with bit-packed walls for wall-following robots
+# One bit per cell (plus a border of walls), real distance sensing and
+# left/right-hand rule stepping with cycle detection over (x, y, orientation)
+import numpy as np
+
+# Orientation as in wall_simulation.Robot: 0 north (y + 1), 1 east, 2 south, 3 west
+HANDS = ("right", "left")
+
+
+class GridWorld:
+    """
+    Width x height cells, each free or wall, stored one bit per cell
+
+    Cells are addressed (x, y) with y pointing north (up). A one-cell
+    border of walls surrounds the grid, so everything outside it reads
+    as wall and the stepping loop needs no bounds checks. The bits live in
+    a bytearray, which plain Python indexes faster than a NumPy array, and
+    bulk loads go through np.packbits.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.stride = width + 2
+        self.cells = self.stride * (height + 2)
+        self.walls = bytearray((self.cells + 7) // 8)
+        # Moving one cell in each orientation moves the index by
+        self.offsets = (self.stride, 1, -self.stride, -1)
+        border = np.zeros((height + 2, self.stride), dtype=bool)
+        border[[0, -1], :] = True
+        border[:, [0, -1]] = True
+        self._or_bits(border)
+
+    @classmethod
+    def from_array(cls, walls):
+        # From a boolean array indexed [y, x] (row 0 is y = 0, the south edge)
+        walls = np.asarray(walls, dtype=bool)
+        world = cls(walls.shape[1], walls.shape[0])
+        padded = np.zeros((world.height + 2, world.stride), dtype=bool)
+        padded[1:-1, 1:-1] = walls
+        world._or_bits(padded)
+        return world
+
+    @classmethod
+    def from_strings(cls, rows, wall="#"):
+        # From text rows as drawn: the first row is the northern edge
+        width = max(len(row) for row in rows)
+        walls = np.array([[c == wall for c in row.ljust(width)] for row in reversed(rows)], dtype=bool)
+        return cls.from_array(walls)
+
+    @classmethod
+    def random(cls, width, height, density=0.3, seed=None):
+        # Independent random walls, a quick way to get large test worlds
+        rng = np.random.default_rng(seed)
+        return cls.from_array(rng.random((height, width)) < density)
+
+    def _or_bits(self, padded):
+        bits = np.packbits(padded.ravel(), bitorder="little")
+        merged = np.frombuffer(bytes(self.walls), dtype=np.uint8) | bits[:len(self.walls)]
+        self.walls[:] = merged.tobytes()
+
+    def index(self, x, y):
+        return (y + 1) * self.stride + x + 1
+
+    def position(self, index):
+        y, x = divmod(index, self.stride)
+        return x - 1, y - 1
+
+    def is_wall(self, x, y):
+        if not (-1 <= x <= self.width and -1 <= y <= self.height):
+            return True
+        i = self.index(x, y)
+        return bool(self.walls[i >> 3] >> (i & 7) & 1)
+
+    def set_wall(self, x, y, wall=True):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise ValueError(f"({x}, {y}) is outside the {self.width}x{self.height} grid")
+        i = self.index(x, y)
+        if wall:
+            self.walls[i >> 3] |= 1 << (i & 7)
+        else:
+            self.walls[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def to_array(self):
+        # Walls as a boolean [y, x] array (without the border)
+        bits = np.unpackbits(np.frombuffer(bytes(self.walls), dtype=np.uint8), bitorder="little")
+        return bits[:self.cells].reshape(self.height + 2, self.stride)[1:-1, 1:-1].astype(bool)
+
+    def distance(self, x, y, orientation, max_range=None):
+        """
+        Free cells ahead of (x, y) before the first wall
+
+        Args:
+            x, y: Sensor cell
+            orientation: 0 north, 1 east, 2 south, 3 west
+            max_range: Stop counting here (default: unlimited)
+
+        Returns:
+            Number of free cells, 0 when facing a wall
+        """
+        walls, step = self.walls, self.offsets[orientation]
+        i = self.index(x, y) + step
+        limit = max(self.width, self.height) if max_range is None else max_range
+        count = 0
+        while count < limit and not walls[i >> 3] >> (i & 7) & 1:
+            count += 1
+            i += step
+        return count
+
+    def follow_wall(self, x, y, orientation, hand="right", max_steps=None, goal=None, record_path=True):
+        """
+        Walk with the left- or right-hand rule until a goal, a cycle or the step limit
+
+        Each step, the robot turns toward its hand and moves if that side
+        is free; otherwise it moves straight ahead if it can, and otherwise
+        turns away from its hand in place. The rule is deterministic, so the
+        first (x, y, orientation) state seen twice means the robot is in a
+        loop forever: the run stops there at once. Visited states are kept
+        in a bitset of four bits per cell.
+
+        Args:
+            x, y, orientation: Start state (must be a free cell)
+            hand: 'right' or 'left'
+            max_steps: Step limit (default: four per cell, enough to reach every state)
+            goal: Optional (x, y) cell to stop at
+            record_path: Keep the visited cells (as an (N, 2) array)
+
+        Returns:
+            Dict with 'reason' ('goal', 'cycle' or 'max_steps'), 'steps',
+            the final 'x', 'y', 'orientation', 'path' (start state included;
+            None without record_path), and for cycles 'cycle_start' (step
+            index where the loop begins) and 'cycle_length' (steps per loop)
+        """
+        if hand not in HANDS:
+            raise ValueError(f"hand must be one of {HANDS}")
+        if self.is_wall(x, y):
+            raise ValueError(f"Start ({x}, {y}) is a wall")
+        toward = 1 if hand == "right" else 3  # Orientation change toward the hand
+        max_steps = 4 * self.cells if max_steps is None else max_steps
+        goal_index = -1 if goal is None else self.index(*goal)
+        path = [] if record_path else None
+        reason, steps, i, o = self._walk(self.index(x, y), orientation, toward, max_steps, goal_index, path)
+
+        end_x, end_y = self.position(i)
+        result = {"reason": reason, "steps": steps, "x": end_x, "y": end_y, "orientation": o, "path": None}
+        if record_path:
+            indices = np.array(path)
+            result["path"] = np.column_stack((indices % self.stride - 1, indices // self.stride - 1))
+        if reason == "cycle":
+            # Go round once more from the repeated state to measure the loop
+            _, length, _, _ = self._walk(i, o, toward, steps, -1, None)
+            result["cycle_length"] = length
+            result["cycle_start"] = steps - length
+        return result
+
+    def _walk(self, i, o, toward, max_steps, goal_index, path):
+        # The stepping loop on cell indices; returns (reason, steps, index, orientation)
+        walls, offsets = self.walls, self.offsets
+        away = 4 - toward
+        visited = bytearray((4 * self.cells + 7) // 8)
+        if path is not None:
+            path.append(i)
+        steps = 0
+        while True:
+            if i == goal_index:
+                return "goal", steps, i, o
+            state = i << 2 | o
+            if visited[state >> 3] >> (state & 7) & 1:
+                return "cycle", steps, i, o
+            visited[state >> 3] |= 1 << (state & 7)
+            if steps >= max_steps:
+                return "max_steps", steps, i, o
+
+            side = (o + toward) & 3
+            j = i + offsets[side]
+            if not walls[j >> 3] >> (j & 7) & 1:
+                o, i = side, j
+            else:
+                j = i + offsets[o]
+                if not walls[j >> 3] >> (j & 7) & 1:
+                    i = j
+                else:
+                    o = (o + away) & 3
+            steps += 1
+            if path is not None:
+                path.append(i)
@@ -1,8 +1,15 @@
+import argparse
+import os
 import pygame
 import sys
 import math
 import random
 
+# frame_capture is shared with the pygame simulation in robot-maze-simulation/src
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "robot-maze-simulation", "src"))
+from frame_capture import FrameCapture, add_capture_arguments, default_capture_steps, use_headless_display
+from occupancy_map import OccupancyMap
+
 # Constants
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
@@ -30,6 +37,10 @@ class Maze:
         
         # Generate internal walls for the maze
         self.generate_maze()
+        
+        # Walls rasterized once, so is_wall() is a lookup instead of a loop over the rects
+        self.occupancy = OccupancyMap.from_walls(self.walls, width, height, metadata={"kind": "maze"})
+        self.wall_samples = self.occupancy.point_samples(1)
     
     def generate_maze(self):
         # Create a simple maze with internal walls
@@ -53,12 +64,11 @@ class Maze:
                 self.walls.append(pygame.Rect(x, y, self.wall_thickness, wall_length))
     
     def is_wall(self, x, y):
-        # Check if the given point is inside any wall
-        point = pygame.Rect(x-1, y-1, 2, 2)  # Small rect around the point
-        for wall in self.walls:
-            if wall.colliderect(point):
-                return True
-        return False
+        # Check if the given point is inside any wall: a small 2x2 rect around
+        # the point, whose corner pygame.Rect truncates towards zero
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return True
+        return bool(self.wall_samples[int(y - 1) + 1, int(x - 1) + 1])
     
     def draw(self, screen):
         for wall in self.walls:
@@ -188,11 +198,19 @@ class Robot:
         pygame.draw.line(screen, GREEN, (self.x, self.y), (end_x, end_y), 1)
 
 def main():
+    parser = argparse.ArgumentParser(description="Robot Maze Simulation")
+    add_capture_arguments(parser)
+    args = parser.parse_args()
+    if args.capture:
+        use_headless_display()
+        default_capture_steps(args)
+
     # Initialize pygame
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Robot Maze Simulation")
     clock = pygame.time.Clock()
+    capture = FrameCapture(args.capture, args.every, args.fps) if args.capture else None
     
     # Create maze and robot
     maze = Maze(SCREEN_WIDTH, SCREEN_HEIGHT)
@@ -207,24 +225,38 @@ def main():
     
     robot = Robot(robot_x, robot_y, maze)
     
-    # Main game loop
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-        
-        # Update robot
-        robot.update()
-        
-        # Draw everything
+    def draw():
         screen.fill(WHITE)
         maze.draw(screen)
         robot.draw(screen)
-        
-        pygame.display.flip()
-        clock.tick(FPS)
     
+    # Main game loop
+    running = True
+    step = 0
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+        
+            # Update robot
+            robot.update()
+            step += 1
+            if args.steps is not None and step >= args.steps:
+                running = False
+        
+            # Draw everything
+            if capture:
+                # Headless: no frame limit, only grabbed frames are drawn
+                capture.step(screen, draw)
+            else:
+                draw()
+                pygame.display.flip()
+                clock.tick(FPS)
+    finally:
+        # Also on Ctrl-C or an error, so the video is flushed and finalized
+        if capture:
+            capture.close()
     pygame.quit()
     sys.exit()
 
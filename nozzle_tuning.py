@@ -0,0 +1,173 @@
+# Batch evaluation of nozzle-height PID gains
+# Same arm, terrain and PID dynamics as nozzleoutputplot.py, simulated for
+# many gain combinations at once with NumPy arrays over the batch
+import argparse
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from pid import PID
+
+# Constants (as in nozzleoutputplot.py)
+L1, L2 = 1.0, 1.0
+g = 9.81
+dt = 0.05
+wheel_radius = 0.2
+wheel_offset = 0.6
+target_nozzle_height = 1.2
+theta1_start, theta2_start = np.radians([60, -60])
+
+# Gains of the script, used for any gain not given
+DEFAULT_GAINS = {"kp1": 200.0, "ki1": 2.0, "kd1": 0.3, "kp2": 200.0, "ki2": 2.0, "kd2": 0.2}
+
+
+def road_profile(x):
+    return 0.2 * np.sin(0.8 * x)
+
+
+def base_height(frame):
+    # Height of the arm base on the platform at a frame (platform moves 0.02 per frame)
+    base_x = 0.5 + 0.02 * frame
+    return (road_profile(base_x - wheel_offset) + road_profile(base_x + wheel_offset)) / 2 + wheel_radius
+
+
+def evaluate_gains(steps=2000, settle_band=0.02, return_heights=False, **gains):
+    """
+    Simulate every gain combination for the given number of steps
+
+    Gains are given as kp1, ki1, kd1, kp2, ki2, kd2 (joint 1 and joint 2)
+    and broadcast against each other; missing ones take the values of
+    nozzleoutputplot.py. Both PIDs act on the same nozzle height error,
+    exactly like the scalar script.
+
+    Args:
+        steps: Number of dt steps (2000 = 100 s)
+        settle_band: Error band (m) for the settling time
+        return_heights: Also return the (steps, batch) nozzle heights
+        **gains: Scalars or arrays of gains
+
+    Returns:
+        Dict of per-combination arrays: 'iae' (integral of absolute
+        height error, m*s), 'overshoot' (m past the target, on the far
+        side from the start), 'settling_time' (s after which the error
+        stays inside settle_band, inf if it never does), 'stable' (False
+        where the simulation blew up), plus the broadcast gains and
+        optionally 'heights'.
+    """
+    unknown = set(gains) - set(DEFAULT_GAINS)
+    if unknown:
+        raise ValueError(f"Unknown gains: {sorted(unknown)}")
+    names = list(DEFAULT_GAINS)
+    kp1, ki1, kd1, kp2, ki2, kd2 = (np.ravel(a).astype(float) for a in np.broadcast_arrays(
+        *[gains.get(name, DEFAULT_GAINS[name]) for name in names]))
+    n = len(kp1)
+
+    theta1 = np.full(n, theta1_start)
+    theta2 = np.full(n, theta2_start)
+    theta1_dot = np.zeros(n)
+    theta2_dot = np.zeros(n)
+    pid1 = PID(kp1, ki1, kd1, dt=dt, initial_error=0.0)
+    pid2 = PID(kp2, ki2, kd2, dt=dt, initial_error=0.0)
+
+    iae = np.zeros(n)
+    overshoot = np.zeros(n)
+    last_outside = np.full(n, -1)
+    stable = np.ones(n, dtype=bool)
+    heights = np.empty((steps, n)) if return_heights else None
+    side = None
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        for frame in range(steps):
+            # Nozzle height from forward kinematics
+            y2 = base_height(frame) + L1 * np.sin(theta1) + L2 * np.sin(theta1 + theta2)
+            if return_heights:
+                heights[frame] = y2
+
+            # PID updates, both joints on the same error
+            error = target_nozzle_height - y2
+            tau1 = pid1.update(target_nozzle_height, y2)
+            tau2 = pid2.update(target_nozzle_height, y2)
+
+            # Dynamics (semi-implicit Euler, as in the script)
+            theta1_dot += (tau1 - g * np.sin(theta1)) * dt
+            theta2_dot += (tau2 - g * np.sin(theta1 + theta2)) * dt
+            theta1 += theta1_dot * dt
+            theta2 += theta2_dot * dt
+
+            # Metrics, accumulated so no history has to be kept
+            if side is None:
+                side = np.sign(error)  # Direction the nozzle has to move in
+            abs_error = np.abs(error)
+            iae += abs_error * dt
+            np.maximum(overshoot, -error * side, out=overshoot)
+            last_outside[abs_error > settle_band] = frame
+            stable &= np.isfinite(y2)
+
+    settling_time = (last_outside + 1) * dt
+    settling_time[last_outside == steps - 1] = np.inf
+    iae[~stable] = np.inf
+    overshoot[~stable] = np.inf
+    settling_time[~stable] = np.inf
+
+    result = {"iae": iae, "overshoot": overshoot, "settling_time": settling_time, "stable": stable,
+              "kp1": kp1, "ki1": ki1, "kd1": kd1, "kp2": kp2, "ki2": ki2, "kd2": kd2}
+    if return_heights:
+        result["heights"] = heights
+    return result
+
+
+def gain_grid(**ranges):
+    # Every combination of the given gain values, as flat arrays per gain name
+    names = list(ranges)
+    grids = np.meshgrid(*[np.asarray(ranges[name], dtype=float) for name in names], indexing="ij")
+    return {name: grid.ravel() for name, grid in zip(names, grids)}
+
+
+def best(result, count=10, key="iae"):
+    # Indices of the best combinations by a metric (lower is better)
+    return np.argsort(result[key], kind="stable")[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a grid of nozzle PID gains (same gains on both joints)")
+    parser.add_argument("--kp", type=float, nargs=3, default=[50, 400, 15], metavar=("MIN", "MAX", "N"))
+    parser.add_argument("--ki", type=float, nargs=3, default=[0, 10, 11], metavar=("MIN", "MAX", "N"))
+    parser.add_argument("--kd", type=float, nargs=3, default=[0, 1, 11], metavar=("MIN", "MAX", "N"))
+    parser.add_argument("--steps", type=int, default=2000)
+    parser.add_argument("--band", type=float, default=0.02, help="settling band in metres")
+    parser.add_argument("--sort", choices=["iae", "overshoot", "settling_time"], default="iae")
+    parser.add_argument("--plot", action="store_true", help="plot the best response against the script's gains")
+    args = parser.parse_args()
+
+    kp, ki, kd = (np.linspace(lo, hi, int(count)) for lo, hi, count in (args.kp, args.ki, args.kd))
+    grid = gain_grid(kp=kp, ki=ki, kd=kd)
+    result = evaluate_gains(args.steps, args.band,
+                            kp1=grid["kp"], ki1=grid["ki"], kd1=grid["kd"],
+                            kp2=grid["kp"], ki2=grid["ki"], kd2=grid["kd"])
+
+    print(f"{len(grid['kp'])} combinations, {result['stable'].sum()} stable")
+    print(f"{'Kp':>8} {'Ki':>8} {'Kd':>8} {'IAE':>10} {'overshoot':>10} {'settling':>10}")
+    for i in best(result, key=args.sort):
+        print(f"{grid['kp'][i]:8.2f} {grid['ki'][i]:8.2f} {grid['kd'][i]:8.2f} "
+              f"{result['iae'][i]:10.4f} {result['overshoot'][i]:10.4f} {result['settling_time'][i]:10.2f}")
+
+    if args.plot:
+        i = best(result, 1, args.sort)[0]
+        top = {"kp1": grid["kp"][i], "ki1": grid["ki"][i], "kd1": grid["kd"][i],
+               "kp2": grid["kp"][i], "ki2": grid["ki"][i], "kd2": grid["kd"][i]}
+        tuned = evaluate_gains(args.steps, args.band, return_heights=True, **top)["heights"][:, 0]
+        script = evaluate_gains(args.steps, args.band, return_heights=True)["heights"][:, 0]
+        t = np.arange(args.steps) * dt
+        plt.figure(figsize=(10, 6))
+        plt.plot(t, script, label="Script gains", color="red")
+        plt.plot(t, tuned, label=f"Best: Kp={top['kp1']:.1f} Ki={top['ki1']:.2f} Kd={top['kd1']:.2f}", color="green")
+        plt.axhline(target_nozzle_height, color="gray", linestyle="--", label="Target")
+        plt.xlabel("Time (s)")
+        plt.ylabel("Nozzle Height (m)")
+        plt.legend()
+        plt.grid(True)
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
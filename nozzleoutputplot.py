@@ -2,6 +2,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import matplotlib.patches as patches
+from arm_dynamics import ArmModel, simulate
+from pid import PID
 
 # Constants
 L1, L2 = 1.0, 1.0              # Arm link lengths
@@ -15,20 +17,6 @@ platform_height = 0.3
 wheel_radius = 0.2
 wheel_offset = 0.6  # from center
 
-# PID controller for nozzle height
-class PID:
-    def __init__(self, Kp, Ki, Kd):
-        self.Kp, self.Ki, self.Kd = Kp, Ki, Kd
-        self.integral = 0
-        self.prev_error = 0
-
-    def update(self, target, current):
-        error = target - current
-        self.integral += error * dt
-        derivative = (error - self.prev_error) / dt
-        self.prev_error = error
-        return self.Kp * error + self.Ki * self.integral + self.Kd * derivative
-
 # Terrain function
 def road_profile(x):
     return 0.2 * np.sin(0.8 * x)
@@ -40,8 +28,11 @@ theta1_target = np.radians(20)
 theta2_target = np.radians(0)
 
 # PID controllers for both joints
-pid1 = PID(Kp=200, Ki=2, Kd=0.3)
-pid2 = PID(Kp=200, Ki=2, Kd=0.2)
+pid1 = PID(Kp=200, Ki=2, Kd=0.3, dt=dt, initial_error=0.0)
+pid2 = PID(Kp=200, Ki=2, Kd=0.2, dt=dt, initial_error=0.0)
+
+# Integrator for the PID arm: "euler" (fixed dt, as below) or "rk45" (adaptive, arm_dynamics.py)
+INTEGRATOR = "euler"
 
 # Set the target height of the nozzle
 target_nozzle_height = 1.2  # Adjust to desired height
@@ -101,6 +92,11 @@ for frame in range(num_frames):
     x1_static, y1_static, x2_static, y2_static = forward_kinematics(static_theta1, static_theta2, base_x, base_y)
     nozzle_heights.append(y2_static)
 
+if INTEGRATOR == "rk45":
+    # Same arm and gains as one ODE, integrated with adaptive steps and sampled at the frame times
+    arm = ArmModel(pid1.Kp, pid1.Ki, pid1.Kd, pid2.Kp, pid2.Ki, pid2.Kd, target=target_nozzle_height)
+    nozzle_heights_pid = list(simulate(arm, (num_frames - 1) * dt, dt)["height"])
+
 # Plotting nozzle heights
 plt.figure(figsize=(10, 12))
 plt.plot(np.arange(num_frames) * dt, nozzle_heights, label='Nozzle Height (Static)', color='blue')
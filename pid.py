@@ -0,0 +1,170 @@
+# PID controllers whose state lives in NumPy arrays, so one update() call
+# advances any number of them (batch simulators, several robots)
+import numpy as np
+
+ANTI_WINDUP = (None, "clamping", "back_calculation")
+
+
+class PID:
+    """
+    N PID controllers stepped together
+
+    Gains, limits and dt broadcast against each other and against shape,
+    so scalars give one controller and arrays give one per element. With
+    the defaults it is the plain PID used throughout the scripts: the
+    integral is the sum of error * dt and the derivative the difference
+    of successive errors over dt.
+
+    Args:
+        Kp, Ki, Kd: Gains (scalars or arrays)
+        dt: Default time step for update()
+        output_limits: (low, high) the output is clamped to, None for no limit
+        integral_limits: (low, high) for the error integral, None for no limit
+        anti_windup: None, 'clamping' (stop integrating while the output is
+            saturated and the error drives it further) or 'back_calculation'
+            (bleed the integral by Kb times the amount the output was clipped)
+        Kb: Back-calculation gain (default sqrt(Ki / Kd), or Ki / Kp without
+            a derivative term)
+        derivative_filter: Time constant (s) of a first-order low-pass on
+            the derivative term, 0 for none
+        derivative_on: 'error', or 'measurement' to avoid the derivative
+            kick when the setpoint jumps
+        initial_error: Error assumed before the first update. None skips
+            the derivative on the first update (no kick); 0 reproduces the
+            scripts' controllers, which start from prev_error = 0
+        shape: Number or shape of controllers, if not given by the gains
+    """
+
+    def __init__(self, Kp, Ki=0.0, Kd=0.0, dt=None, output_limits=(None, None), integral_limits=(None, None),
+                 anti_windup=None, Kb=None, derivative_filter=0.0, derivative_on="error", initial_error=None,
+                 shape=()):
+        if anti_windup not in ANTI_WINDUP:
+            raise ValueError(f"anti_windup must be one of {ANTI_WINDUP}")
+        if derivative_on not in ("error", "measurement"):
+            raise ValueError("derivative_on must be 'error' or 'measurement'")
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        self.shape = np.broadcast_shapes(np.shape(Kp), np.shape(Ki), np.shape(Kd), shape)
+        self.Kp = np.broadcast_to(np.asarray(Kp, dtype=float), self.shape).copy()
+        self.Ki = np.broadcast_to(np.asarray(Ki, dtype=float), self.shape).copy()
+        self.Kd = np.broadcast_to(np.asarray(Kd, dtype=float), self.shape).copy()
+        self.dt = dt
+        self.output_limits = output_limits
+        self.integral_limits = integral_limits
+        self.anti_windup = anti_windup
+        if Kb is None:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                Kb = np.where(self.Kd > 0, np.sqrt(np.abs(self.Ki / self.Kd)), np.abs(self.Ki / self.Kp))
+            Kb = np.nan_to_num(Kb, nan=0.0, posinf=0.0)
+        self.Kb = np.broadcast_to(np.asarray(Kb, dtype=float), self.shape).copy()
+        self.derivative_filter = derivative_filter
+        self.derivative_on = derivative_on
+        self.initial_error = initial_error
+
+        self.integral = np.zeros(self.shape)
+        self.derivative = np.zeros(self.shape)
+        self.output = np.zeros(self.shape)
+        self._prev = np.zeros(self.shape)
+        self._has_prev = np.zeros(self.shape, dtype=bool)
+        self.reset()
+
+    def reset(self, mask=None):
+        # Clear the state of all controllers, or of those where mask is True
+        if mask is None:
+            mask = np.ones(self.shape, dtype=bool)
+        self.integral[mask] = 0.0
+        self.derivative[mask] = 0.0
+        self.output[mask] = 0.0
+        if self.initial_error is not None and self.derivative_on == "error":
+            self._prev[mask] = self.initial_error
+            self._has_prev[mask] = True
+        else:
+            self._has_prev[mask] = False
+
+    @property
+    def output_limits(self):
+        return self._output_limits
+
+    @output_limits.setter
+    def output_limits(self, limits):
+        # Whether clipping can change anything is decided here, not on every update
+        self._output_limits = _limits(limits)
+        self._clip_output = _bounded(*self._output_limits)
+
+    @property
+    def integral_limits(self):
+        return self._integral_limits
+
+    @integral_limits.setter
+    def integral_limits(self, limits):
+        self._integral_limits = _limits(limits)
+        self._clip_integral = _bounded(*self._integral_limits)
+
+    @property
+    def saturated(self):
+        # True where the last output was clipped to the output limits
+        low, high = self.output_limits
+        return (self.output <= low) | (self.output >= high)
+
+    def update(self, setpoint, measurement, dt=None):
+        """
+        Advance every controller by one step
+
+        Args:
+            setpoint, measurement: Scalars or arrays broadcasting to shape
+            dt: Time step (scalar or array), default the one given at construction
+
+        Returns:
+            Controller outputs, clamped to output_limits (array of shape,
+            a 0-d array for a single controller)
+        """
+        dt = self.dt if dt is None else dt
+        if dt is None:
+            raise ValueError("No dt given")
+        setpoint = np.asarray(setpoint, dtype=float)
+        measurement = np.asarray(measurement, dtype=float)
+        error = setpoint - measurement
+        if error.shape != self.shape:
+            error = np.broadcast_to(error, self.shape)
+
+        # Derivative of the error, or of the measurement (no setpoint kick)
+        signal = error if self.derivative_on == "error" else -np.broadcast_to(measurement, self.shape)
+        raw = np.where(self._has_prev, (signal - self._prev) / dt, 0.0)
+        self._prev = np.array(signal, dtype=float)
+        self._has_prev[...] = True
+        if self.derivative_filter > 0:
+            self.derivative = self.derivative + (raw - self.derivative) * (dt / (self.derivative_filter + dt))
+        else:
+            self.derivative = raw
+
+        integral = self.integral + error * dt
+        proportional = self.Kp * error
+        derivative = self.Kd * self.derivative
+        output = proportional + self.Ki * integral + derivative
+        low, high = self.output_limits
+        clipped = np.clip(output, low, high) if self._clip_output else output
+
+        if self.anti_windup == "clamping":
+            # Keep the old integral where integrating would push further into saturation
+            winding = (clipped != output) & (np.sign(output - clipped) == np.sign(self.Ki * error))
+            integral = np.where(winding, self.integral, integral)
+            output = proportional + self.Ki * integral + derivative
+            clipped = np.clip(output, low, high)
+        elif self.anti_windup == "back_calculation":
+            with np.errstate(divide="ignore", invalid="ignore"):
+                bleed = np.where(self.Ki != 0, self.Kb * (clipped - output) / self.Ki, 0.0)
+            integral = integral + bleed * dt
+
+        low, high = self.integral_limits
+        self.integral = np.clip(integral, low, high) if self._clip_integral else integral
+        self.output = clipped
+        return clipped
+
+
+def _limits(limits):
+    low, high = limits
+    return (-np.inf if low is None else low, np.inf if high is None else high)
+
+
+def _bounded(low, high):
+    # Whether clipping to (low, high) can change anything (skips the clip when unlimited)
+    return bool(np.isfinite(low).any() or np.isfinite(high).any())
@@ -0,0 +1,65 @@
+# Distance sensors cast on a wall mask with NumPy
+# The track surface is read once into a boolean array; every ray of every
+# robot is then sampled in a single gather instead of get_at per pixel
+import math
+
+import numpy as np
+import pygame
+
+
+def wall_mask(surface, wall_color=(0, 0, 0)):
+    """
+    Wall pixels of a surface as a boolean array indexed [x, y]
+
+    Args:
+        surface: pygame Surface the track is drawn on
+        wall_color: RGB colour of the walls
+
+    Returns:
+        (width, height) boolean array, True on wall pixels
+    """
+    return (pygame.surfarray.array3d(surface) == np.asarray(wall_color, dtype=np.uint8)).all(axis=2)
+
+
+def fan_angles(heading, count=16, spread=2 * math.pi):
+    # count ray angles spread evenly around heading (a full circle by default)
+    if spread >= 2 * math.pi:
+        offsets = np.arange(count) * (2 * math.pi / count)
+    elif count == 1:
+        offsets = np.zeros(1)
+    else:
+        offsets = np.linspace(-spread / 2, spread / 2, count)
+    return np.add.outer(heading, offsets)
+
+
+def cast_rays(wall, x, y, angles, max_distance=60):
+    """
+    Distance to the first wall pixel along any number of rays
+
+    Matches the per-pixel loop of get_distance_to_wall: the ray is sampled
+    at whole-pixel steps 0..max_distance-1 (coordinates truncated with
+    int()), and leaving the surface or seeing no wall gives max_distance.
+    x, y and angles broadcast, so one robot can cast a fan and many
+    robots can be sensed at once.
+
+    Args:
+        wall: (width, height) boolean wall mask, see wall_mask()
+        x, y: Ray origins (scalars or arrays)
+        angles: Ray directions in radians (scalar or array)
+        max_distance: Sensor range in pixels
+
+    Returns:
+        Integer distances with the broadcast shape of x, y and angles
+    """
+    width, height = wall.shape
+    angles = np.asarray(angles, dtype=float)
+    steps = np.arange(max_distance)
+    # (..., max_distance) sample coordinates, truncated towards zero like int()
+    px = (np.asarray(x, dtype=float)[..., None] + np.cos(angles)[..., None] * steps).astype(np.intp)
+    py = (np.asarray(y, dtype=float)[..., None] + np.sin(angles)[..., None] * steps).astype(np.intp)
+    outside = (px < 0) | (px >= width) | (py < 0) | (py >= height)
+    hit = wall.ravel()[np.where(outside, 0, px * height + py)] & ~outside
+    # A wall only counts if the ray reaches it before leaving the surface
+    first_hit = np.where(hit.any(axis=-1), hit.argmax(axis=-1), max_distance)
+    first_outside = np.where(outside.any(axis=-1), outside.argmax(axis=-1), max_distance)
+    return np.where(first_hit < first_outside, first_hit, max_distance)
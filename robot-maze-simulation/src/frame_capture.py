@@ -0,0 +1,115 @@
+# Headless frame capture for the pygame simulations
+import os
+import queue
+import subprocess
+import threading
+
+import numpy as np
+import pygame
+
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".webm", ".mov")
+DEFAULT_CAPTURE_STEPS = 1800  # Step limit of a capture run without --steps
+
+
+def use_headless_display():
+    # Render off-screen; must be called before pygame.display.set_mode
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+
+
+def add_capture_arguments(parser):
+    # Command line options shared by the simulations
+    parser.add_argument("--capture", metavar="OUTPUT",
+                        help="record headless: a directory for a PNG sequence or a video file (needs ffmpeg)")
+    parser.add_argument("--every", type=int, default=1, help="grab a frame every N simulation steps")
+    parser.add_argument("--steps", type=int, default=None,
+                        help=f"stop after this many simulation steps (default with --capture: {DEFAULT_CAPTURE_STEPS})")
+    parser.add_argument("--fps", type=int, default=30, help="frame rate of the recorded video")
+
+
+def default_capture_steps(args):
+    # The dummy display never sends QUIT, so a capture must end by itself
+    if args.steps is None:
+        args.steps = DEFAULT_CAPTURE_STEPS
+
+
+class FrameCapture:
+    """
+    Grabs every N-th frame of a surface and writes it from a background thread
+
+    Frames go to a numbered PNG sequence in a directory, or are piped as
+    raw RGB into ffmpeg when the output is a video file name. The queue
+    between the simulation and the writer is bounded, so a slow disk or
+    encoder throttles the simulation instead of filling memory.
+    """
+
+    def __init__(self, output, every=1, fps=30, max_queued=32):
+        self.output = output
+        self.every = max(1, every)
+        self.fps = fps
+        self.frames_written = 0
+        self._steps = 0
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._encoder = None
+        self._error = None
+        self._video = output.lower().endswith(VIDEO_EXTENSIONS)
+        if not self._video:
+            os.makedirs(output, exist_ok=True)
+        self._thread = threading.Thread(target=self._write_frames, daemon=True)
+        self._thread.start()
+
+    def step(self, surface, draw=None):
+        # Call once per simulation step. draw() renders the scene and is
+        # only called for the steps that are grabbed, so the steps in
+        # between cost no rendering at all.
+        self._steps += 1
+        if (self._steps - 1) % self.every:
+            return
+        if self._error is not None:
+            raise self._error
+        if draw is not None:
+            draw()
+        # (width, height, 3) copy of the pixels, transposed to row-major
+        frame = np.ascontiguousarray(pygame.surfarray.array3d(surface).transpose(1, 0, 2))
+        self._queue.put(frame)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        if self._encoder is not None:
+            self._encoder.stdin.close()
+            self._encoder.wait()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open_encoder(self, height, width):
+        return subprocess.Popen(
+            ["ffmpeg", "-loglevel", "error", "-y",
+             "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(self.fps),
+             "-i", "-", "-pix_fmt", "yuv420p", self.output],
+            stdin=subprocess.PIPE,
+            start_new_session=True)  # Ctrl-C stops the simulation, close() still finishes the video
+
+    def _write_frames(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                return
+            if self._error is not None:
+                continue  # Keep draining so the simulation never blocks
+            try:
+                if self._video:
+                    if self._encoder is None:
+                        self._encoder = self._open_encoder(*frame.shape[:2])
+                    self._encoder.stdin.write(frame.tobytes())
+                else:
+                    path = os.path.join(self.output, f"frame_{self.frames_written:06d}.png")
+                    pygame.image.save(pygame.image.frombuffer(frame.tobytes(), frame.shape[1::-1], "RGB"), path)
+                self.frames_written += 1
+            except (OSError, pygame.error) as e:
+                self._error = e
@@ -1,18 +1,37 @@
 from field import RiceFieldMap, SCREEN_HEIGHT, SCREEN_WIDTH, WHITE, BLACK, FPS
 from robot import Robot
+from frame_capture import FrameCapture, add_capture_arguments, default_capture_steps, use_headless_display
+from occupancy_map import OccupancyMap
+import argparse
+import os
 import random
 import sys
 import pygame
 
 def main():
+    parser = argparse.ArgumentParser(description="Rice Field Robot Simulation")
+    parser.add_argument("--map", metavar="PATH",
+                        help="occupancy map (.npz) to load; built and saved there if it does not exist yet")
+    add_capture_arguments(parser)
+    args = parser.parse_args()
+    if args.capture:
+        use_headless_display()
+        default_capture_steps(args)
+
     # Initialize pygame
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Rice Field Robot Simulation")
     clock = pygame.time.Clock()
+    capture = FrameCapture(args.capture, args.every, args.fps) if args.capture else None
     
     # Create rice field map and robot
-    field_map = RiceFieldMap(SCREEN_WIDTH, SCREEN_HEIGHT)
+    if args.map and os.path.exists(args.map):
+        field_map = RiceFieldMap(SCREEN_WIDTH, SCREEN_HEIGHT, OccupancyMap.load(args.map))
+    else:
+        field_map = RiceFieldMap(SCREEN_WIDTH, SCREEN_HEIGHT)
+        if args.map:
+            field_map.occupancy.save(args.map)
     
     # Place robot in a valid position (top-left section)
     robot_x = field_map.wall_thickness + 50
@@ -23,37 +42,7 @@ def main():
     # Font for displaying coverage percentage
     font = pygame.font.SysFont(None, 24)
     
-    # Main game loop
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    # Reset simulation
-                    field_map = RiceFieldMap(SCREEN_WIDTH, SCREEN_HEIGHT)
-                    robot = Robot(robot_x, robot_y, field_map)
-                elif event.key == pygame.K_r:
-                    # Manually place robot in a different section
-                    sections = [
-                        (field_map.wall_thickness + 50, field_map.wall_thickness + 50),  # Top-left
-                        (SCREEN_WIDTH // 2, field_map.wall_thickness + 50),  # Top-middle
-                        (SCREEN_WIDTH - field_map.wall_thickness - 50, field_map.wall_thickness + 50),  # Top-right
-                        (field_map.wall_thickness + 50, SCREEN_HEIGHT // 2),  # Middle-left
-                        (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2),  # Center
-                        (SCREEN_WIDTH - field_map.wall_thickness - 50, SCREEN_HEIGHT // 2),  # Middle-right
-                        (field_map.wall_thickness + 50, SCREEN_HEIGHT - field_map.wall_thickness - 50),  # Bottom-left
-                        (SCREEN_WIDTH // 2, SCREEN_HEIGHT - field_map.wall_thickness - 50),  # Bottom-middle
-                        (SCREEN_WIDTH - field_map.wall_thickness - 50, SCREEN_HEIGHT - field_map.wall_thickness - 50)  # Bottom-right
-                    ]
-                    robot_x, robot_y = random.choice(sections)
-                    robot = Robot(robot_x, robot_y, field_map)
-        
-        # Update robot
-        robot.update()
-        
-        # Draw everything
+    def draw():
         screen.fill(WHITE)
         field_map.draw(screen)
         robot.draw(screen)
@@ -66,10 +55,54 @@ def main():
         # Display instructions
         instructions = font.render("Press SPACE to reset, R to randomly reposition robot", True, BLACK)
         screen.blit(instructions, (10, 40))
-        
-        pygame.display.flip()
-        clock.tick(FPS)
     
+    # Main game loop
+    running = True
+    step = 0
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_SPACE:
+                        # Reset simulation (same walls: reuse the occupancy map and its derived grids)
+                        field_map = RiceFieldMap(SCREEN_WIDTH, SCREEN_HEIGHT, field_map.occupancy)
+                        robot = Robot(robot_x, robot_y, field_map)
+                    elif event.key == pygame.K_r:
+                        # Manually place robot in a different section
+                        sections = [
+                            (field_map.wall_thickness + 50, field_map.wall_thickness + 50),  # Top-left
+                            (SCREEN_WIDTH // 2, field_map.wall_thickness + 50),  # Top-middle
+                            (SCREEN_WIDTH - field_map.wall_thickness - 50, field_map.wall_thickness + 50),  # Top-right
+                            (field_map.wall_thickness + 50, SCREEN_HEIGHT // 2),  # Middle-left
+                            (SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2),  # Center
+                            (SCREEN_WIDTH - field_map.wall_thickness - 50, SCREEN_HEIGHT // 2),  # Middle-right
+                            (field_map.wall_thickness + 50, SCREEN_HEIGHT - field_map.wall_thickness - 50),  # Bottom-left
+                            (SCREEN_WIDTH // 2, SCREEN_HEIGHT - field_map.wall_thickness - 50),  # Bottom-middle
+                            (SCREEN_WIDTH - field_map.wall_thickness - 50, SCREEN_HEIGHT - field_map.wall_thickness - 50)  # Bottom-right
+                        ]
+                        robot_x, robot_y = random.choice(sections)
+                        robot = Robot(robot_x, robot_y, field_map)
+        
+            # Update robot
+            robot.update()
+            step += 1
+            if args.steps is not None and step >= args.steps:
+                running = False
+        
+            # Draw everything
+            if capture:
+                # Headless: no frame limit, only grabbed frames are drawn
+                capture.step(screen, draw)
+            else:
+                draw()
+                pygame.display.flip()
+                clock.tick(FPS)
+    finally:
+        # Also on Ctrl-C or an error, so the video is flushed and finalized
+        if capture:
+            capture.close()
     pygame.quit()
     sys.exit()
 
@@ -3,6 +3,7 @@ import sys
 import math
 import random
 import numpy as np
+from occupancy_map import OccupancyMap
 from utils import create_advanced_maze
 
 # Constants
@@ -19,20 +20,27 @@ GREEN = (0, 255, 0)
 LIGHT_BLUE = (200, 200, 255)  # For coverage tracking
 
 class Maze:
-    def __init__(self, width, height):
+    def __init__(self, width, height, occupancy=None):
+        # occupancy: an OccupancyMap to reuse (a saved map or the previous run's) instead of building the walls
         self.width = width
         self.height = height
         self.wall_thickness = 10
         self.walls = []
         
-        # Create outer boundary
-        self.walls.append(pygame.Rect(0, 0, width, self.wall_thickness))  # Top
-        self.walls.append(pygame.Rect(0, height-self.wall_thickness, width, self.wall_thickness))  # Bottom
-        self.walls.append(pygame.Rect(0, 0, self.wall_thickness, height))  # Left
-        self.walls.append(pygame.Rect(width-self.wall_thickness, 0, self.wall_thickness, height))  # Right
+        if occupancy is None:
+            # Create outer boundary
+            self.walls.append(pygame.Rect(0, 0, width, self.wall_thickness))  # Top
+            self.walls.append(pygame.Rect(0, height-self.wall_thickness, width, self.wall_thickness))  # Bottom
+            self.walls.append(pygame.Rect(0, 0, self.wall_thickness, height))  # Left
+            self.walls.append(pygame.Rect(width-self.wall_thickness, 0, self.wall_thickness, height))  # Right
         
-        # Generate internal walls for the maze
-        self.generate_maze()
+            # Generate internal walls for the maze
+            self.generate_maze()
+            occupancy = OccupancyMap.from_walls(self.walls, width, height, metadata={"kind": "maze"})
+        else:
+            occupancy.check_size(width, height)
+            self.walls = occupancy.wall_list()
+        self.occupancy = occupancy
         
         # Grid for tracking coverage
         self.grid_size = 20
@@ -86,13 +94,23 @@ class Maze:
         return False
     
     def is_wall_grid(self):
-        # Create a grid representation of walls
-        grid = np.zeros((self.height // self.grid_size + 1, self.width // self.grid_size + 1), dtype=bool)
-        for i in range(grid.shape[0]):
-            for j in range(grid.shape[1]):
-                x, y = j * self.grid_size, i * self.grid_size
-                grid[i, j] = self.is_wall(x, y)
-        return grid
+        # Grid representation of walls: is_wall() at every grid point, cached with the occupancy map
+        return self.occupancy.point_samples(self.grid_size)
+    
+    def occupancy_grid(self, cell_size=1):
+        # Rasterized walls, used by the grid planner
+        return self.occupancy.rescaled(cell_size).grid
+    
+    def inflated_grid(self, radius, cell_size=1):
+        # Occupancy dilated by a disc of the given radius (in pixels), cached
+        # with the occupancy map so that collision checks for a round body are one lookup
+        return self.occupancy.rescaled(cell_size).inflated(radius)
+    
+    def body_fits(self, x, y, radius):
+        # True if a round body of the given radius centred at (x, y) is clear of all walls
+        if x < 0 or x >= self.width or y < 0 or y >= self.height:
+            return False
+        return not self.inflated_grid(radius)[int(y), int(x)]
     
     def update_coverage(self, x, y):
         # Mark the grid cell as visited
@@ -109,9 +127,10 @@ class Maze:
         
     def draw(self, screen):
         # Draw coverage grid
+        wall_grid = self.is_wall_grid()
         for i in range(self.coverage_grid.shape[0]):
             for j in range(self.coverage_grid.shape[1]):
-                if self.coverage_grid[i, j] and not self.is_wall(j * self.grid_size, i * self.grid_size):
+                if self.coverage_grid[i, j] and not wall_grid[i, j]:
                     pygame.draw.rect(screen, LIGHT_BLUE, 
                                      (j * self.grid_size, i * self.grid_size, 
                                       self.grid_size, self.grid_size))
@@ -0,0 +1,319 @@
+# Occupancy map container shared by the simulations
+# Holds the occupancy grid and metadata in one .npz file; derived grids
+# (inflation, distance field, free cells, merged wall rectangles) are
+# computed on first use and cached in memory, and for saved maps also on
+# disk under the grid's content hash
+import hashlib
+import json
+import os
+
+import numpy as np
+import pygame
+
+from utils import inflate_grid, rasterize_walls
+
+DEFAULT_CACHE_DIR = os.environ.get("ROBOT_MAP_CACHE",
+                                   os.path.join(os.path.expanduser("~"), ".cache", "robot-maze-simulation"))
+# Least recently used products are deleted once the cache directory grows past this
+CACHE_LIMIT_BYTES = int(float(os.environ.get("ROBOT_MAP_CACHE_MB", 64)) * 2 ** 20)
+
+
+class OccupancyMap:
+    """
+    A boolean occupancy grid (True = wall) with metadata and cached derived products
+
+    Derived products only depend on the grid and the cell size, so they
+    are keyed by a hash of those: any map with the same content, loaded
+    in any process, finds them in the cache directory and loads them
+    instead of recomputing. Disk caching is opt-in: maps are built with
+    cache_dir None (memory only, so generated maps leave no files
+    behind), load() uses DEFAULT_CACHE_DIR. The directory is kept under
+    CACHE_LIMIT_BYTES by deleting the least recently used products.
+
+    Args:
+        grid: Boolean array [row, col], True where a cell is blocked
+        cell_size: Size of one cell in pixels
+        walls: Optional (N, 4) int array of the wall rectangles (x, y, w, h)
+            in pixels the grid was rasterized from
+        metadata: JSON-serializable dict stored with the map
+        cache_dir: Directory for cached derived products, None for memory only
+    """
+
+    def __init__(self, grid, cell_size=1, walls=None, metadata=None, cache_dir=None):
+        self.grid = np.ascontiguousarray(grid, dtype=bool)
+        self.grid.flags.writeable = False  # Derived products are cached against this content
+        self.cell_size = cell_size
+        self.walls = None if walls is None else np.asarray(walls, dtype=np.int64).reshape(-1, 4)
+        self.metadata = dict(metadata or {})
+        self.cache_dir = cache_dir
+        self._derived = {}
+        self._rescaled = {}
+        self._hash = None
+
+    @classmethod
+    def from_walls(cls, walls, width, height, cell_size=1, **kwargs):
+        # Rasterize pygame.Rect walls (or (x, y, w, h) tuples) covering width x height pixels
+        rects = [pygame.Rect(wall) for wall in walls]
+        grid = rasterize_walls(rects, width, height, cell_size)
+        return cls(grid, cell_size, [tuple(rect) for rect in rects], **kwargs)
+
+    @property
+    def width(self):
+        return self.grid.shape[1] * self.cell_size
+
+    @property
+    def height(self):
+        return self.grid.shape[0] * self.cell_size
+
+    def check_size(self, width, height):
+        # Raise ValueError unless the grid covers exactly width x height pixels
+        expected = (-(-height // self.cell_size), -(-width // self.cell_size))
+        if self.grid.shape != expected:
+            raise ValueError(f"occupancy grid of {self.grid.shape[1]} x {self.grid.shape[0]} cells of "
+                             f"{self.cell_size} px does not cover a {width} x {height} px map")
+
+    def rescaled(self, cell_size):
+        # The same walls rasterized on cells of another size; one instance per
+        # size, so its derived products are cached like this map's
+        if cell_size == self.cell_size:
+            return self
+        if cell_size not in self._rescaled:
+            grid = rasterize_walls(self.wall_list(), self.width, self.height, cell_size)
+            self._rescaled[cell_size] = OccupancyMap(grid, cell_size, self.walls, self.metadata, self.cache_dir)
+        return self._rescaled[cell_size]
+
+    @property
+    def content_hash(self):
+        # SHA-1 of the grid shape, cell size and bits
+        if self._hash is None:
+            digest = hashlib.sha1()
+            digest.update(np.array(self.grid.shape + (self.cell_size,), dtype=np.int64).tobytes())
+            digest.update(np.packbits(self.grid).tobytes())
+            self._hash = digest.hexdigest()
+        return self._hash
+
+    def save(self, path):
+        # Grid, cell size, walls and metadata in one compressed .npz
+        arrays = {"grid": np.packbits(self.grid), "shape": np.array(self.grid.shape),
+                  "cell_size": np.array(self.cell_size),
+                  "metadata": np.array(json.dumps(self.metadata))}
+        if self.walls is not None:
+            arrays["walls"] = self.walls
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path, cache_dir=DEFAULT_CACHE_DIR):
+        with np.load(path) as data:
+            shape = tuple(data["shape"])
+            grid = np.unpackbits(data["grid"], count=shape[0] * shape[1]).reshape(shape).astype(bool)
+            walls = data["walls"] if "walls" in data else None
+            return cls(grid, data["cell_size"].item(), walls, json.loads(data["metadata"].item()), cache_dir)
+
+    def derived(self, name, build):
+        """
+        A derived array, computed once per map content
+
+        Looked up in memory, then in the cache directory; only when both
+        miss is build() called, and its result is written to the cache.
+
+        Args:
+            name: Product name including its parameters (part of the file name)
+            build: Function returning the array
+
+        Returns:
+            The array (read-only, it is shared)
+        """
+        if name in self._derived:
+            return self._derived[name]
+        path = None
+        array = None
+        if self.cache_dir is not None:
+            path = os.path.join(self.cache_dir, f"{self.content_hash}-{name}.npy")
+            try:
+                array = np.load(path)
+                os.utime(path)  # Recently used: pruned last
+            except (OSError, ValueError):
+                array = None
+        if array is None:
+            array = np.asarray(build())
+            if path is not None:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    temporary = f"{path}.{os.getpid()}.tmp"
+                    with open(temporary, "wb") as f:
+                        np.save(f, array)
+                    os.replace(temporary, path)  # Readers never see a partial file
+                    prune_cache(self.cache_dir)
+                except OSError:
+                    pass  # Read-only or full disk: keep the product in memory only
+        array.flags.writeable = False
+        self._derived[name] = array
+        return array
+
+    def inflated(self, radius):
+        # Occupancy dilated by a disc of radius pixels (configuration space of a round body)
+        return self.derived(f"inflated-{float(radius):g}",
+                            lambda: inflate_grid(self.grid, radius / self.cell_size))
+
+    def free_mask(self, radius=0):
+        # Cells a round body of the given radius can be centred on
+        if radius <= 0:
+            return self.derived("free", lambda: ~self.grid)
+        return self.derived(f"free-{float(radius):g}", lambda: ~self.inflated(radius))
+
+    def distance_field(self):
+        # Euclidean distance (pixels) from every cell to the nearest wall cell, 0 on walls
+        return self.derived("distance", lambda: distance_transform(self.grid) * self.cell_size)
+
+    def wall_rects(self):
+        # Walls merged into few rectangles, (N, 4) of (x, y, w, h) in pixels
+        return self.derived("rects", lambda: merge_rects(self.grid) * self.cell_size)
+
+    def wall_list(self):
+        # Walls as pygame.Rect: the original rectangles if stored, else the merged ones
+        rects = self.walls if self.walls is not None else self.wall_rects()
+        return [pygame.Rect(*map(int, rect)) for rect in rects]
+
+    def point_samples(self, spacing):
+        """
+        Walls seen by the maps' is_wall() probe at every spacing-th pixel
+
+        Same as calling is_wall(j * spacing, i * spacing) for a grid of
+        height // spacing + 1 by width // spacing + 1 points: a 2x2 pixel
+        probe reaching up and left, and points outside the map are walls.
+        Needs a map with 1-pixel cells.
+        """
+        if self.cell_size != 1:
+            raise ValueError("point_samples needs a map with cell_size 1")
+
+        def build():
+            height, width = self.grid.shape
+            ys = np.arange(height // spacing + 1) * spacing
+            xs = np.arange(width // spacing + 1) * spacing
+            padded = np.zeros((height + 2, width + 2), dtype=bool)
+            padded[1:-1, 1:-1] = self.grid  # padded[y + 1, x + 1] is pixel (x, y)
+            probe = (padded[ys[:, None], xs] | padded[ys[:, None] + 1, xs]
+                     | padded[ys[:, None], xs + 1] | padded[ys[:, None] + 1, xs + 1])
+            outside = (ys[:, None] >= height) | (xs >= width)
+            return probe | outside
+
+        return self.derived(f"samples-{spacing}", build)
+
+
+def prune_cache(cache_dir, limit=None):
+    """
+    Delete the least recently used cached products until the directory fits
+
+    Args:
+        cache_dir: Cache directory of OccupancyMap
+        limit: Size to stay under in bytes (default CACHE_LIMIT_BYTES)
+
+    Returns:
+        Number of files deleted
+    """
+    limit = CACHE_LIMIT_BYTES if limit is None else limit
+    entries = []
+    for entry in os.scandir(cache_dir):
+        if entry.name.endswith(".npy") and entry.is_file():
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    deleted = 0
+    for _, size, path in sorted(entries):
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue  # Already pruned by another process
+        total -= size
+        deleted += 1
+    return deleted
+
+
+def distance_transform(grid):
+    """
+    Exact Euclidean distance transform of a boolean grid, in cells
+
+    Distance within each column first, then the lower envelope of
+    parabolas along each row (Felzenszwalb and Huttenlocher), with every
+    row of the second pass advanced together in NumPy.
+
+    Returns:
+        Float array, 0 on True cells, inf everywhere if there are none
+    """
+    grid = np.asarray(grid, dtype=bool)
+    rows, cols = grid.shape
+    if not grid.any():
+        return np.full(grid.shape, np.inf)
+    big = rows + cols  # Further than any real distance
+
+    # Column pass: distance to the nearest wall above or below
+    index = np.arange(rows)[:, None]
+    above = np.maximum.accumulate(np.where(grid, index, -big), axis=0)
+    below = np.minimum.accumulate(np.where(grid, index, 2 * big)[::-1], axis=0)[::-1]
+    f = np.minimum(index - above, below - index).astype(float) ** 2
+
+    # Row pass: lower envelope of the parabolas (q - v)^2 + f[v], all rows at once
+    row = np.arange(rows)
+    v = np.zeros((rows, cols), dtype=np.int64)
+    z = np.full((rows, cols + 1), np.inf)
+    z[:, 0] = -np.inf
+    k = np.zeros(rows, dtype=np.int64)
+    for q in range(1, cols):
+        fq = f[:, q] + q * q
+        while True:
+            vk = v[row, k]
+            s = (fq - (f[row, vk] + vk * vk)) / (2 * (q - vk))
+            drop = s <= z[row, k]
+            if not drop.any():
+                break
+            k[drop] -= 1
+        k += 1
+        v[row, k] = q
+        z[row, k] = s
+        z[row, k + 1] = np.inf
+
+    squared = np.empty((rows, cols))
+    k[:] = 0
+    for q in range(cols):
+        while True:
+            advance = z[row, k + 1] < q
+            if not advance.any():
+                break
+            k[advance] += 1
+        vk = v[row, k]
+        squared[:, q] = (q - vk) ** 2 + f[row, vk]
+    return np.sqrt(squared)
+
+
+def merge_rects(grid):
+    """
+    Cover the True cells of a grid with few rectangles
+
+    Runs of True cells in each row are merged with identical runs in the
+    rows below, so a wall drawn from many small squares (as the maze
+    generator does) becomes a handful of rectangles.
+
+    Returns:
+        (N, 4) int array of (col, row, width, height) in cells
+    """
+    grid = np.asarray(grid, dtype=bool)
+    padded = np.zeros((grid.shape[0], grid.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = grid
+    edges = np.diff(padded, axis=1)
+    rects = []
+    open_runs = {}  # (start, end) -> first row
+    for r in range(grid.shape[0]):
+        starts = np.flatnonzero(edges[r] == 1)
+        ends = np.flatnonzero(edges[r] == -1)
+        runs = set(zip(starts.tolist(), ends.tolist()))
+        for run in list(open_runs):
+            if run not in runs:
+                first = open_runs.pop(run)
+                rects.append((run[0], first, run[1] - run[0], r - first))
+        for run in runs:
+            open_runs.setdefault(run, r)
+    for run, first in open_runs.items():
+        rects.append((run[0], first, run[1] - run[0], grid.shape[0] - first))
+    return np.array(sorted(rects, key=lambda rect: (rect[1], rect[0])), dtype=np.int64).reshape(-1, 4)
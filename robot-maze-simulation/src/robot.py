@@ -81,8 +81,8 @@ class Robot:
         new_x = self.x + self.speed * math.cos(angle_rad)
         new_y = self.y + self.speed * math.sin(angle_rad)
         
-        # Check if new position is valid (not inside a wall)
-        if not self.maze.is_wall(new_x, new_y):
+        # Check if the whole body fits at the new position (not overlapping a wall)
+        if self.maze.body_fits(new_x, new_y, self.radius):
             self.x = new_x
             self.y = new_y
     
@@ -0,0 +1,243 @@
+# Bounded sensor telemetry history with min/mean/max rollups
+from datetime import datetime
+
+import numpy as np
+
+CHANNELS = ("soil_moisture", "temperature", "humidity")
+
+# (bucket width in seconds, number of buckets kept)
+RESOLUTIONS = (
+    (1, 6 * 3600),       # 1 s for 6 hours
+    (60, 30 * 24 * 60),  # 1 min for 30 days
+    (3600, 365 * 24),    # 1 h for a year
+)
+
+
+def parse_timestamp(value):
+    # Seconds since the epoch from a number or an ISO 8601 string ('...Z' allowed)
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return float(value)
+
+
+class Rollup:
+    """
+    Direct-mapped ring of fixed-width buckets holding count/sum/min/max
+
+    Bucket b lives in slot b % capacity and the slot remembers which
+    bucket it holds, so inserting and looking up a bucket are O(1) and a
+    slot is recycled by simply overwriting it once a newer bucket maps
+    there.
+    """
+
+    def __init__(self, width, capacity, channels):
+        self.width = width
+        self.capacity = capacity
+        self.bucket = np.full(capacity, -1, dtype=np.int64)
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.sum = np.zeros((capacity, channels))
+        self.min = np.zeros((capacity, channels))
+        self.max = np.zeros((capacity, channels))
+        self.newest = -1
+
+    def add(self, t, values):
+        b = int(t // self.width)
+        if b <= self.newest - self.capacity:
+            return  # Older than anything this resolution still keeps
+        slot = b % self.capacity
+        if self.bucket[slot] != b:
+            self.bucket[slot] = b
+            self.count[slot] = 1
+            self.sum[slot] = values
+            self.min[slot] = values
+            self.max[slot] = values
+        else:
+            self.count[slot] += 1
+            self.sum[slot] += values
+            np.minimum(self.min[slot], values, out=self.min[slot])
+            np.maximum(self.max[slot], values, out=self.max[slot])
+        if b > self.newest:
+            self.newest = b
+
+    def add_many(self, times, values):
+        buckets = (times // self.width).astype(np.int64)
+        newest = max(self.newest, int(buckets.max()))
+        keep = buckets > newest - self.capacity
+        buckets, values = buckets[keep], values[keep]
+        slots = buckets % self.capacity
+
+        # Reset the slots that start a new bucket, then accumulate
+        fresh = np.unique(buckets[self.bucket[slots] != buckets])
+        fresh_slots = fresh % self.capacity
+        self.bucket[fresh_slots] = fresh
+        self.count[fresh_slots] = 0
+        self.sum[fresh_slots] = 0.0
+        self.min[fresh_slots] = np.inf
+        self.max[fresh_slots] = -np.inf
+        np.add.at(self.count, slots, 1)
+        np.add.at(self.sum, slots, values)
+        np.minimum.at(self.min, slots, values)
+        np.maximum.at(self.max, slots, values)
+        self.newest = newest
+
+    def query(self, start, end):
+        # Buckets overlapping [start, end], oldest first; only the slots in
+        # the range are touched
+        first = max(int(start // self.width), self.newest - self.capacity + 1)
+        last = min(int(end // self.width), self.newest)
+        if last < first:
+            wanted = np.empty(0, dtype=np.int64)
+        else:
+            wanted = np.arange(first, last + 1)
+        slots = wanted % self.capacity
+        hit = self.bucket[slots] == wanted
+        slots = slots[hit]
+        count = self.count[slots][:, None]
+        return {
+            "time": wanted[hit] * float(self.width),
+            "count": self.count[slots],
+            "min": self.min[slots],
+            "mean": self.sum[slots] / count,
+            "max": self.max[slots],
+        }
+
+
+class TelemetryStore:
+    """
+    Recent raw samples plus rollups at several resolutions
+
+    Raw samples go into a fixed-size ring buffer; every insert also
+    updates the min/mean/max buckets of each resolution, so memory is
+    bounded and a range query reads only the points it returns. Samples
+    are expected in (roughly) time order: out-of-order samples still land
+    in the right rollup buckets, but raw range queries assume sorted
+    timestamps.
+
+    Args:
+        channels: Names of the values in each sample
+        raw_capacity: Number of raw samples kept
+        resolutions: (bucket width in seconds, buckets kept) pairs
+    """
+
+    def __init__(self, channels=CHANNELS, raw_capacity=24 * 3600, resolutions=RESOLUTIONS):
+        self.channels = tuple(channels)
+        self._column = {name: i for i, name in enumerate(self.channels)}
+        self.raw_capacity = raw_capacity
+        self._times = np.zeros(raw_capacity)
+        self._values = np.zeros((raw_capacity, len(self.channels)))
+        self._head = 0  # Next slot to write
+        self._size = 0
+        self.rollups = {width: Rollup(width, capacity, len(self.channels)) for width, capacity in resolutions}
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def resolutions(self):
+        return sorted(self.rollups)
+
+    def append(self, t, values):
+        t = parse_timestamp(t)
+        values = np.asarray(values, dtype=float)
+        self._times[self._head] = t
+        self._values[self._head] = values
+        self._head = (self._head + 1) % self.raw_capacity
+        self._size = min(self._size + 1, self.raw_capacity)
+        for rollup in self.rollups.values():
+            rollup.add(t, values)
+
+    def append_many(self, times, values):
+        # Bulk insert of time-sorted samples, shape (n,) and (n, channels)
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float).reshape(len(times), len(self.channels))
+        if len(times) == 0:
+            return
+        for rollup in self.rollups.values():
+            rollup.add_many(times, values)
+        times, values = times[-self.raw_capacity:], values[-self.raw_capacity:]
+        slots = (self._head + np.arange(len(times))) % self.raw_capacity
+        self._times[slots] = times
+        self._values[slots] = values
+        self._head = (self._head + len(times)) % self.raw_capacity
+        self._size = min(self._size + len(times), self.raw_capacity)
+
+    def record(self, sensor_data):
+        # One SensorData message as sent to the dashboard
+        self.append(sensor_data["timestamp"], [sensor_data[name] for name in self.channels])
+
+    def _raw_order(self):
+        # Slots of the raw ring from oldest to newest, as two contiguous ranges
+        if self._size < self.raw_capacity:
+            return [(0, self._size)]
+        return [(self._head, self.raw_capacity), (0, self._head)]
+
+    def raw(self, start, end):
+        # Raw samples with start <= t <= end, oldest first
+        times, values = [], []
+        for lo, hi in self._raw_order():
+            segment = self._times[lo:hi]
+            i = np.searchsorted(segment, start, side="left")
+            j = np.searchsorted(segment, end, side="right")
+            times.append(segment[i:j])
+            values.append(self._values[lo + i:lo + j])
+        return np.concatenate(times), np.concatenate(values)
+
+    def query(self, start, end, resolution=None, max_points=None, channel=None):
+        """
+        History between two times (seconds or ISO strings)
+
+        Args:
+            start, end: Time range, inclusive
+            resolution: Bucket width in seconds, 0 for raw samples, or None
+                to pick the finest resolution returning at most max_points
+            max_points: Point budget used when resolution is None
+            channel: Name of a single channel, or None for all
+
+        Returns:
+            Dict of 'time', 'min', 'mean', 'max' (and 'count' for rollups)
+            arrays; the value arrays are (points, channels), or (points,)
+            for a single channel. For raw samples min, mean and max are the
+            sample values.
+        """
+        start, end = parse_timestamp(start), parse_timestamp(end)
+        if resolution is None:
+            resolution = self._pick_resolution(start, end, max_points)
+        if resolution == 0:
+            times, values = self.raw(start, end)
+            result = {"time": times, "min": values, "mean": values, "max": values}
+        else:
+            if resolution not in self.rollups:
+                raise ValueError(f"No rollup at {resolution} s, have {self.resolutions}")
+            result = self.rollups[resolution].query(start, end)
+        if channel is not None:
+            column = self._column[channel]
+            for key in ("min", "mean", "max"):
+                result[key] = result[key][:, column]
+        return result
+
+    def _pick_resolution(self, start, end, max_points):
+        if max_points is None:
+            return 0
+        span = max(0.0, end - start)
+        if self._size and self._raw_covers(start) and self._raw_count(start, end) <= max_points:
+            return 0
+        for width in self.resolutions:
+            if span / width + 1 <= max_points:
+                return width
+        return self.resolutions[-1]
+
+    def _raw_covers(self, start):
+        oldest = self._times[self._raw_order()[0][0]]
+        return self._size < self.raw_capacity or oldest <= start
+
+    def _raw_count(self, start, end):
+        return sum(
+            np.searchsorted(self._times[lo:hi], end, side="right") - np.searchsorted(self._times[lo:hi], start)
+            for lo, hi in self._raw_order())
+
+    def latest(self):
+        # Newest raw sample as (time, values), or None when empty
+        if not self._size:
+            return None
+        i = (self._head - 1) % self.raw_capacity
+        return self._times[i], self._values[i].copy()
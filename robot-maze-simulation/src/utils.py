@@ -64,4 +64,81 @@ def create_advanced_maze(width, height, complexity=0.75, density=0.75):
                 rect_y = y * wall_thickness
                 wall_rects.append(pygame.Rect(rect_x, rect_y, wall_thickness, wall_thickness))
     
-    return wall_rects
\ No newline at end of file
+    return wall_rects
+
+def rasterize_walls(walls, width, height, cell_size=1):
+    """
+    Rasterize wall rectangles into a boolean occupancy grid
+
+    Args:
+        walls: List of pygame.Rect walls
+        width: Width of the map in pixels
+        height: Height of the map in pixels
+        cell_size: Size of one grid cell in pixels
+
+    Returns:
+        Boolean array of shape (rows, cols), True where a cell touches a wall
+    """
+    import numpy as np
+
+    rows = -(-height // cell_size)
+    cols = -(-width // cell_size)
+    grid = np.zeros((rows, cols), dtype=bool)
+
+    for wall in walls:
+        # Every cell the rectangle overlaps is blocked
+        r0 = max(0, wall.top // cell_size)
+        r1 = min(rows, -(-wall.bottom // cell_size))
+        c0 = max(0, wall.left // cell_size)
+        c1 = min(cols, -(-wall.right // cell_size))
+        # Walls entirely off the map would give negative ends, which
+        # slice from the far side
+        if r0 < r1 and c0 < c1:
+            grid[r0:r1, c0:c1] = True
+
+    return grid
+
+
+def inflate_grid(grid, radius):
+    """
+    Dilate an occupancy grid by a disc, giving the configuration space of
+    a round robot: a cell is blocked if a disc of the given radius centred
+    on it would touch a blocked cell
+
+    Args:
+        grid: Boolean occupancy grid
+        radius: Disc radius in cells
+
+    Returns:
+        Boolean array with the same shape as grid
+    """
+    import numpy as np
+
+    grid = np.asarray(grid, dtype=bool)
+    r = int(np.floor(radius))
+    if r <= 0:
+        return grid.copy()
+
+    rows, cols = grid.shape
+    # The disc is a stack of horizontal segments, so dilate each row once
+    # per distinct half-width (prefix sums make that O(cells)) and OR the
+    # results shifted vertically
+    counts = np.zeros((rows, cols + 1), dtype=np.int32)
+    np.cumsum(grid, axis=1, out=counts[:, 1:])
+    column = np.arange(cols)
+
+    horizontal = {}
+    inflated = np.zeros_like(grid)
+    for dy in range(-r, r + 1):
+        half = int(np.floor(np.sqrt(radius * radius - dy * dy)))
+        if half not in horizontal:
+            lo = np.clip(column - half, 0, cols)
+            hi = np.clip(column + half + 1, 0, cols)
+            horizontal[half] = (counts[:, hi] - counts[:, lo]) > 0
+        band = horizontal[half]
+        if dy >= 0:
+            inflated[:rows - dy] |= band[dy:]
+        else:
+            inflated[-dy:] |= band[:rows + dy]
+
+    return inflated
@@ -0,0 +1,350 @@
+# WebSocket backend for the web dashboard, driven by the rice field simulation
+# Speaks the protocol of web/src/services/robotService.ts (same as web/mock-server.js)
+import argparse
+import asyncio
+import json
+import math
+import random
+from collections import deque
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+import websockets
+
+from field import RiceFieldMap, SCREEN_HEIGHT, SCREEN_WIDTH
+from robot import Robot
+from telemetry import TelemetryStore
+
+ACTIONS = ("forward", "left", "right", "stop")
+RFID_SPACING = 100   # Distance between RFID cards laid out on a grid (pixels)
+RFID_RADIUS = 20     # Read range of the RFID reader (pixels)
+TURN_ANGLE = 90      # Degrees per 'left' / 'right' action
+BATTERY_DRAIN = 0.002  # Percent per simulation step while moving
+MAX_QUEUED_ACTIONS = 100
+RAW_HISTORY = 6 * 3600  # Seconds of raw sensor readings kept per robot
+# Rollups of the readings as (bucket width in seconds, number of buckets kept)
+SENSOR_RESOLUTIONS = (
+    (60, 24 * 60),    # 1 min for a day
+    (3600, 30 * 24),  # 1 h for 30 days
+)
+
+
+def timestamp():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def encode(message_type, data):
+    return json.dumps({"type": message_type, "data": data})
+
+
+class SimulatedRobot:
+    """
+    One Robot on its own RiceFieldMap, executing dashboard actions
+
+    'forward' drives one RFID grid spacing, 'left' and 'right' turn in
+    place by TURN_ANGLE, 'stop' drops the queue and halts. Actions are
+    executed a little per simulation step at the robot's own speed and
+    rotation speed, so the dashboard sees them play out over time.
+    """
+
+    def __init__(self, robot_id, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, sensor_hz=0.5):
+        self.robot_id = robot_id
+        self.field_map = RiceFieldMap(width, height)
+        start = self.field_map.wall_thickness + 50
+        self.robot = Robot(start, start, self.field_map)
+        self.battery = 100.0
+        self.actions = deque()
+        self.current_action = None
+        self._remaining = 0.0  # Pixels or degrees left of the current action
+        self.last_card = None
+        # History of the sensor readings sent out, sized for sensor_hz
+        # (about 0.5 MB at the default 0.5 Hz)
+        self.telemetry = TelemetryStore(raw_capacity=max(1, math.ceil(RAW_HISTORY * sensor_hz)),
+                                        resolutions=SENSOR_RESOLUTIONS)
+        self._moisture_phase = random.uniform(0, 2 * math.pi)
+        self._read_card()
+
+    def enqueue(self, actions):
+        # Validate the whole batch before queueing any of it
+        unknown = [a for a in actions if a not in ACTIONS]
+        if unknown:
+            raise ValueError(f"Unknown actions: {unknown}")
+        if len(self.actions) + len(actions) > MAX_QUEUED_ACTIONS:
+            raise ValueError(f"Action queue is full ({MAX_QUEUED_ACTIONS} actions)")
+        for action in actions:
+            if action == "stop":
+                self.actions.clear()
+                self.current_action = None
+                self._remaining = 0.0
+            else:
+                self.actions.append(action)
+
+    @property
+    def is_moving(self):
+        return self.current_action is not None or bool(self.actions)
+
+    def step(self):
+        """
+        Advance the simulation by one step
+
+        Returns:
+            RFID reading (dict) if a new card came into range, else None
+        """
+        if self.current_action is None:
+            if not self.actions:
+                return None
+            self.current_action = self.actions.popleft()
+            self._remaining = RFID_SPACING if self.current_action == "forward" else TURN_ANGLE
+
+        robot = self.robot
+        if self.current_action == "forward":
+            x, y = robot.x, robot.y
+            robot.move_forward()
+            moved = math.hypot(robot.x - x, robot.y - y)
+            self._remaining -= robot.speed
+            if moved == 0:
+                self._remaining = 0  # Blocked by a wall, give up on this action
+        else:
+            turn = min(robot.rotation_speed, self._remaining)
+            robot.angle += turn if self.current_action == "right" else -turn
+            self._remaining -= turn
+
+        if self._remaining <= 0:
+            self.current_action = None
+        self.battery = max(0.0, self.battery - BATTERY_DRAIN)
+        self.field_map.update_coverage(robot.x, robot.y)
+        return self._read_card()
+
+    def _read_card(self):
+        # Cards sit on a grid; report the nearest one once it is within range
+        col = round(self.robot.x / RFID_SPACING)
+        row = round(self.robot.y / RFID_SPACING)
+        if math.hypot(self.robot.x - col * RFID_SPACING, self.robot.y - row * RFID_SPACING) > RFID_RADIUS:
+            return None
+        card = {"cardId": f"RFID_{row:02d}{col:02d}", "position": {"x": col, "y": row}, "timestamp": timestamp()}
+        if self.last_card is not None and self.last_card["cardId"] == card["cardId"]:
+            return None
+        self.last_card = card
+        return card
+
+    def status(self):
+        robot = self.robot
+        return {
+            "currentPosition": self.last_card,
+            "isMoving": self.is_moving,
+            "currentAction": self.current_action,
+            "battery": round(self.battery, 1),
+            "pose": {"x": round(robot.x, 1), "y": round(robot.y, 1), "angle": round(robot.angle % 360, 1)},
+            "coverage": round(self.field_map.get_coverage_percentage(), 1),
+        }
+
+    def sensor(self):
+        # Soil moisture varies smoothly over the field, air readings drift slowly
+        robot, field_map = self.robot, self.field_map
+        moisture = 50 + 20 * math.sin(2 * math.pi * robot.x / field_map.width + self._moisture_phase) \
+            * math.cos(math.pi * robot.y / field_map.height)
+        reading = {
+            "soil_moisture": round(moisture + random.gauss(0, 1), 1),
+            "temperature": round(25 + 3 * math.sin(self._moisture_phase) + random.gauss(0, 0.2), 1),
+            "humidity": round(55 + 10 * math.cos(self._moisture_phase) + random.gauss(0, 0.5), 1),
+            "timestamp": timestamp(),
+        }
+        self.telemetry.record(reading)
+        return reading
+
+
+class ClientSession:
+    """
+    Outgoing messages of one dashboard connection
+
+    Status and sensor messages are coalesced: only the newest of each type
+    waits to be sent, so a slow client skips intermediate updates instead
+    of building a backlog. RFID readings and action responses are events
+    and are queued, up to max_events (oldest dropped first).
+    """
+
+    def __init__(self, websocket, max_events=64):
+        self.websocket = websocket
+        self._latest = {}
+        self._events = deque(maxlen=max_events)
+        self._wake = asyncio.Event()
+        self.skipped = 0
+
+    def offer(self, message_type, text):
+        if message_type in self._latest:
+            self.skipped += 1
+        self._latest[message_type] = text
+        self._wake.set()
+
+    def push(self, text):
+        self._events.append(text)
+        self._wake.set()
+
+    async def run(self):
+        # Send whatever is pending; while a send is in flight new offers
+        # simply replace the pending message
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._events:
+                await self.websocket.send(self._events.popleft())
+            latest, self._latest = self._latest, {}
+            for text in latest.values():
+                await self.websocket.send(text)
+
+
+class RobotServer:
+    """
+    Serves any number of dashboard sessions and simulated robots
+
+    A client picks its robot with the URL path or a 'robot' query
+    parameter (ws://host:port/field2 or ?robot=field2), the default is
+    'default'. Clients on the same robot share it and see the same
+    updates. Each robot is simulated at sim_hz while it has clients;
+    status and sensor readings are encoded once per robot and pushed at
+    status_hz and sensor_hz.
+
+    With robot_ids, only those robots exist: other ids are refused, and
+    the robots keep their state between sessions. Without, a robot is
+    created for the first client asking for it and dropped when its last
+    client leaves, so clients cannot pile up robots on the server.
+    """
+
+    def __init__(self, sim_hz=30.0, status_hz=5.0, sensor_hz=0.5, robot_ids=None):
+        self.sim_hz = sim_hz
+        self.status_hz = status_hz
+        self.sensor_hz = sensor_hz
+        self.robot_ids = None if robot_ids is None else set(robot_ids)
+        self.robots = {}
+        self._clients = {}  # robot id -> set of ClientSession
+        self._tasks = {}    # robot id -> simulation task
+
+    def robot(self, robot_id):
+        if robot_id not in self.robots:
+            self.robots[robot_id] = SimulatedRobot(robot_id, sensor_hz=self.sensor_hz)
+        return self.robots[robot_id]
+
+    @staticmethod
+    def robot_id_for(path):
+        url = urlsplit(path or "/")
+        query = parse_qs(url.query)
+        if "robot" in query:
+            return query["robot"][0]
+        return url.path.strip("/") or "default"
+
+    def _broadcast(self, robot_id, message_type, data, event=False):
+        text = encode(message_type, data)
+        for session in self._clients.get(robot_id, ()):
+            if event:
+                session.push(text)
+            else:
+                session.offer(message_type, text)
+
+    async def _simulate(self, robot_id):
+        sim = self.robot(robot_id)
+        loop = asyncio.get_running_loop()
+        dt = 1.0 / self.sim_hz
+        next_step = next_status = next_sensor = loop.time()
+        was_moving = sim.is_moving
+        while self._clients.get(robot_id):
+            now = loop.time()
+            # Catch up on missed steps, but never spiral after a long stall
+            steps = 0
+            while next_step <= now and steps < 10:
+                card = sim.step()
+                if card is not None:
+                    self._broadcast(robot_id, "rfid", card, event=True)
+                next_step += dt
+                steps += 1
+            if next_step <= now:
+                next_step = now + dt
+
+            # Status goes out at the fixed rate and right away when a run of actions ends
+            if now >= next_status or was_moving != sim.is_moving:
+                self._broadcast(robot_id, "robot_status", sim.status())
+                next_status = now + 1.0 / self.status_hz
+            was_moving = sim.is_moving
+            if self.sensor_hz > 0 and now >= next_sensor:
+                self._broadcast(robot_id, "sensor", sim.sensor())
+                next_sensor = now + 1.0 / self.sensor_hz
+            await asyncio.sleep(max(0.0, min(next_step, next_status) - loop.time()))
+        del self._tasks[robot_id]
+
+    def _handle_message(self, sim, raw):
+        try:
+            message = json.loads(raw)
+            if message.get("type") != "robot_actions":
+                raise ValueError(f"Unsupported message type: {message.get('type')}")
+            actions = message["data"]["actions"]
+            if not isinstance(actions, list):
+                raise ValueError("'actions' must be a list")
+            sim.enqueue(actions)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return {"accepted": False, "error": str(e), "timestamp": timestamp()}
+        return {"accepted": True, "actions": actions, "queued": len(sim.actions), "timestamp": timestamp()}
+
+    async def handler(self, websocket):
+        request = getattr(websocket, "request", None)
+        path = request.path if request is not None else getattr(websocket, "path", "/")
+        robot_id = self.robot_id_for(path)
+        if self.robot_ids is not None and robot_id not in self.robot_ids:
+            await websocket.close(code=1008, reason=f"Unknown robot {robot_id}"[:120])
+            return
+        sim = self.robot(robot_id)
+
+        session = ClientSession(websocket)
+        self._clients.setdefault(robot_id, set()).add(session)
+        if robot_id not in self._tasks:
+            self._tasks[robot_id] = asyncio.create_task(self._simulate(robot_id))
+        session.offer("robot_status", encode("robot_status", sim.status()))
+        if sim.last_card is not None:
+            session.push(encode("rfid", sim.last_card))
+
+        sender = asyncio.create_task(session.run())
+        try:
+            async for raw in websocket:
+                response = self._handle_message(sim, raw)
+                session.push(encode("action_response", response))
+                if response["accepted"]:
+                    self._broadcast(robot_id, "robot_status", sim.status())
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self._clients[robot_id].discard(session)
+            if not self._clients[robot_id]:
+                del self._clients[robot_id]
+                if self.robot_ids is None:
+                    # Nobody is watching this robot any more: drop it
+                    task = self._tasks.pop(robot_id, None)
+                    if task is not None:
+                        task.cancel()
+                    del self.robots[robot_id]
+
+    async def serve(self, host="localhost", port=8080):
+        async with websockets.serve(self.handler, host, port):
+            print(f"Robot WebSocket server running on ws://{host}:{port}")
+            await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket backend for the robot dashboard")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--sim-hz", type=float, default=30.0, help="simulation steps per second")
+    parser.add_argument("--status-hz", type=float, default=5.0, help="robot_status messages per second")
+    parser.add_argument("--sensor-hz", type=float, default=0.5, help="sensor messages per second")
+    parser.add_argument("--robots", help="comma-separated robot ids to serve (default: any id, "
+                                         "each dropped when its last client disconnects)")
+    args = parser.parse_args()
+
+    robot_ids = [robot_id.strip() for robot_id in args.robots.split(",") if robot_id.strip()] if args.robots else None
+    server = RobotServer(args.sim_hz, args.status_hz, args.sensor_hz, robot_ids)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,8 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
 import matplotlib.patches as patches
+from arm_dynamics import ArmModel, simulate
+from pid import PID
 
 # Constants
 L1, L2 = 1.0, 1.0              # Arm link lengths
@@ -15,20 +17,6 @@ platform_height = 0.3
 wheel_radius = 0.2
 wheel_offset = 0.6  # from center
 
-# PID controller for nozzle height
-class PID:
-    def __init__(self, Kp, Ki, Kd):
-        self.Kp, self.Ki, self.Kd = Kp, Ki, Kd
-        self.integral = 0
-        self.prev_error = 0
-
-    def update(self, target, current):
-        error = target - current
-        self.integral += error * dt
-        derivative = (error - self.prev_error) / dt
-        self.prev_error = error
-        return self.Kp * error + self.Ki * self.integral + self.Kd * derivative
-
 # Terrain function
 def road_profile(x):
     return 0.2 * np.sin(0.8 * x)
@@ -40,8 +28,12 @@ theta1_target = np.radians(20)
 theta2_target = np.radians(0)
 
 # PID controllers for both joints
-pid1 = PID(Kp=200, Ki=3, Kd=0.1)
-pid2 = PID(Kp=200, Ki=3, Kd=0.2)
+pid1 = PID(Kp=200, Ki=3, Kd=0.1, dt=dt, initial_error=0.0)
+pid2 = PID(Kp=200, Ki=3, Kd=0.2, dt=dt, initial_error=0.0)
+
+# Integrator for the PID arm: "euler" (fixed dt, in update) or "rk45" (adaptive, arm_dynamics.py)
+INTEGRATOR = "euler"
+num_frames = 300
 
 
 
@@ -82,6 +74,12 @@ def forward_kinematics(theta1, theta2, base_x, base_y):
     y2 = y1 + L2 * np.sin(theta1 + theta2)
     return x1, y1, x2, y2
 
+# With rk45 the joint angles for every frame are integrated up front
+arm_states = None
+if INTEGRATOR == "rk45":
+    arm = ArmModel(pid1.Kp, pid1.Ki, pid1.Kd, pid2.Kp, pid2.Ki, pid2.Kd, target=target_nozzle_height)
+    arm_states = simulate(arm, num_frames * dt, dt)["y"]
+
 # Update function
 def update(frame):
     global theta1, theta2, theta1_dot, theta2_dot
@@ -104,17 +102,20 @@ def update(frame):
     _, y1, _, y2 = forward_kinematics(theta1, theta2, base_x, base_y)
     current_nozzle_height = y2  # Nozzle height is the end-effector's y-position
 
-    # PID updates for both joints based on the nozzle height error
-    tau1 = pid1.update(target_nozzle_height, current_nozzle_height)
-    tau2 = pid2.update(target_nozzle_height, current_nozzle_height)
-
-    # Dynamics for controlled arm
-    alpha1 = tau1 - g * np.sin(theta1)
-    alpha2 = tau2 - g * np.sin(theta1 + theta2)
-    theta1_dot += alpha1 * dt
-    theta2_dot += alpha2 * dt
-    theta1 += theta1_dot * dt
-    theta2 += theta2_dot * dt
+    if arm_states is not None:
+        theta1, theta2 = arm_states[frame + 1, :2]
+    else:
+        # PID updates for both joints based on the nozzle height error
+        tau1 = pid1.update(target_nozzle_height, current_nozzle_height)
+        tau2 = pid2.update(target_nozzle_height, current_nozzle_height)
+
+        # Dynamics for controlled arm
+        alpha1 = tau1 - g * np.sin(theta1)
+        alpha2 = tau2 - g * np.sin(theta1 + theta2)
+        theta1_dot += alpha1 * dt
+        theta2_dot += alpha2 * dt
+        theta1 += theta1_dot * dt
+        theta2 += theta2_dot * dt
 
     # Arm kinematics for both arms (controlled and static)
     x1, y1, x2, y2 = forward_kinematics(theta1, theta2, base_x, base_y)
@@ -139,6 +140,6 @@ def update(frame):
     return line, line_controlled, platform, wheel_left, wheel_right, terrain_line, text
 
 # Animate
-ani = FuncAnimation(fig, update, frames=300, interval=70, blit=False)
+ani = FuncAnimation(fig, update, frames=num_frames, interval=70, blit=False)
 plt.show()
   
\ No newline at end of file
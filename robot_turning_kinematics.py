@@ -8,118 +8,152 @@ robot_radius = 1  # Radius of the robot
 wheel_radius = 0.5  # Radius of the wheels
 wheel_base = 3    # Distance between the wheels (in meters)
 robot_speed = 0.2 # Speed of the robot in units per step
-num_steps = 200   # Number of steps for the animation
+trail_length = 50  # Steps of wheel path drawn bright behind the robot
 
 # Define the robot movement path
 path = [(-2, -2), (-2, 2), (2, 2), (2, 6)]  # Points the robot will travel through
-turns = [(90, 'right'), (90, 'left')]  # Turns at specific points (angle, direction)
+
+# Starting orientation: theta = 0 faces +y, the wheels sit on the x axis
+# (theta is the body angle in degrees, the heading is theta + 90)
+theta_start = 0
+
+
+def wheel_speed_schedule(path, theta_start=0.0, speed=robot_speed, wheel_base=wheel_base):
+    """
+    Wheel speeds that drive a differential-drive robot through the path points
+
+    At each point the robot turns in place towards the next one (one wheel
+    forward, the other backward at speed), then drives straight with both
+    wheels at speed. Durations are in steps; the last step of each phase
+    is shortened so the robot turns and stops exactly on target.
+
+    Returns:
+        (left wheel speeds, right wheel speeds, step durations), one entry per step
+    """
+    left, right, durations = [], [], []
+
+    def add_phase(v_left, v_right, steps):
+        whole = int(np.floor(steps))
+        parts = [1.0] * whole + ([steps - whole] if steps - whole > 1e-9 else [])
+        left.extend([v_left] * len(parts))
+        right.extend([v_right] * len(parts))
+        durations.extend(parts)
+
+    heading = np.radians(theta_start) + np.pi / 2
+    for (x0, y0), (x1, y1) in zip(path[:-1], path[1:]):
+        # Turn in place: each wheel travels (wheel_base / 2) * angle
+        target = np.arctan2(y1 - y0, x1 - x0)
+        turn = (target - heading + np.pi) % (2 * np.pi) - np.pi
+        if abs(turn) > 1e-9:
+            direction = np.sign(turn)  # Left turn: right wheel forward, left wheel backward
+            add_phase(-direction * speed, direction * speed, abs(turn) * wheel_base / 2 / speed)
+        heading = target
+
+        # Straight: both wheels forward
+        add_phase(speed, speed, np.hypot(x1 - x0, y1 - y0) / speed)
+    return np.array(left), np.array(right), np.array(durations)
+
+
+def integrate_differential_drive(v_left, v_right, durations, x0, y0, theta0, wheel_base=wheel_base):
+    """
+    Unicycle / differential-drive poses for piecewise-constant wheel speeds
+
+    Each step is integrated exactly (an arc of constant curvature, a
+    straight line when both wheels match), all steps at once with NumPy,
+    so the whole trajectory is computed up front.
+
+    Args:
+        v_left, v_right: Wheel ground speeds per step (units per step)
+        durations: Length of each step (in steps)
+        x0, y0, theta0: Start pose, theta in degrees (0 faces +y)
+
+    Returns:
+        (x, y, theta) arrays of len(durations) + 1 poses, theta in degrees
+    """
+    v = (v_left + v_right) / 2
+    omega = (v_right - v_left) / wheel_base
+    heading0 = np.radians(theta0) + np.pi / 2
+    heading = heading0 + np.concatenate(([0.0], np.cumsum(omega * durations)))
+    start, end = heading[:-1], heading[1:]
+
+    # Arc: displacement = v / omega * (sin, -cos) differences; line when omega == 0
+    turning = np.abs(omega) > 1e-12
+    safe_omega = np.where(turning, omega, 1.0)
+    dx = np.where(turning, v / safe_omega * (np.sin(end) - np.sin(start)), v * durations * np.cos(start))
+    dy = np.where(turning, -v / safe_omega * (np.cos(end) - np.cos(start)), v * durations * np.sin(start))
+    x = x0 + np.concatenate(([0.0], np.cumsum(dx)))
+    y = y0 + np.concatenate(([0.0], np.cumsum(dy)))
+    return x, y, np.degrees(heading - np.pi / 2)
+
+
+def wheel_centers(x, y, theta, wheel_base=wheel_base):
+    # Left and right wheel positions of every pose, as (N, 2) arrays
+    c, s = np.cos(np.radians(theta)), np.sin(np.radians(theta))
+    left = np.column_stack((x - wheel_base / 2 * c, y - wheel_base / 2 * s))
+    right = np.column_stack((x + wheel_base / 2 * c, y + wheel_base / 2 * s))
+    return left, right
+
+
+def body_corners(x, y, theta):
+    # Corners of the square robot body turned with theta, as (N, 4, 2)
+    corners = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1]], dtype=float) * robot_radius
+    c, s = np.cos(np.radians(theta)), np.sin(np.radians(theta))
+    rotation = np.stack([np.stack([c, -s], -1), np.stack([s, c], -1)], -2)  # (N, 2, 2)
+    return np.einsum("nij,kj->nki", rotation, corners) + np.stack([x, y], -1)[:, None, :]
+
+
+# Whole trajectory up front: wheel speeds, poses, wheel paths and body outlines
+left_speeds, right_speeds, durations = wheel_speed_schedule(path, theta_start)
+xs, ys, thetas = integrate_differential_drive(left_speeds, right_speeds, durations, *path[0], theta_start)
+left_wheel_path, right_wheel_path = wheel_centers(xs, ys, thetas)
+bodies = body_corners(xs, ys, thetas)
+num_steps = len(xs)  # Number of frames for the animation
 
 # Initialize the plot
 fig, ax = plt.subplots()
 ax.set_xlim(-10, 20)
 ax.set_ylim(-10, 20)
 
-# Create the robot body as a rectangle (simplified shape)
-robot_body = patches.Rectangle((-2 - robot_radius, -2 - robot_radius), robot_radius * 2, robot_radius * 2, fc='grey', ec='black')
+# The planned wheel paths are drawn once, faintly; only the recent trail,
+# the robot and the texts are animated (blitting), so every frame costs
+# the same however long the trajectory is
+ax.plot(left_wheel_path[:, 0], left_wheel_path[:, 1], 'b-', alpha=0.15)
+ax.plot(right_wheel_path[:, 0], right_wheel_path[:, 1], 'r-', alpha=0.15)
+left_trail, = ax.plot([], [], 'b-', label="Left Wheel Path", animated=True)
+right_trail, = ax.plot([], [], 'r-', label="Right Wheel Path", animated=True)
+ax.legend(loc='lower right')
+
+# Create the robot body (turns with theta) and the wheels
+robot_body = patches.Polygon(bodies[0], closed=True, fc='grey', ec='black', animated=True)
+left_wheel = patches.Circle(left_wheel_path[0], wheel_radius, fc='blue', ec='black', animated=True)
+right_wheel = patches.Circle(right_wheel_path[0], wheel_radius, fc='red', ec='black', animated=True)
 ax.add_patch(robot_body)
-
-# Wheels
-left_wheel = patches.Circle((-2 - wheel_base / 2, -2), wheel_radius, fc='blue', ec='black')
-right_wheel = patches.Circle((-2 + wheel_base / 2, -2), wheel_radius, fc='red', ec='black')
 ax.add_patch(left_wheel)
 ax.add_patch(right_wheel)
 
-# Path lists for wheel trajectories
-left_wheel_path = []
-right_wheel_path = []
+# Texts displaying the wheel speeds
+left_text = ax.text(-9, 17, "", fontsize=12, color='blue', animated=True)
+right_text = ax.text(-9, 15, "", fontsize=12, color='red', animated=True)
+artists = (left_trail, right_trail, robot_body, left_wheel, right_wheel, left_text, right_text)
 
-# Robot's current position and orientation
-x, y, theta = -2, -2, 0  # Starting position and orientation (theta is 0)
 
-# Function to update the robot's position and the path
+# Function to show the precomputed pose of a frame
 def update(frame):
-    global x, y, theta, left_wheel, right_wheel, robot_body
-    
-    # Default speed for straight movement
-    left_speed = robot_speed
-    right_speed = robot_speed
-
-    # Move the robot along the path
-    if frame < num_steps // 5:  # Move straight from (-2, -2) to (-2, 2)
-        delta_x = 0
-        delta_y = robot_speed
-        left_speed = right_speed = robot_speed  # Both wheels move forward
-
-    elif frame < 2 * num_steps // 5:  # Turn right at (-2, 2)
-        delta_x = 0
-        delta_y = 0  # No movement during turn, just rotate
-
-        # Right turn: Left wheel forward, Right wheel backward
-        left_speed = robot_speed
-        right_speed = -robot_speed
-        
-        # Update orientation for right turn
-        theta -= 90 / (num_steps // 5)  # Incremental right turn
-
-    elif frame < 3 * num_steps // 5:  # Move straight from (-2, 2) to (2, 2)
-        delta_x = robot_speed
-        delta_y = 0
-        left_speed = right_speed = robot_speed  # Both wheels move forward
-
-    elif frame < 4 * num_steps // 5:  # Turn left at (2, 2)
-        delta_x = 0
-        delta_y = 0  # No movement during turn, just rotate
-
-        # Left turn: Right wheel forward, Left wheel backward
-        left_speed = -robot_speed
-        right_speed = robot_speed
-        
-        # Update orientation for left turn
-        theta += 90 / (num_steps // 5)  # Incremental left turn
-
-    else:  # Move straight from (2, 2) to (2, 6)
-        delta_x = 0
-        delta_y = robot_speed
-        left_speed = right_speed = robot_speed  # Both wheels move forward
-
-    # Update the robot's position based on its motion
-    x += delta_x
-    y += delta_y
-    robot_body.set_xy((x - robot_radius, y - robot_radius))  # Update robot position
-
-    # Update wheel positions based on robot's orientation
-    left_wheel_center = (x - wheel_base / 2 * np.cos(np.radians(theta)), y - wheel_base / 2 * np.sin(np.radians(theta)))
-    right_wheel_center = (x + wheel_base / 2 * np.cos(np.radians(theta)), y + wheel_base / 2 * np.sin(np.radians(theta)))
-
-    left_wheel.set_center(left_wheel_center)
-    right_wheel.set_center(right_wheel_center)
-
-    # Update the paths for the left and right wheels
-    left_wheel_path.append(left_wheel_center)
-    right_wheel_path.append(right_wheel_center)
-
-    # Clear the previous paths
-    ax.clear()
-    ax.set_xlim(-10, 20)
-    ax.set_ylim(-10, 20)
-    
-    # Draw the path for the left and right wheels
-    left_wheel_path_array = np.array(left_wheel_path)
-    right_wheel_path_array = np.array(right_wheel_path)
-    ax.plot(left_wheel_path_array[:, 0], left_wheel_path_array[:, 1], 'b-', label="Left Wheel Path")
-    ax.plot(right_wheel_path_array[:, 0], right_wheel_path_array[:, 1], 'r-', label="Right Wheel Path")
-    
-    # Add the robot body and wheels
-    ax.add_patch(robot_body)
-    ax.add_patch(left_wheel)
-    ax.add_patch(right_wheel)
-
-    # Add the text displaying wheel speeds
-    ax.text(-9, 17, f"Left Wheel Speed: {left_speed:.2f}", fontsize=12, color='blue')
-    ax.text(-9, 15, f"Right Wheel Speed: {right_speed:.2f}", fontsize=12, color='red')
-    ax.legend()
+    start = max(0, frame + 1 - trail_length)
+    left_trail.set_data(left_wheel_path[start:frame + 1, 0], left_wheel_path[start:frame + 1, 1])
+    right_trail.set_data(right_wheel_path[start:frame + 1, 0], right_wheel_path[start:frame + 1, 1])
+    robot_body.set_xy(bodies[frame])
+    left_wheel.set_center(left_wheel_path[frame])
+    right_wheel.set_center(right_wheel_path[frame])
+
+    # Wheel speeds of the step leading into this pose
+    step = min(max(frame - 1, 0), len(left_speeds) - 1)
+    left_text.set_text(f"Left Wheel Speed: {left_speeds[step]:.2f}")
+    right_text.set_text(f"Right Wheel Speed: {right_speeds[step]:.2f}")
+    return artists
+
 
 # Create the animation
-ani = FuncAnimation(fig, update, frames=num_steps, interval=100, repeat=False)
+ani = FuncAnimation(fig, update, frames=num_steps, interval=100, repeat=False, blit=True)
 
-plt.show()
\ No newline at end of file
+plt.show()
@@ -19,6 +19,7 @@ setup(
         'console_scripts': [
             'wall_detector = wall_detector_robot.wall_detector:main',
             'wall_map = maps.wall_map:main',
+            'controller_harness = wall_detector_robot.harness:main',
         ],
     },
 )
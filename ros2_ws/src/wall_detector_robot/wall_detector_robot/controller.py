@@ -0,0 +1,53 @@
+# wall_detector_robot/controller.py
+# Control logic of the wall detector without ROS: range readings in,
+# velocity commands out. The ROS node and the offline harness both use it.
+
+import math
+from collections import namedtuple
+
+DIRECTIONS = ('kanan', 'kiri')  # Side of the followed wall: right, left
+
+# linear: forward speed (Twist linear.x), angular: turn rate (Twist angular.z,
+# positive counter-clockwise), corner: True when this command turns at a corner
+VelocityCommand = namedtuple('VelocityCommand', ['linear', 'angular', 'corner'])
+
+
+class WallDetectorController:
+    """
+    Corner detection and turning for a robot following a wall
+
+    A reading at or beyond corner_distance (infinity: the ultrasonic
+    sensor got no echo) means the wall has ended, so the robot turns in
+    place toward the wall side; otherwise it drives forward.
+
+    Args:
+        direction: 'kanan' (wall on the right, turn clockwise) or 'kiri'
+        forward_speed: linear.x while following the wall
+        turn_speed: Magnitude of angular.z at a corner
+        corner_distance: Readings from this distance on count as a corner
+    """
+
+    def __init__(self, direction='kanan', forward_speed=2.0, turn_speed=1.5, corner_distance=math.inf):
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {DIRECTIONS}")
+        self.direction = direction
+        self.forward_speed = forward_speed
+        self.turn_speed = turn_speed
+        self.corner_distance = corner_distance
+        self.corners = 0  # Corners entered so far
+        self._in_corner = False
+
+    def update(self, wall_distance):
+        # One control step for a range reading
+        corner = wall_distance >= self.corner_distance
+        if corner and not self._in_corner:
+            self.corners += 1
+        self._in_corner = corner
+        if corner:
+            angular = -self.turn_speed if self.direction == 'kanan' else self.turn_speed
+            return VelocityCommand(0.0, angular, True)
+        return VelocityCommand(self.forward_speed, 0.0, False)
+
+    def reset(self):
+        self.corners = 0
+        self._in_corner = False
@@ -0,0 +1,148 @@
+# wall_detector_robot/harness.py
+# Drives WallDetectorController from the pygame Robot of robot-maze-simulation
+# at high loop rates, without ROS, and reports loop rate and control latency
+#
+# The simulation is not part of this package: pass its directory with
+# --sim-path or set ROBOT_MAZE_SIM_PATH, e.g.
+#   export ROBOT_MAZE_SIM_PATH=~/robot-maze/robot-maze-simulation/src
+#   ros2 run wall_detector_robot controller_harness --rate 1000
+# Run from a source checkout, robot-maze-simulation/src of the checkout is used.
+
+import argparse
+import math
+import os
+import sys
+import time
+
+from wall_detector_robot.controller import WallDetectorController
+
+SIM_PATH_VARIABLE = 'ROBOT_MAZE_SIM_PATH'
+# robot-maze-simulation/src when this file is still in the source tree (not once installed)
+CHECKOUT_SIM_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', '..',
+                                                 'robot-maze-simulation', 'src'))
+PIXELS_PER_METER = 10  # Scale between Twist units and simulation pixels
+SENSOR_ANGLE = 30  # Side sensors of the pygame Robot sit at +/- 30 degrees
+
+
+def is_sim_path(path):
+    # Whether path holds the pygame field and robot modules
+    return all(os.path.isfile(os.path.join(path, name)) for name in ('field.py', 'robot.py'))
+
+
+def default_sim_path():
+    # $ROBOT_MAZE_SIM_PATH, else the source checkout's simulation if there is one, else None
+    path = os.environ.get(SIM_PATH_VARIABLE)
+    if path:
+        return os.path.expanduser(path)
+    return CHECKOUT_SIM_PATH if is_sim_path(CHECKOUT_SIM_PATH) else None
+
+
+def load_simulation(sim_path):
+    # The pygame field and robot; headless, nothing is drawn
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    if sim_path not in sys.path:
+        sys.path.insert(0, sim_path)
+    from field import RiceFieldMap, SCREEN_HEIGHT, SCREEN_WIDTH
+    from robot import Robot
+    field_map = RiceFieldMap(SCREEN_WIDTH, SCREEN_HEIGHT)
+    start = field_map.wall_thickness + 50
+    return Robot(start, start, field_map)
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run(robot, controller, rate=1000.0, duration=5.0, paced=True):
+    """
+    Close the loop between the robot's wall sensor and the controller
+
+    Every tick reads the side sensor on the controller's wall side,
+    runs one controller step and applies the command to the robot for
+    one tick of simulated time (1 / rate). With paced=True ticks are
+    scheduled on the wall clock at the given rate (busy-waiting between
+    them), so the report shows whether the loop can hold that rate;
+    otherwise it runs as fast as it can.
+
+    Returns:
+        Dict with 'ticks', 'elapsed' (s), 'loop_rate' (Hz), 'missed'
+        (ticks that started late by more than one period), 'corners' and
+        latency percentiles in microseconds: 'sensor_us' (reading the
+        range) and 'control_us' (reading in to command out)
+    """
+    dt = 1.0 / rate
+    ticks = int(duration * rate)
+    side = SENSOR_ANGLE if controller.direction == 'kanan' else -SENSOR_ANGLE  # Screen y points down
+    sensor_times = []
+    control_times = []
+    missed = 0
+    clock = time.perf_counter
+    start = clock()
+    for tick in range(ticks):
+        if paced:
+            deadline = start + tick * dt
+            now = clock()
+            if now - deadline > dt:
+                missed += 1
+            while now < deadline:
+                now = clock()
+
+        t0 = clock()
+        _, wall_distance = robot.check_sensor(side)
+        t1 = clock()
+        command = controller.update(wall_distance / PIXELS_PER_METER)
+        t2 = clock()
+        sensor_times.append(t1 - t0)
+        control_times.append(t2 - t1)
+
+        # Apply the command for one tick (angular.z is counter-clockwise, screen angles clockwise)
+        robot.angle -= math.degrees(command.angular * dt)
+        if command.linear:
+            robot.speed = command.linear * PIXELS_PER_METER * dt
+            robot.move_forward()
+    elapsed = clock() - start
+
+    sensor_times.sort()
+    control_times.sort()
+    report = {'ticks': ticks, 'elapsed': elapsed, 'loop_rate': ticks / elapsed, 'missed': missed,
+              'corners': controller.corners}
+    for name, values in (('sensor_us', sensor_times), ('control_us', control_times)):
+        report[name] = {label: percentile(values, fraction) * 1e6
+                        for label, fraction in (('p50', 0.5), ('p99', 0.99), ('max', 1.0))}
+    return report
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Run the wall detector controller on the pygame robot without ROS')
+    parser.add_argument('--rate', type=float, default=1000.0, help='control loop rate in Hz')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds of simulated time')
+    parser.add_argument('--direction', choices=['kanan', 'kiri'], default='kanan')
+    parser.add_argument('--free-run', action='store_true', help='do not pace the loop, run as fast as possible')
+    sim_path = default_sim_path()
+    parser.add_argument('--sim-path', default=sim_path, required=sim_path is None,
+                        help=f'robot-maze-simulation/src directory (default: ${SIM_PATH_VARIABLE}, '
+                             'or the source checkout when run from one)')
+    options = parser.parse_args(args)
+    if options.rate <= 0:
+        parser.error('--rate must be positive')
+    if options.duration < 0:
+        parser.error('--duration must not be negative')
+    if not is_sim_path(options.sim_path):
+        parser.error(f'no field.py and robot.py in {options.sim_path}; '
+                     f'pass --sim-path or set {SIM_PATH_VARIABLE} to robot-maze-simulation/src')
+
+    robot = load_simulation(options.sim_path)
+    controller = WallDetectorController(options.direction)
+    report = run(robot, controller, options.rate, options.duration, paced=not options.free_run)
+
+    print(f"{report['ticks']} ticks in {report['elapsed']:.2f} s: {report['loop_rate']:.0f} Hz "
+          f"(target {options.rate:.0f} Hz, {report['missed']} late), {report['corners']} corners")
+    for name in ('sensor_us', 'control_us'):
+        stats = report[name]
+        print(f"{name[:-3]:>8} latency: p50 {stats['p50']:.1f} us  p99 {stats['p99']:.1f} us  "
+              f"max {stats['max']:.1f} us")
+    print(f"Robot at ({robot.x:.1f}, {robot.y:.1f}), heading {robot.angle % 360:.1f} deg")
+
+
+if __name__ == '__main__':
+    main()
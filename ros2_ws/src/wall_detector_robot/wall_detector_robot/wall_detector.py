@@ -5,30 +5,33 @@ from rclpy.node import Node
 from geometry_msgs.msg import Twist
 import random
 
+from wall_detector_robot.controller import WallDetectorController
+
 class WallDetector(Node):
+    # ROS adapter: reads the sensor, runs WallDetectorController, publishes Twist
     def __init__(self):
         super().__init__('wall_detector')
+        self.declare_parameter('direction', 'kanan')  # bisa diubah ke 'kiri'
+        self.declare_parameter('rate', 2.0)  # Control loop rate in Hz (0.5 s period)
+        rate = self.get_parameter('rate').value
+        if rate <= 0:
+            raise ValueError(f"rate must be positive, got {rate}")
+        self.controller = WallDetectorController(self.get_parameter('direction').value)
         self.publisher = self.create_publisher(Twist, '/turtle1/cmd_vel', 10)
-        self.timer = self.create_timer(0.5, self.control_loop)
+        self.timer = self.create_timer(1.0 / rate, self.control_loop)
         self.wall_distance = 1.0  # jarak default ke dinding
-        self.direction = 'kanan'  # bisa diubah ke 'kiri'
 
     def control_loop(self):
-        msg = Twist()
-
-        # Simulasi pembacaan sensor ultrasonic
-        if self.wall_distance == float('inf'):
+        command = self.controller.update(self.wall_distance)
+        if command.corner:
             self.get_logger().info('Corner detected! Turning...')
-            if self.direction == 'kanan':
-                msg.angular.z = -1.5
-            elif self.direction == 'kiri':
-                msg.angular.z = 1.5
-        else:
-            msg.linear.x = 2.0  # maju
 
+        msg = Twist()
+        msg.linear.x = command.linear
+        msg.angular.z = command.angular
         self.publisher.publish(msg)
 
-        # Simulasi jarak berubah acak
+        # Simulasi pembacaan sensor ultrasonic: jarak berubah acak
         self.wall_distance = random.choice([1.0, 0.5, float('inf')])  # kadang corner
 
 def main(args=None):
@@ -0,0 +1,178 @@
+# Route cache for repeated station-to-station queries on a TrackGraph
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+
+class RouteCache:
+    """
+    Caches shortest-path trees per source and routes per (start, end)
+
+    Both are evicted least-recently-used first once their estimated size
+    exceeds max_bytes. The cache is valid for one graph version: edge
+    changes made through update_edge()/close_edge() only drop the trees
+    and routes they can affect, any other change to the graph flushes
+    everything on the next query.
+    """
+
+    def __init__(self, graph, max_bytes=64 * 1024 * 1024):
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.version = graph.version
+        self._trees = OrderedDict()   # source index -> (dist, pred) arrays
+        self._routes = OrderedDict()  # (start index, end index) -> (path indices, cost)
+        self._routes_by_edge = {}     # edge key -> set of route keys using it
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._routes)
+
+    @property
+    def memory_bytes(self):
+        return self._bytes
+
+    def clear(self):
+        self._trees.clear()
+        self._routes.clear()
+        self._routes_by_edge.clear()
+        self._bytes = 0
+        self.version = self.graph.version
+
+    # ------------------------------------------------------------------
+    # Queries
+
+    def shortest_path(self, start, end):
+        """
+        Shortest path between two node ids, answered from the cache if possible
+
+        Returns:
+            (path, cost): list of node ids and total weight, or ([], inf)
+            if end cannot be reached from start
+        """
+        graph = self.graph
+        if graph.version != self.version:
+            self.clear()
+        s, t = graph._lookup(start), graph._lookup(end)
+
+        key = (s, t)
+        route = self._routes.get(key)
+        if route is not None:
+            self._routes.move_to_end(key)
+            self.hits += 1
+        else:
+            self.misses += 1
+            dist, pred = self._tree(s)
+            route = self._extract(dist, pred, t)
+            self._store_route(key, route)
+
+        path, cost = route
+        return [graph.node_ids[i] for i in path], cost
+
+    def _tree(self, s):
+        tree = self._trees.get(s)
+        if tree is not None:
+            self._trees.move_to_end(s)
+            return tree
+
+        # One full search from s answers every later query from s
+        self.graph.dijkstra(s)
+        tree = (np.array(self.graph._dist), np.array(self.graph._pred, dtype=np.int32))
+        self._trees[s] = tree
+        self._bytes += tree[0].nbytes + tree[1].nbytes
+        self._evict()
+        return tree
+
+    @staticmethod
+    def _extract(dist, pred, t):
+        cost = float(dist[t])
+        if cost == math.inf:
+            return [], cost
+        path = []
+        while t != -1:
+            path.append(int(t))
+            t = pred[t]
+        path.reverse()
+        return path, cost
+
+    def _store_route(self, key, route):
+        self._routes[key] = route
+        self._bytes += self._route_bytes(route)
+        for edge in self._edges_of(route[0]):
+            self._routes_by_edge.setdefault(edge, set()).add(key)
+        self._evict()
+
+    @staticmethod
+    def _route_bytes(route):
+        # Rough size of the stored path list
+        return 64 + 8 * len(route[0])
+
+    def _edge_key(self, u, v):
+        if self.graph.directed:
+            return (u, v)
+        return (u, v) if u < v else (v, u)
+
+    def _edges_of(self, path):
+        return [self._edge_key(u, v) for u, v in zip(path, path[1:])]
+
+    # ------------------------------------------------------------------
+    # Eviction and invalidation
+
+    def _evict(self):
+        # Drop the least recently used trees first, they are the big items
+        while self._bytes > self.max_bytes and len(self._trees) > 1:
+            self._drop_tree(next(iter(self._trees)))
+        while self._bytes > self.max_bytes and self._routes:
+            self._drop_route(next(iter(self._routes)))
+
+    def _drop_tree(self, s):
+        dist, pred = self._trees.pop(s)
+        self._bytes -= dist.nbytes + pred.nbytes
+
+    def _drop_route(self, key):
+        route = self._routes.pop(key)
+        self._bytes -= self._route_bytes(route)
+        for edge in self._edges_of(route[0]):
+            users = self._routes_by_edge.get(edge)
+            if users is not None:
+                users.discard(key)
+                if not users:
+                    del self._routes_by_edge[edge]
+
+    def update_edge(self, node1, node2, weight):
+        """
+        Change an edge weight in the graph and invalidate what it affects
+
+        A heavier (or closed) edge only matters to routes and trees that
+        use it. A lighter edge can create new shortest paths, so trees it
+        would improve are dropped, and cached routes whose source tree is
+        no longer around to check are dropped with them.
+        """
+        graph = self.graph
+        if graph.version != self.version:
+            self.clear()
+        u, v = graph._lookup(node1), graph._lookup(node2)
+        old = graph.edge_weight(node1, node2)
+        graph.set_edge_weight(node1, node2, weight)
+        self.version = graph.version
+
+        arcs = [(u, v)] if graph.directed else [(u, v), (v, u)]
+        if weight >= old:
+            for key in list(self._routes_by_edge.get(self._edge_key(u, v), ())):
+                self._drop_route(key)
+            for s in [s for s, (_, pred) in self._trees.items() if any(pred[b] == a for a, b in arcs)]:
+                self._drop_tree(s)
+        else:
+            stale = set()
+            for s, (dist, _) in self._trees.items():
+                if any(dist[a] + weight < dist[b] for a, b in arcs):
+                    stale.add(s)
+            for key in [key for key in self._routes if key[0] in stale or key[0] not in self._trees]:
+                self._drop_route(key)
+            for s in stale:
+                self._drop_tree(s)
+
+    def close_edge(self, node1, node2):
+        self.update_edge(node1, node2, math.inf)
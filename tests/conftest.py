@@ -0,0 +1,12 @@
+# The modules are flat scripts: make the repository root and the pygame
+# simulation sources importable, and keep pygame off any real display
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "robot-maze-simulation", "src")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
@@ -0,0 +1,63 @@
+# D* Lite replanning against fresh searches after every edge change
+import math
+
+import numpy as np
+import pytest
+
+from dstar_lite import DStarLite
+from test_track_graph import path_weight, random_graph
+from track_graph import lattice_graph
+
+
+def assert_matches_fresh_search(graph, planner, start, goal):
+    path, cost = planner.plan()
+    expected = graph.shortest_path(start, goal, method="dijkstra")[1]
+    if math.isinf(expected):
+        assert path == [] and math.isinf(cost)
+        return
+    assert cost == pytest.approx(expected)
+    assert path[0] == start and path[-1] == goal
+    assert path_weight(graph, path) == pytest.approx(cost)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_replanning_matches_fresh_search(seed, directed):
+    graph, edges = random_graph(seed, n=50, m=160, directed=directed)
+    rng = np.random.default_rng(seed + 100)
+    start, goal = 0, len(graph) - 1
+    planner = DStarLite(graph, start, goal)
+    assert_matches_fresh_search(graph, planner, start, goal)
+
+    for _ in range(30):
+        u, v, w = edges[rng.integers(len(edges))]
+        # Heavier, lighter or closed edges
+        weight = rng.choice([w * 3, w * 0.5, math.inf])
+        planner.update_edge(u, v, float(weight))
+        assert_matches_fresh_search(graph, planner, start, goal)
+
+        # Sometimes advance the robot one step along the current route
+        path, _ = planner.plan()
+        if len(path) > 2 and rng.random() < 0.5:
+            start = path[1]
+            planner.move_to(start)
+            assert_matches_fresh_search(graph, planner, start, goal)
+
+
+def test_replanning_expands_less_than_a_new_search():
+    graph = lattice_graph(40, 40)
+    planner = DStarLite(graph, 0, 1599)
+    path, _ = planner.plan()
+    first = planner.last_expanded
+    # Close an edge near the goal end of the route
+    planner.close_edge(path[-3], path[-2])
+    assert_matches_fresh_search(graph, planner, 0, 1599)
+    assert planner.last_expanded < first
+
+
+def test_closed_off_goal_is_unreachable():
+    graph = lattice_graph(3, 3)
+    planner = DStarLite(graph, 0, 8)
+    planner.close_edge(5, 8)
+    planner.close_edge(7, 8)
+    assert planner.plan() == ([], math.inf)
@@ -0,0 +1,117 @@
+# OccupancyMap products against brute force on small random maps
+import os
+
+import numpy as np
+import pygame
+import pytest
+
+from occupancy_map import OccupancyMap, distance_transform, merge_rects, prune_cache
+
+
+def random_walls(seed, width=90, height=70, count=12):
+    rng = np.random.default_rng(seed)
+    walls = []
+    for _ in range(count):
+        w, h = (int(v) for v in rng.integers(1, 20, 2))
+        x, y = int(rng.integers(-5, width)), int(rng.integers(-5, height))
+        walls.append(pygame.Rect(x, y, w, h))
+    return walls
+
+
+def brute_force_distance(grid):
+    walls = np.argwhere(grid)
+    if not len(walls):
+        return np.full(grid.shape, np.inf)
+    cells = np.argwhere(np.ones_like(grid))
+    squared = ((cells[:, None, :] - walls[None, :, :]) ** 2).sum(-1).min(1)
+    return np.sqrt(squared).reshape(grid.shape)
+
+
+def brute_force_inflate(grid, radius):
+    rows, cols = grid.shape
+    result = grid.copy()
+    for r, c in np.argwhere(grid):
+        rr, cc = np.mgrid[:rows, :cols]
+        result |= (rr - r) ** 2 + (cc - c) ** 2 <= radius * radius
+    return result
+
+
+def is_wall(walls, width, height, x, y):
+    # The probe of Maze.is_wall and RiceFieldMap.is_wall
+    if x < 0 or x >= width or y < 0 or y >= height:
+        return True
+    point = pygame.Rect(x - 1, y - 1, 2, 2)
+    return any(wall.colliderect(point) for wall in walls)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_distance_transform_matches_brute_force(seed):
+    grid = np.random.default_rng(seed).random((23, 31)) < 0.05 * (seed + 1)
+    np.testing.assert_allclose(distance_transform(grid), brute_force_distance(grid))
+
+
+def test_distance_transform_without_walls():
+    assert np.isinf(distance_transform(np.zeros((4, 5), dtype=bool))).all()
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_merge_rects_covers_exactly_the_walls(seed):
+    grid = np.random.default_rng(seed).random((20, 25)) < 0.4
+    coverage = np.zeros(grid.shape, dtype=np.int64)
+    for c, r, w, h in merge_rects(grid):
+        coverage[r:r + h, c:c + w] += 1
+    # Every wall cell is covered exactly once, and nothing else is
+    np.testing.assert_array_equal(coverage, grid.astype(np.int64))
+
+
+@pytest.mark.parametrize("radius", [0, 1, 2.5, 4])
+def test_inflated_matches_brute_force(radius):
+    grid = np.random.default_rng(1).random((30, 40)) < 0.03
+    np.testing.assert_array_equal(OccupancyMap(grid).inflated(radius), brute_force_inflate(grid, radius))
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("spacing", [1, 4, 10])
+def test_point_samples_match_is_wall(seed, spacing):
+    width, height = 90, 70
+    walls = random_walls(seed, width, height)
+    samples = OccupancyMap.from_walls(walls, width, height).point_samples(spacing)
+    expected = [[is_wall(walls, width, height, x, y) for x in range(0, width + 1, spacing)]
+                for y in range(0, height + 1, spacing)]
+    np.testing.assert_array_equal(samples, expected)
+
+
+def test_rescaled_blocks_every_touched_cell():
+    walls = random_walls(5)
+    fine = OccupancyMap.from_walls(walls, 90, 70)
+    coarse = fine.rescaled(8)
+    assert fine.rescaled(8) is coarse
+    coarse.check_size(90, 70)
+    for r, c in np.argwhere(fine.grid):
+        assert coarse.grid[r // 8, c // 8]
+    with pytest.raises(ValueError):
+        coarse.check_size(100, 70)
+    with pytest.raises(ValueError):
+        coarse.point_samples(4)
+
+
+def test_save_load_and_disk_cache(tmp_path):
+    walls = random_walls(6)
+    original = OccupancyMap.from_walls(walls, 90, 70, metadata={"name": "test"})
+    path = str(tmp_path / "map.npz")
+    original.save(path)
+
+    cache_dir = str(tmp_path / "cache")
+    loaded = OccupancyMap.load(path, cache_dir=cache_dir)
+    np.testing.assert_array_equal(loaded.grid, original.grid)
+    np.testing.assert_array_equal(loaded.walls, original.walls)
+    assert loaded.metadata == {"name": "test"} and loaded.content_hash == original.content_hash
+
+    distances = loaded.distance_field()
+    assert len(os.listdir(cache_dir)) == 1
+    # A second load finds the product on disk instead of building it
+    again = OccupancyMap.load(path, cache_dir=cache_dir)
+    assert np.array_equal(again.derived("distance", lambda: pytest.fail("rebuilt")), distances)
+
+    assert prune_cache(cache_dir, limit=0) == 1
+    assert os.listdir(cache_dir) == []
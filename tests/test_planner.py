@@ -0,0 +1,93 @@
+# GridPlanner routes against a brute-force Dijkstra over the grid
+import heapq
+import math
+
+import numpy as np
+import pytest
+
+from planner import SQRT2, GridPlanner
+
+
+def brute_force_distances(grid, goal):
+    # Dijkstra from goal over 8-connected moves that do not cut a blocked
+    # corner (the move set is symmetric, so these are distances to goal)
+    rows, cols = grid.shape
+    dist = np.full(grid.shape, math.inf)
+    dist[goal] = 0.0
+    queue = [(0.0, goal)]
+    while queue:
+        d, (r, c) = heapq.heappop(queue)
+        if d > dist[r, c]:
+            continue
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                nr, nc = r + dr, c + dc
+                if not (dr or dc) or not (0 <= nr < rows and 0 <= nc < cols) or grid[nr, nc]:
+                    continue
+                if dr and dc and (grid[r + dr, c] or grid[r, c + dc]):
+                    continue
+                nd = d + (SQRT2 if dr and dc else 1.0)
+                if nd < dist[nr, nc]:
+                    dist[nr, nc] = nd
+                    heapq.heappush(queue, (nd, (nr, nc)))
+    return dist
+
+
+def assert_valid_path(grid, path, start, goal):
+    assert path[0] == start and path[-1] == goal
+    for (r, c), (nr, nc) in zip(path, path[1:]):
+        dr, dc = nr - r, nc - c
+        assert max(abs(dr), abs(dc)) == 1 and not grid[nr, nc]
+        if dr and dc:
+            assert not grid[r + dr, c] and not grid[r, c + dc]
+
+
+@pytest.mark.parametrize("method", ["jps", "astar"])
+@pytest.mark.parametrize("density", [0.0, 0.1, 0.25, 0.4])
+def test_plan_matches_brute_force(method, density):
+    rng = np.random.default_rng(int(density * 100))
+    for _ in range(25):
+        n = int(rng.integers(5, 30))
+        grid = rng.random((n, n)) < density
+        free = np.argwhere(~grid)
+        if len(free) < 2:
+            continue
+        goal = tuple(int(v) for v in free[rng.integers(len(free))])
+        expected = brute_force_distances(grid, goal)
+        # One planner per grid, so later queries also go through the goal cache
+        planner = GridPlanner(grid)
+        for i in rng.choice(len(free), min(len(free), 5), replace=False):
+            start = tuple(int(v) for v in free[i])
+            path = planner.plan(start, goal, method)
+            if math.isinf(expected[start]):
+                assert path is None
+                continue
+            assert_valid_path(grid, path, start, goal)
+            assert planner.path_length(path) == pytest.approx(expected[start])
+
+
+def test_open_grid_astar_stays_on_the_straight_line():
+    planner = GridPlanner(np.zeros((60, 60), dtype=bool))
+    path = planner.plan((0, 0), (59, 59), "astar")
+    assert path == [(i, i) for i in range(60)]
+    # Equal-cost ties go to the deeper node, so little beyond the path is closed
+    assert len(planner._goal_caches[planner._index((59, 59))].closed) <= 2 * 60
+
+
+def test_distance_map_matches_brute_force():
+    rng = np.random.default_rng(3)
+    grid = rng.random((25, 25)) < 0.3
+    goal = tuple(int(v) for v in np.argwhere(~grid)[0])
+    np.testing.assert_allclose(GridPlanner(grid).distance_map(goal), brute_force_distances(grid, goal))
+
+
+def test_blocked_and_unreachable_cells():
+    grid = np.zeros((5, 5), dtype=bool)
+    grid[:, 2] = True
+    planner = GridPlanner(grid)
+    assert planner.plan((0, 0), (0, 2)) is None
+    assert planner.plan((0, 0), (4, 4)) is None
+    assert planner.plan((0, 0), (4, 4), "astar") is None
+    assert planner.plan((1, 1), (1, 1)) == [(1, 1)]
+    with pytest.raises(ValueError):
+        planner.plan((0, 0), (4, 1), method="bfs")
@@ -0,0 +1,65 @@
+# RouteCache answers against fresh searches while edges change
+import math
+
+import numpy as np
+import pytest
+
+from route_cache import RouteCache
+from test_track_graph import random_graph
+from track_graph import lattice_graph
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("max_bytes", [64 * 1024 * 1024, 4096])
+def test_cached_routes_match_fresh_search(directed, max_bytes):
+    graph, edges = random_graph(11, n=40, m=120, directed=directed)
+    cache = RouteCache(graph, max_bytes=max_bytes)
+    rng = np.random.default_rng(5)
+    stations = [0, 7, 13, 21, 34, 39]
+    for step in range(200):
+        if step % 10 == 9:
+            u, v, w = edges[rng.integers(len(edges))]
+            cache.update_edge(u, v, float(rng.choice([w * 3, w * 0.3, math.inf])))
+        s, t = (int(x) for x in rng.choice(stations, 2))
+        path, cost = cache.shortest_path(s, t)
+        expected_path, expected = graph.shortest_path(s, t, method="dijkstra")
+        if math.isinf(expected):
+            assert path == [] and math.isinf(cost)
+        else:
+            assert cost == pytest.approx(expected)
+            assert path[0] == s and path[-1] == t
+        # Eviction keeps the estimate under the limit, except that the
+        # last tree (float64 distances, int32 predecessors) always stays
+        assert cache.memory_bytes <= max(max_bytes, 12 * len(graph))
+    assert cache.hits > 0
+
+
+def test_repeated_query_is_a_hit():
+    cache = RouteCache(lattice_graph(10, 10))
+    first = cache.shortest_path(0, 99)
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.shortest_path(0, 99) == first
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Another target from the same source reuses the tree but is a new route
+    cache.shortest_path(0, 55)
+    assert (cache.misses, len(cache)) == (2, 2)
+
+
+def test_closing_an_edge_drops_only_routes_using_it():
+    graph = lattice_graph(10, 10)
+    cache = RouteCache(graph)
+    path, _ = cache.shortest_path(0, 9)
+    other, _ = cache.shortest_path(90, 99)
+    cache.close_edge(path[1], path[2])
+    assert len(cache) == 1
+    assert cache.shortest_path(90, 99) == (other, 9)
+    assert cache.shortest_path(0, 9)[1] == graph.shortest_path(0, 9)[1]
+
+
+def test_direct_graph_changes_flush_the_cache():
+    graph = lattice_graph(5, 5)
+    cache = RouteCache(graph)
+    cache.shortest_path(0, 24)
+    graph.close_edge(0, 1)
+    graph.close_edge(0, 5)
+    assert cache.shortest_path(0, 24) == ([], math.inf)
@@ -0,0 +1,91 @@
+# TelemetryStore rollups and raw history against brute force over all samples
+import numpy as np
+import pytest
+
+from telemetry import TelemetryStore, parse_timestamp
+
+RESOLUTIONS = ((1, 50), (10, 30), (100, 8))
+
+
+def samples(seed, n=2000):
+    rng = np.random.default_rng(seed)
+    times = np.cumsum(rng.uniform(0.05, 1.5, n)) + 1000.0
+    values = rng.normal(20.0, 5.0, (n, 3))
+    return times, values
+
+
+def brute_force_rollup(times, values, width, capacity):
+    # Buckets a rollup of this size still keeps, from the full history
+    buckets = (times // width).astype(np.int64)
+    expected = {}
+    for b in np.unique(buckets):
+        if b <= buckets.max() - capacity:
+            continue
+        chunk = values[buckets == b]
+        expected[b * float(width)] = (len(chunk), chunk.min(0), chunk.mean(0), chunk.max(0))
+    return expected
+
+
+def filled_store(times, values, bulk):
+    store = TelemetryStore(raw_capacity=300, resolutions=RESOLUTIONS)
+    if bulk:
+        # Uneven chunks, so bucket boundaries fall inside and between calls
+        for chunk in np.array_split(np.arange(len(times)), [5, 6, 400, 1100, 1101]):
+            store.append_many(times[chunk], values[chunk])
+    else:
+        for t, v in zip(times, values):
+            store.append(t, v)
+    return store
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_rollups_match_brute_force(bulk):
+    times, values = samples(1)
+    store = filled_store(times, values, bulk)
+    for width, capacity in RESOLUTIONS:
+        expected = brute_force_rollup(times, values, width, capacity)
+        result = store.query(0, times[-1] + width, resolution=width)
+        assert result["time"].tolist() == sorted(expected)
+        for i, t in enumerate(result["time"]):
+            count, low, mean, high = expected[t]
+            assert result["count"][i] == count
+            np.testing.assert_allclose(result["min"][i], low)
+            np.testing.assert_allclose(result["mean"][i], mean)
+            np.testing.assert_allclose(result["max"][i], high)
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_raw_keeps_the_newest_samples(bulk):
+    times, values = samples(2)
+    store = filled_store(times, values, bulk)
+    assert len(store) == 300
+    start, end = times[-250], times[-20]
+    result = store.query(start, end, resolution=0)
+    np.testing.assert_array_equal(result["time"], times[-250:-19])
+    np.testing.assert_array_equal(result["mean"], values[-250:-19])
+    t, v = store.latest()
+    assert t == times[-1] and np.array_equal(v, values[-1])
+
+
+def test_resolution_follows_the_point_budget():
+    times, values = samples(3)
+    store = filled_store(times, values, bulk=True)
+    end = times[-1]
+    # Recent and small enough for raw samples
+    assert "count" not in store.query(end - 10, end, max_points=100)
+    # Too many raw points, or older than the raw ring: coarser buckets
+    assert len(store.query(end - 40, end, max_points=10)["time"]) <= 10
+    wide = store.query(end - 700, end, max_points=10)
+    assert len(wide["time"]) <= 10 and np.all(np.diff(wide["time"]) == 100)
+
+
+def test_channels_timestamps_and_errors():
+    store = TelemetryStore(raw_capacity=10, resolutions=((60, 10),))
+    store.record({"timestamp": "2024-05-01T12:00:00Z", "soil_moisture": 41.0, "temperature": 28.5, "humidity": 70.0})
+    t = parse_timestamp("2024-05-01T12:00:00+00:00")
+    assert store.latest()[0] == t
+    result = store.query(t - 1, t + 1, resolution=60, channel="temperature")
+    assert result["mean"].tolist() == [28.5]
+    with pytest.raises(ValueError):
+        store.query(t - 1, t + 1, resolution=1)
+    assert store.query(t + 100, t + 200, resolution=0)["time"].size == 0
@@ -0,0 +1,70 @@
+# Contraction hierarchy queries against brute-force all-pairs distances
+import math
+
+import numpy as np
+import pytest
+
+from test_track_graph import floyd_warshall, path_weight, random_graph
+from track_ch import ContractionHierarchy
+from track_graph import lattice_graph
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(4))
+def test_shortest_path_matches_brute_force(seed, directed):
+    graph, edges = random_graph(seed, directed=directed)
+    expected = floyd_warshall(len(graph), edges, directed)
+    ch = ContractionHierarchy.build(graph)
+    for s in range(len(graph)):
+        for t in range(len(graph)):
+            path, cost = ch.shortest_path(s, t)
+            if math.isinf(expected[s, t]):
+                assert path == [] and math.isinf(cost)
+                continue
+            assert cost == pytest.approx(expected[s, t])
+            # The unpacked path uses original edges only and adds up to cost
+            assert path[0] == s and path[-1] == t
+            assert path_weight(graph, path) == pytest.approx(cost)
+
+
+@pytest.mark.parametrize("directed", [False, True])
+def test_many_to_many_matches_brute_force(directed):
+    graph, edges = random_graph(7, n=60, m=180, directed=directed)
+    expected = floyd_warshall(len(graph), edges, directed)
+    ch = ContractionHierarchy.build(graph)
+    sources, targets = [3, 0, 17, 42, 59], [5, 3, 11, 30, 58, 1]
+    matrix = ch.many_to_many(sources, targets)
+    np.testing.assert_allclose(matrix, expected[np.ix_(sources, targets)])
+
+
+def test_small_witness_limit_stays_exact():
+    # A low settle limit only adds shortcuts, it never loses a route
+    graph = lattice_graph(12, 12)
+    exact = ContractionHierarchy.build(graph)
+    rough = ContractionHierarchy.build(graph, witness_settle_limit=2)
+    assert rough.num_shortcuts >= exact.num_shortcuts
+    for s, t in [(0, 143), (5, 130), (77, 12)]:
+        assert rough.shortest_path(s, t)[1] == pytest.approx(graph.shortest_path(s, t)[1])
+
+
+def test_unknown_node():
+    ch = ContractionHierarchy.build(lattice_graph(3, 3))
+    with pytest.raises(ValueError):
+        ch.shortest_path(0, 99)
+
+
+def test_load_current_follows_the_graph(tmp_path):
+    graph = lattice_graph(6, 6)
+    filename = str(tmp_path / "hierarchy.npz")
+    assert ContractionHierarchy.load_current(graph, filename) is None
+
+    ch = ContractionHierarchy.load_or_build(graph, filename)
+    loaded = ContractionHierarchy.load_current(graph, filename)
+    assert loaded is not None and loaded.fingerprint == ch.fingerprint
+    assert loaded.shortest_path(0, 35) == ch.shortest_path(0, 35)
+
+    # A changed graph no longer matches the saved file, so it is rebuilt
+    graph.close_edge(0, 1)
+    assert ContractionHierarchy.load_current(graph, filename) is None
+    rebuilt = ContractionHierarchy.load_or_build(graph, filename)
+    assert rebuilt.shortest_path(0, 1)[1] == pytest.approx(graph.shortest_path(0, 1)[1])
@@ -0,0 +1,136 @@
+# TrackGraph searches against brute-force all-pairs distances
+import math
+
+import numpy as np
+import pytest
+
+from track_graph import TrackGraph, lattice_graph
+
+
+def random_graph(seed, n=40, m=120, directed=False, integer=False):
+    rng = np.random.default_rng(seed)
+    coords = rng.random((n, 2)) * 100
+    edges = []
+    for u, v in rng.integers(0, n, (m, 2)).tolist():
+        if u == v:
+            continue
+        length = float(np.hypot(*(coords[u] - coords[v])))
+        weight = int(rng.integers(1, 50)) if integer else length * float(rng.uniform(1, 3))
+        edges.append((u, v, weight))
+    return TrackGraph(range(n), coords, edges, directed=directed), edges
+
+
+def floyd_warshall(n, edges, directed):
+    dist = np.full((n, n), math.inf)
+    np.fill_diagonal(dist, 0.0)
+    for u, v, w in edges:
+        dist[u, v] = min(dist[u, v], w)
+        if not directed:
+            dist[v, u] = min(dist[v, u], w)
+    for k in range(n):
+        dist = np.minimum(dist, dist[:, k:k + 1] + dist[k:k + 1, :])
+    return dist
+
+
+def path_weight(graph, path):
+    return sum(graph.edge_weight(a, b) for a, b in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("directed", [False, True])
+@pytest.mark.parametrize("seed", range(5))
+def test_searches_match_brute_force(seed, directed):
+    graph, edges = random_graph(seed, directed=directed)
+    expected = floyd_warshall(len(graph), edges, directed)
+    rng = np.random.default_rng(seed + 100)
+    # Random order, so every query starts from buffers a different search left behind
+    for s, t in rng.integers(0, len(graph), (60, 2)).tolist():
+        for method in ("dijkstra", "astar"):
+            path, cost = graph.shortest_path(s, t, method=method)
+            assert cost == pytest.approx(expected[s, t])
+            if math.isinf(cost):
+                assert path == []
+            else:
+                assert path[0] == s and path[-1] == t
+                assert path_weight(graph, path) == pytest.approx(cost)
+
+
+def test_distances_from_matches_brute_force():
+    graph, edges = random_graph(3, directed=True)
+    expected = floyd_warshall(len(graph), edges, True)
+    for s in range(len(graph)):
+        assert np.allclose(graph.distances_from(s), expected[s])
+
+
+def test_dijkstra_stops_once_targets_are_settled():
+    graph = lattice_graph(30, 30)
+    graph.dijkstra(0, targets=[1, 30])
+    assert graph.last_expanded < len(graph) // 10
+    assert graph._dist[1] == 1 and graph._dist[30] == 1
+
+
+def test_astar_expands_fewer_nodes_than_dijkstra():
+    graph = lattice_graph(50, 50)
+    graph.shortest_path(0, 2499, method="dijkstra")
+    dijkstra_expanded = graph.last_expanded
+    graph.shortest_path(0, 2499, method="astar")
+    # The nodes of the last row and column tie with the target on f; the
+    # deeper node wins the tie, so the target is settled before all of them
+    assert graph.last_expanded < dijkstra_expanded
+
+
+def test_integer_weights_stay_integers():
+    nodes = [(1, 0, 0), (2, 1, 0), (3, 2, 0)]
+    graph = TrackGraph.from_lists(nodes, [(1, 2, 3), (2, 3, 4)])
+    path, cost = graph.shortest_path(1, 3)
+    assert path == [1, 2, 3]
+    assert cost == 7 and isinstance(cost, int)
+    assert graph.to_dict()[2]['edges'] == {1: 3, 3: 4}
+    assert all(isinstance(w, int) for w in graph.to_dict()[2]['edges'].values())
+
+    floats = TrackGraph.from_lists(nodes, [(1, 2, 3.5), (2, 3, 4)])
+    assert floats.shortest_path(1, 3)[1] == 7.5
+
+
+def test_edge_changes_reroute():
+    graph = lattice_graph(3, 3)
+    assert graph.shortest_path(0, 2)[1] == 2
+    graph.close_edge(0, 1)
+    path, cost = graph.shortest_path(0, 2)
+    assert cost == 4 and path[:2] == [0, 3]
+    graph.set_edge_weight(0, 1, 1.0)
+    assert graph.shortest_path(0, 2) == ([0, 1, 2], 2)
+
+
+def test_unreachable_node():
+    graph = TrackGraph([0, 1, 2], [(0, 0), (1, 0), (2, 0)], [(0, 1, 1.0)])
+    for method in ("dijkstra", "astar"):
+        assert graph.shortest_path(0, 2, method=method) == ([], math.inf)
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        TrackGraph([0, 1], [(0, 0), (1, 0)], [(0, 1, -1.0)])
+    with pytest.raises(ValueError):
+        TrackGraph([0, 0], [(0, 0), (1, 0)], [])
+    with pytest.raises(ValueError):
+        TrackGraph.from_lists([(1, 0, 0)], [(1, 2, 1)])
+    graph = lattice_graph(2, 2)
+    with pytest.raises(ValueError):
+        graph.shortest_path(0, 99)
+    with pytest.raises(ValueError):
+        graph.shortest_path(0, 3, method="bfs")
+
+
+def test_save_load_round_trip(tmp_path):
+    graph, _ = random_graph(7, integer=True)
+    filename = tmp_path / "graph.npz"
+    graph.save(filename)
+    loaded = TrackGraph.load(filename)
+    assert loaded.fingerprint() == graph.fingerprint()
+    for s, t in [(0, 5), (3, 17), (12, 2)]:
+        assert loaded.shortest_path(s, t) == graph.shortest_path(s, t)
+
+    nodes = [(1, 0, 0), (2, 1, 0)]
+    integral = TrackGraph.from_lists(nodes, [(1, 2, 3)])
+    integral.save(tmp_path / "int.npz")
+    assert TrackGraph.load(tmp_path / "int.npz").shortest_path(1, 2) == ([1, 2], 3)
@@ -0,0 +1,419 @@
+# Contraction hierarchy for fast repeated routing on a TrackGraph
+import heapq
+import math
+import os
+
+import numpy as np
+
+
+class ContractionHierarchy:
+    """
+    Preprocessed TrackGraph answering shortest paths by bidirectional
+    upward search
+
+    Nodes are contracted from least to most important. Contracting a node
+    adds shortcut edges between its remaining neighbours wherever the path
+    through it is the only shortest one. A query then only follows edges
+    towards more important nodes from both ends, which touches a small
+    part of the graph however far apart the stations are.
+    """
+
+    def __init__(self, node_ids, rank, src, dst, weight, middle, fingerprint=""):
+        self.node_ids = list(node_ids)
+        self.index = {node: i for i, node in enumerate(self.node_ids)}
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.fingerprint = fingerprint
+        self._src = np.asarray(src, dtype=np.int64)
+        self._dst = np.asarray(dst, dtype=np.int64)
+        self._weight = np.asarray(weight, dtype=float)
+        self._middle = np.asarray(middle, dtype=np.int64)
+        self._build_search_graphs()
+
+    def _build_search_graphs(self):
+        n = len(self.node_ids)
+        up = self.rank[self._src] < self.rank[self._dst]
+
+        # Forward search leaves u along u->w with rank[w] > rank[u], the
+        # backward search leaves w along u->w with rank[u] > rank[w]
+        self._up = [[] for _ in range(n)]
+        self._down = [[] for _ in range(n)]
+        for u, w, c, up_edge in zip(self._src.tolist(), self._dst.tolist(), self._weight.tolist(), up.tolist()):
+            if up_edge:
+                self._up[u].append((w, c))
+            else:
+                self._down[w].append((u, c))
+
+        # Shortcut u->w stands for u->middle->w (_middle_of[u][w]), original edges have middle -1
+        self._middle_of = [{} for _ in range(n)]
+        for u, w, m in zip(self._src.tolist(), self._dst.tolist(), self._middle.tolist()):
+            self._middle_of[u][w] = m
+
+        # Query buffers (forward, backward), allocated once and reset only
+        # where the previous query touched them
+        self._dist = ([math.inf] * n, [math.inf] * n)
+        self._pred = ([-1] * n, [-1] * n)
+        self._touched = ([], [])  # Nodes whose buffer entries a search set
+        self.last_settled = 0
+
+    @property
+    def num_shortcuts(self):
+        return int((self._middle >= 0).sum())
+
+    # ------------------------------------------------------------------
+    # Preprocessing
+
+    @classmethod
+    def build(cls, graph, witness_settle_limit=60):
+        """
+        Contract every node of a TrackGraph
+
+        Args:
+            graph: TrackGraph to preprocess
+            witness_settle_limit: Nodes a witness search may settle before
+                giving up and adding the shortcut (more = fewer shortcuts,
+                slower preprocessing)
+
+        Returns:
+            ContractionHierarchy
+        """
+        n = len(graph)
+        out_edges = [dict() for _ in range(n)]
+        in_edges = [dict() for _ in range(n)]
+        middle_of = {}
+
+        src = np.repeat(np.arange(n), np.diff(graph.indptr)).tolist()
+        for u, w, c in zip(src, graph.indices.tolist(), graph.weights.tolist()):
+            if u == w:
+                continue
+            if c < out_edges[u].get(w, math.inf):
+                out_edges[u][w] = c
+                in_edges[w][u] = c
+                middle_of[(u, w)] = -1
+
+        # out_edges/in_edges only hold the remaining (uncontracted) graph;
+        # edges of a contracted node move to hierarchy_edges
+        hierarchy_edges = []
+        deleted_neighbors = [0] * n
+        level = [0] * n
+        heappop, heappush, inf = heapq.heappop, heapq.heappush, math.inf
+
+        def witness_distances(source, skip, max_cost, targets):
+            # Dijkstra over the remaining graph, avoiding skip; stops
+            # once every target is settled, nothing cheaper than max_cost
+            # is left, or the settle limit is reached
+            dist = {source: 0.0}
+            get = dist.get
+            queue = [(0.0, source)]
+            remaining = len(targets)
+            settled = 0
+            while queue and settled < witness_settle_limit:
+                cost, u = heappop(queue)
+                if cost > dist[u]:
+                    continue
+                if cost > max_cost:
+                    break
+                settled += 1
+                if u in targets:
+                    remaining -= 1
+                    if not remaining:
+                        break
+                for w, c in out_edges[u].items():
+                    new_cost = cost + c
+                    if new_cost < get(w, inf) and w != skip:
+                        dist[w] = new_cost
+                        heappush(queue, (new_cost, w))
+            return dist
+
+        def shortcuts_for(v):
+            # Shortcuts needed if v were contracted now
+            needed = []
+            incoming = list(in_edges[v].items())
+            outgoing = list(out_edges[v].items())
+            if not outgoing:
+                return needed, incoming, outgoing
+            max_out = max(c for _, c in outgoing)
+            for u, c_in in incoming:
+                targets = {w for w, _ in outgoing if w != u}
+                if not targets:
+                    continue
+                dist = witness_distances(u, v, c_in + max_out, targets)
+                for w, c_out in outgoing:
+                    if w == u:
+                        continue
+                    via = c_in + c_out
+                    if dist.get(w, math.inf) > via:
+                        needed.append((u, w, via))
+            return needed, incoming, outgoing
+
+        def priority(v, needed, incoming, outgoing):
+            # Twice the edge difference, plus the number of already contracted
+            # neighbours and the node's level (its height in the hierarchy so
+            # far), which keep the contraction spread evenly over the graph
+            return 2 * (len(needed) - len(incoming) - len(outgoing)) + deleted_neighbors[v] + level[v]
+
+        queue = [(priority(v, *shortcuts_for(v)), v) for v in range(n)]
+        heapq.heapify(queue)
+        rank = np.zeros(n, dtype=np.int64)
+        order = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            # Lazy update: the stored priority may be stale
+            needed, incoming, outgoing = shortcuts_for(v)
+            current = priority(v, needed, incoming, outgoing)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+
+            for u, c in incoming:
+                hierarchy_edges.append((u, v, c, middle_of[(u, v)]))
+                del out_edges[u][v]
+                deleted_neighbors[u] += 1
+                level[u] = max(level[u], level[v] + 1)
+            for w, c in outgoing:
+                hierarchy_edges.append((v, w, c, middle_of[(v, w)]))
+                del in_edges[w][v]
+                deleted_neighbors[w] += 1
+                level[w] = max(level[w], level[v] + 1)
+            for u, w, c in needed:
+                if c < out_edges[u].get(w, math.inf):
+                    out_edges[u][w] = c
+                    in_edges[w][u] = c
+                    middle_of[(u, w)] = v
+            rank[v] = order
+            order += 1
+
+        e = np.array(hierarchy_edges, dtype=float).reshape(-1, 4)
+        return cls(graph.node_ids, rank, e[:, 0], e[:, 1], e[:, 2], e[:, 3], graph.fingerprint())
+
+    # ------------------------------------------------------------------
+    # Persistence
+
+    def save(self, filename):
+        np.savez(filename, node_ids=np.asarray(self.node_ids), rank=self.rank,
+                 src=self._src, dst=self._dst, weight=self._weight, middle=self._middle,
+                 fingerprint=np.asarray(self.fingerprint))
+
+    @classmethod
+    def load(cls, filename):
+        data = np.load(filename)
+        return cls(data['node_ids'].tolist(), data['rank'], data['src'], data['dst'],
+                   data['weight'], data['middle'], str(data['fingerprint']))
+
+    @classmethod
+    def load_current(cls, graph, filename):
+        # The preprocessed file if it exists and was built for graph as it is now, else None
+        if os.path.exists(filename):
+            ch = cls.load(filename)
+            if ch.fingerprint == graph.fingerprint():
+                return ch
+        return None
+
+    @classmethod
+    def load_or_build(cls, graph, filename, **kwargs):
+        # Reuse the preprocessed file unless the graph changed since it was written
+        ch = cls.load_current(graph, filename)
+        if ch is None:
+            ch = cls.build(graph, **kwargs)
+            ch.save(filename)
+        return ch
+
+    # ------------------------------------------------------------------
+    # Queries
+
+    def shortest_path(self, start, end):
+        """
+        Shortest path between two node ids
+
+        Returns:
+            (path, cost): list of node ids and total weight, or ([], inf)
+            if end cannot be reached from start
+        """
+        s, t = self._lookup(start), self._lookup(end)
+        cost, meet, fwd_pred, bwd_pred = self._search(s, t)
+        if meet < 0:
+            return [], math.inf
+
+        # Up to the meeting node from start, then down to end
+        upward = []
+        node = meet
+        while node != -1:
+            upward.append(node)
+            node = fwd_pred[node]
+        upward.reverse()
+        downward = []
+        node = bwd_pred[meet]
+        while node != -1:
+            downward.append(node)
+            node = bwd_pred[node]
+
+        hops = upward + downward
+        path = [hops[0]]
+        for u, w in zip(hops, hops[1:]):
+            self._unpack(u, w, path)
+        return [self.node_ids[i] for i in path], cost
+
+    def many_to_many(self, sources, targets):
+        """
+        Route costs from every source to every target (node ids)
+
+        Bucket method: a backward upward search from each target leaves a
+        (target, cost) entry at every node it settles, then a forward
+        upward search from each source adds its own cost to the entries it
+        meets. Every station costs one small upward search instead of a
+        Dijkstra over the track.
+
+        Returns:
+            Array with [i, j] the cost from sources[i] to targets[j] (inf
+            where unreachable)
+        """
+        # Buckets as flat arrays sorted by meeting node: the entries at
+        # column k are bucket_target/bucket_cost[bucket_ptr[k]:bucket_ptr[k + 1]]
+        columns = {}
+        entries = []
+        for j, t in enumerate(targets):
+            for v, cost in self._upward(self._lookup(t), 1):
+                entries.append((columns.setdefault(v, len(columns)), j, cost))
+        entries = np.array(entries, dtype=float).reshape(-1, 3)
+        entries = entries[np.argsort(entries[:, 0], kind="stable")]
+        bucket_ptr = np.searchsorted(entries[:, 0], np.arange(len(columns) + 1))
+        bucket_target = entries[:, 1].astype(np.int64)
+        bucket_cost = entries[:, 2]
+
+        matrix = np.full((len(sources), len(targets)), math.inf)
+        for i, s in enumerate(sources):
+            met = [(columns[v], cost) for v, cost in self._upward(self._lookup(s), 0) if v in columns]
+            if not met:
+                continue
+            cols, costs = np.array(met).T
+            cols = cols.astype(np.int64)
+            starts, counts = bucket_ptr[cols], bucket_ptr[cols + 1] - bucket_ptr[cols]
+            # Positions of all entries in the met buckets, and the source's cost to each bucket
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+            index = offsets + np.arange(counts.sum())
+            np.minimum.at(matrix[i], bucket_target[index], bucket_cost[index] + np.repeat(costs, counts))
+        return matrix
+
+    def _lookup(self, node):
+        try:
+            return self.index[node]
+        except KeyError:
+            raise ValueError(f"Unknown node {node}") from None
+
+    def _reset(self):
+        for side in (0, 1):
+            dist, pred = self._dist[side], self._pred[side]
+            for v in self._touched[side]:
+                dist[v] = math.inf
+                pred[v] = -1
+            self._touched[side].clear()
+
+    def _upward(self, source, side):
+        # Complete upward search (side 0 forward, 1 backward) with
+        # stall-on-demand; returns the settled, unstalled nodes as
+        # (node, cost) pairs, which include the top of every shortest path
+        self._reset()
+        here, touched = self._dist[side], self._touched[side]
+        graph, stall_graph = (self._up, self._down) if side == 0 else (self._down, self._up)
+        heappop, heappush = heapq.heappop, heapq.heappush
+        here[source] = 0.0
+        touched.append(source)
+        queue = [(0.0, source)]
+        settled = []
+        inf = math.inf
+        while queue:
+            cost, u = heappop(queue)
+            if cost > here[u]:
+                continue
+            for x, c in stall_graph[u]:
+                if here[x] + c < cost:
+                    break
+            else:
+                settled.append((u, cost))
+                for w, c in graph[u]:
+                    new_cost = cost + c
+                    if new_cost < here[w]:
+                        if here[w] == inf:
+                            touched.append(w)
+                        here[w] = new_cost
+                        heappush(queue, (new_cost, w))
+        return settled
+
+    def _search(self, s, t):
+        # Bidirectional upward Dijkstra into the flat per-side buffers;
+        # returns (cost, meeting node or -1, forward pred, backward pred)
+        self._reset()
+        dist = self._dist
+        touched = self._touched
+        touched[0].append(s)
+        touched[1].append(t)
+        dist[0][s] = 0.0
+        dist[1][t] = 0.0
+        queues = ([(0.0, s)], [(0.0, t)])
+        graphs = (self._up, self._down)
+        # Edges into a node from above, for stall-on-demand: the forward
+        # search reaches u from a higher node x via x->u (listed in
+        # _down[u]), the backward search via u->x (listed in _up[u])
+        stall_graphs = (self._down, self._up)
+        best, meet = (0.0, s) if s == t else (math.inf, -1)
+        count = 0
+        inf = math.inf
+        heappop, heappush = heapq.heappop, heapq.heappush
+
+        while queues[0] or queues[1]:
+            # Always advance the side with the smaller key
+            if not queues[1] or (queues[0] and queues[0][0][0] <= queues[1][0][0]):
+                side = 0
+            else:
+                side = 1
+            queue = queues[side]
+            cost, u = heappop(queue)
+            here = dist[side]
+            if cost >= best:
+                # This side cannot improve on best any more
+                queue.clear()
+                continue
+            if cost > here[u]:
+                continue
+            count += 1
+
+            through = cost + dist[1 - side][u]
+            if through < best:
+                best, meet = through, u
+
+            # A node reached more cheaply from above is not on a shortest
+            # up-path, so its edges need not be relaxed
+            stalled = False
+            for x, c in stall_graphs[side][u]:
+                if here[x] + c < cost:
+                    stalled = True
+                    break
+            if stalled:
+                continue
+
+            here_pred, here_touched = self._pred[side], touched[side]
+            for w, c in graphs[side][u]:
+                new_cost = cost + c
+                if new_cost < here[w]:
+                    if here[w] == inf:
+                        here_touched.append(w)
+                    here[w] = new_cost
+                    here_pred[w] = u
+                    heappush(queue, (new_cost, w))
+
+        self.last_settled = count
+        return best, meet, self._pred[0], self._pred[1]
+
+    def _unpack(self, u, w, path):
+        # Append the original nodes of edge u->w (excluding u) to path
+        middle_of = self._middle_of
+        append = path.append
+        stack = [(u, w)]
+        pop, push = stack.pop, stack.append
+        while stack:
+            a, b = pop()
+            m = middle_of[a][b]
+            if m < 0:
+                append(b)
+            else:
+                push((m, b))
+                push((a, m))
@@ -0,0 +1,164 @@
+# Track geometry kept as line segments instead of pixels
+# Sensor rays and distances are computed analytically against every segment
+# at once, so a track can be any size without a raster to store or probe
+import numpy as np
+
+NEAR_FILTER_SEGMENTS = 64  # Longer tracks drop out-of-range segments before casting
+
+
+def _cross(ax, ay, bx, by):
+    return ax * by - ay * bx
+
+
+class PolylineTrack:
+    """
+    A track line through a list of vertices, of a given drawn width
+
+    The line is treated as the set of points within width / 2 of the
+    polyline (a chain of capsules). pygame.draw.lines only approximates
+    that: it thickens lines horizontally or vertically, so diagonal
+    segments come out thinner, and it leaves notches at the joints.
+    Readings near diagonals and corners therefore differ from a raster by
+    a few pixels, more for grazing rays. Ray casts and projections are vectorized over all
+    segments and broadcast over ray origins, so a batch of robots is
+    sensed in one call. Segments too far from every origin are dropped
+    before the intersection maths, which keeps long tracks cheap.
+
+    Args:
+        points: Sequence of (x, y) vertices; repeat the first one to close the track
+        width: Line width (0 for an infinitely thin line)
+    """
+
+    def __init__(self, points, width=0.0):
+        points = np.asarray(points, dtype=float)
+        if points.ndim != 2 or points.shape[1] != 2 or len(points) < 2:
+            raise ValueError("Need at least two (x, y) points")
+        self.points = points
+        self.radius = width / 2
+        self.ax, self.ay = points[:-1, 0], points[:-1, 1]
+        self.ex, self.ey = points[1:, 0] - self.ax, points[1:, 1] - self.ay
+        self.seg_len2 = self.ex ** 2 + self.ey ** 2
+        if (self.seg_len2 == 0).any():
+            raise ValueError("Track has repeated consecutive points")
+        seg_len = np.sqrt(self.seg_len2)
+        self.arc_start = np.concatenate(([0.0], np.cumsum(seg_len)[:-1]))
+        self.direction = np.arctan2(self.ey, self.ex)
+        self.length = float(seg_len.sum())
+        # Unit normals, for the two long sides of each capsule
+        self.nx, self.ny = -self.ey / seg_len, self.ex / seg_len
+        # Bounding boxes (grown by the radius) for the range filter
+        self.min_x = np.minimum(points[:-1, 0], points[1:, 0]) - self.radius
+        self.max_x = np.maximum(points[:-1, 0], points[1:, 0]) + self.radius
+        self.min_y = np.minimum(points[:-1, 1], points[1:, 1]) - self.radius
+        self.max_y = np.maximum(points[:-1, 1], points[1:, 1]) + self.radius
+        # What the rays are tested against: both long sides of every capsule
+        # (or the segments themselves for a thin line) and the vertex circles
+        if self.radius > 0:
+            offset_x, offset_y = self.nx * self.radius, self.ny * self.radius
+            self._sides = (np.concatenate((self.ax + offset_x, self.ax - offset_x)),
+                           np.concatenate((self.ay + offset_y, self.ay - offset_y)),
+                           np.concatenate((self.ex, self.ex)), np.concatenate((self.ey, self.ey)))
+        else:
+            self._sides = (self.ax, self.ay, self.ex, self.ey)
+        self._caps = (points[:, 0], points[:, 1])
+
+    @property
+    def bounds(self):
+        # (min_x, min_y, max_x, max_y) of the drawn track
+        return self.min_x.min(), self.min_y.min(), self.max_x.max(), self.max_y.max()
+
+    def _near(self, x, y, reach):
+        # Indices of the segments whose box comes within reach of any origin
+        x, y = np.ravel(x), np.ravel(y)
+        near = ((self.min_x <= x.max() + reach) & (self.max_x >= x.min() - reach)
+                & (self.min_y <= y.max() + reach) & (self.max_y >= y.min() - reach))
+        return np.flatnonzero(near)
+
+    def project(self, x, y, signed=False):
+        """
+        Nearest point of the centre line to each position
+
+        Args:
+            x, y: Positions (scalars or arrays)
+            signed: Give the distance a sign: positive on the side the
+                track turns to when going along it with positive angles
+                (the right in screen coordinates, y pointing down)
+
+        Returns:
+            (distance to the centre line, arc length along the track and
+            track direction in radians at the nearest point), each with the
+            broadcast shape of x and y
+        """
+        x = np.asarray(x, dtype=float)[..., None]
+        y = np.asarray(y, dtype=float)[..., None]
+        t = ((x - self.ax) * self.ex + (y - self.ay) * self.ey) / self.seg_len2
+        t = np.clip(t, 0.0, 1.0)
+        dx = self.ax + t * self.ex - x
+        dy = self.ay + t * self.ey - y
+        d2 = dx * dx + dy * dy
+        i = d2.argmin(axis=-1)[..., None]
+        nearest_t = np.take_along_axis(t, i, axis=-1)[..., 0]
+        distance = np.sqrt(np.take_along_axis(d2, i, axis=-1)[..., 0])
+        i = i[..., 0]
+        if signed:
+            side = _cross(self.ex[i], self.ey[i], x[..., 0] - self.ax[i], y[..., 0] - self.ay[i])
+            distance = np.where(side < 0, -distance, distance)
+        return distance, self.arc_start[i] + nearest_t * np.sqrt(self.seg_len2[i]), self.direction[i]
+
+    def wall_distance(self, x, y):
+        # Distance from each position to the edge of the drawn line (0 on it)
+        return np.maximum(self.project(x, y)[0] - self.radius, 0.0)
+
+    def cast_rays(self, x, y, angles, max_distance=np.inf):
+        """
+        Exact distance along each ray to the drawn line
+
+        Same role as ray_sensor.cast_rays on a wall mask, but continuous:
+        a ray starting on the line reads 0, one that meets nothing within
+        max_distance reads max_distance.
+
+        Args:
+            x, y: Ray origins (scalars or arrays)
+            angles: Ray directions in radians, broadcasting with x and y
+            max_distance: Sensor range
+
+        Returns:
+            Float distances with the broadcast shape of x, y and angles
+        """
+        x, y, angles = (np.asarray(a, dtype=float) for a in (x, y, angles))
+        shape = np.broadcast_shapes(x.shape, y.shape, angles.shape)
+        r = self.radius
+        sides_x, sides_y, side_ex, side_ey = self._sides
+        caps_x, caps_y = self._caps
+        ax, ay, ex, ey, seg_len2 = self.ax, self.ay, self.ex, self.ey, self.seg_len2
+        if np.isfinite(max_distance) and len(ax) > NEAR_FILTER_SEGMENTS:
+            segments = self._near(x, y, max_distance)
+            if len(segments) == 0:
+                return np.full(shape, float(max_distance))
+            ax, ay, ex, ey, seg_len2 = ax[segments], ay[segments], ex[segments], ey[segments], seg_len2[segments]
+            sides = np.concatenate((segments, segments + len(self.ax))) if r > 0 else segments
+            sides_x, sides_y, side_ex, side_ey = sides_x[sides], sides_y[sides], side_ex[sides], side_ey[sides]
+            caps = np.union1d(segments, segments + 1)
+            caps_x, caps_y = caps_x[caps], caps_y[caps]
+
+        # (..., segments) arrays: rays along the leading axes, segments along the last
+        ox, oy = x[..., None], y[..., None]
+        dx, dy = np.cos(angles)[..., None], np.sin(angles)[..., None]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sx, sy = sides_x - ox, sides_y - oy
+            denom = _cross(dx, dy, side_ex, side_ey)
+            t = _cross(sx, sy, side_ex, side_ey) / denom
+            u = _cross(sx, sy, dx, dy) / denom
+            nearest = np.where((t >= 0) & (u >= 0) & (u <= 1), t, np.inf).min(axis=-1)
+            if r > 0:
+                # Round caps and joints: circles of radius r around every vertex
+                fx, fy = ox - caps_x, oy - caps_y
+                b = fx * dx + fy * dy
+                disc = b * b - (fx * fx + fy * fy - r * r)
+                t = -b - np.sqrt(disc)
+                nearest = np.minimum(nearest, np.where((disc >= 0) & (t >= 0), t, np.inf).min(axis=-1))
+                # Origins already on the line read 0
+                t = np.clip(((ox - ax) * ex + (oy - ay) * ey) / seg_len2, 0.0, 1.0)
+                inside = ((ax + t * ex - ox) ** 2 + (ay + t * ey - oy) ** 2 <= r * r).any(axis=-1)
+                nearest = np.where(inside, 0.0, nearest)
+        return np.minimum(nearest, max_distance)
@@ -0,0 +1,336 @@
+# Compact track graph for RFID-station routing (used by graph-track.py)
+import hashlib
+import heapq
+import math
+
+import numpy as np
+
+
+class TrackGraph:
+    """
+    Track graph compiled into integer-indexed CSR arrays
+
+    Nodes keep their original ids (RFID station numbers) for input and
+    output, internally they are indices 0..n-1. Edge i of node u is
+    indices[indptr[u] + i] with cost weights[indptr[u] + i]. Weights are
+    stored as floats; weight_type (int when every input weight was an
+    int) is used to hand weights and route costs back in their original
+    type.
+    """
+
+    def __init__(self, node_ids, coords, edges, directed=False, weight_type=float):
+        self.node_ids = list(node_ids)
+        self.weight_type = weight_type
+        self.index = {node: i for i, node in enumerate(self.node_ids)}
+        if len(self.index) != len(self.node_ids):
+            raise ValueError("Duplicate node ids in track graph")
+        self.coords = np.asarray(coords, dtype=float).reshape(len(self.node_ids), 2)
+        self.directed = directed
+
+        edges = np.asarray(edges, dtype=float).reshape(-1, 3)
+        src = edges[:, 0].astype(np.int64)
+        dst = edges[:, 1].astype(np.int64)
+        weight = edges[:, 2]
+        if len(weight) and weight.min() < 0:
+            raise ValueError("Track graph edge weights must be non-negative")
+        if not directed:
+            src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+            weight = np.concatenate([weight, weight])
+        self._compile(src, dst, weight)
+
+    @classmethod
+    def from_lists(cls, nodes, edges, directed=False):
+        # nodes: [node_id, x, y], edges: [node1, node2, weight] (INPUT_NODES / INPUT_EDGES format)
+        node_ids = [node[0] for node in nodes]
+        index = {node: i for i, node in enumerate(node_ids)}
+        coords = [(float(node[1]), float(node[2])) for node in nodes]
+        try:
+            compiled = [(index[u], index[v], float(w)) for u, v, w in edges]
+        except KeyError as e:
+            raise ValueError(f"Edge references unknown node {e.args[0]}") from None
+        integral = all(isinstance(w, (int, np.integer)) and not isinstance(w, bool) for _, _, w in edges)
+        return cls(node_ids, coords, compiled, directed, int if integral else float)
+
+    def _compile(self, src, dst, weight):
+        n = len(self.node_ids)
+        order = np.argsort(src, kind="stable")
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.indices = dst[order].astype(np.int32)
+        self.weights = weight[order].astype(float)
+
+        # Plain lists are much faster than NumPy scalars inside the search loop
+        self._indptr = self.indptr.tolist()
+        self._indices = self.indices.tolist()
+        self._weights = self.weights.tolist()
+
+        # Search buffers, allocated once and reset only where a search touched them
+        self._dist = [math.inf] * n
+        self._pred = [-1] * n
+        self._touched = []
+        self.last_expanded = 0  # Nodes settled by the most recent search
+        self.version = 0  # Bumped on every edge change
+
+        self._xs = self.coords[:, 0].tolist()
+        self._ys = self.coords[:, 1].tolist()
+        self._heuristic_scale = None
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        # Undirected edges are stored in both directions
+        return len(self._indices) if self.directed else len(self._indices) // 2
+
+    def neighbors(self, node):
+        # (neighbour id, weight) pairs of a node id
+        u = self.index[node]
+        lo, hi = self._indptr[u], self._indptr[u + 1]
+        return [(self.node_ids[v], w) for v, w in zip(self._indices[lo:hi], self._weights[lo:hi])]
+
+    def _edge_slots(self, u, v):
+        # CSR positions of the stored edge(s) u->v, by node index
+        lo, hi = self._indptr[u], self._indptr[u + 1]
+        return [i for i in range(lo, hi) if self._indices[i] == v]
+
+    def edge_weight(self, node1, node2):
+        slots = self._edge_slots(self._lookup(node1), self._lookup(node2))
+        if not slots:
+            raise ValueError(f"No edge between {node1} and {node2}")
+        return min(self._weights[i] for i in slots)
+
+    def set_edge_weight(self, node1, node2, weight):
+        """
+        Change the weight of an existing edge (both directions if undirected)
+
+        A weight of float('inf') closes the edge, e.g. for a flooded lane.
+        """
+        if weight < 0:
+            raise ValueError("Track graph edge weights must be non-negative")
+        u, v = self._lookup(node1), self._lookup(node2)
+        slots = self._edge_slots(u, v)
+        if not self.directed:
+            slots += self._edge_slots(v, u)
+        if not slots:
+            raise ValueError(f"No edge between {node1} and {node2}")
+        for i in slots:
+            self._weights[i] = weight
+            self.weights[i] = weight
+        self._heuristic_scale = None
+        self.version += 1
+
+    def close_edge(self, node1, node2):
+        self.set_edge_weight(node1, node2, math.inf)
+
+    def _reset(self):
+        dist, pred = self._dist, self._pred
+        for v in self._touched:
+            dist[v] = math.inf
+            pred[v] = -1
+        self._touched = []
+
+    def dijkstra(self, source, target=None, targets=None):
+        """
+        Run Dijkstra from node index source into the shared buffers
+
+        Stops as soon as target (an index) is settled, or every index in
+        targets is. Returns the cost to target, or inf if it cannot be
+        reached (None without a target). Afterwards _dist/_pred hold the
+        search tree until the next search.
+        """
+        self._reset()
+        dist, pred, touched = self._dist, self._pred, self._touched
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+
+        dist[source] = 0.0
+        touched.append(source)
+        queue = [(0.0, source)]
+        remaining = set(targets) if targets is not None else None
+        expanded = 0
+        while queue:
+            cost, u = heapq.heappop(queue)
+            if cost > dist[u]:
+                continue
+            expanded += 1
+            if u == target:
+                self.last_expanded = expanded
+                return cost
+            if remaining is not None:
+                remaining.discard(u)
+                if not remaining:
+                    break
+            for i in range(indptr[u], indptr[u + 1]):
+                v = indices[i]
+                new_cost = cost + weights[i]
+                if new_cost < dist[v]:
+                    if dist[v] == math.inf:
+                        touched.append(v)
+                    dist[v] = new_cost
+                    pred[v] = u
+                    heapq.heappush(queue, (new_cost, v))
+        self.last_expanded = expanded
+        return math.inf if target is not None else None
+
+    @property
+    def heuristic_scale(self):
+        # Smallest cost per unit of straight-line distance over all edges.
+        # No route can be cheaper than this times the distance to go, so
+        # scale * distance is an admissible (and consistent) A* heuristic.
+        if self._heuristic_scale is None:
+            src = np.repeat(np.arange(len(self.node_ids)), np.diff(self.indptr))
+            lengths = np.hypot(*(self.coords[self.indices] - self.coords[src]).T)
+            moving = lengths > 0
+            if moving.any():
+                self._heuristic_scale = float((self.weights[moving] / lengths[moving]).min())
+            else:
+                self._heuristic_scale = 0.0
+        return self._heuristic_scale
+
+    def astar(self, source, target):
+        """
+        A* from node index source to node index target into the shared buffers
+
+        Same contract as dijkstra() with a target, but nodes are expanded
+        in order of cost so far plus heuristic_scale times the straight-line
+        distance to target, so far fewer nodes are settled on long routes.
+        """
+        self._reset()
+        dist, pred, touched = self._dist, self._pred, self._touched
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        xs, ys = self._xs, self._ys
+        tx, ty = xs[target], ys[target]
+        scale = self.heuristic_scale
+        hypot = math.hypot
+
+        dist[source] = 0.0
+        touched.append(source)
+        # Entries are (f, -cost, node): among equal f the deeper node, the
+        # one closer to target, is expanded first, so a route whose nodes
+        # all tie on f (straight runs on a lattice) does not fan out
+        queue = [(scale * hypot(xs[source] - tx, ys[source] - ty), -0.0, source)]
+        expanded = 0
+        while queue:
+            _, cost, u = heapq.heappop(queue)
+            cost = -cost
+            if cost > dist[u]:
+                continue
+            expanded += 1
+            if u == target:
+                self.last_expanded = expanded
+                return cost
+            for i in range(indptr[u], indptr[u + 1]):
+                v = indices[i]
+                new_cost = cost + weights[i]
+                if new_cost < dist[v]:
+                    if dist[v] == math.inf:
+                        touched.append(v)
+                    dist[v] = new_cost
+                    pred[v] = u
+                    h = scale * hypot(xs[v] - tx, ys[v] - ty)
+                    heapq.heappush(queue, (new_cost + h, -new_cost, v))
+        self.last_expanded = expanded
+        return math.inf
+
+    def _path_to(self, target):
+        # Walk the predecessor buffer back from target (node indices)
+        if self._dist[target] == math.inf:
+            return []
+        path = []
+        while target != -1:
+            path.append(target)
+            target = self._pred[target]
+        path.reverse()
+        return path
+
+    def shortest_path(self, start, end, method="dijkstra"):
+        """
+        Shortest path between two node ids
+
+        Args:
+            start: Start node id
+            end: End node id
+            method: "dijkstra" or "astar" (same result, fewer expansions);
+                the number of expanded nodes is left in last_expanded
+
+        Returns:
+            (path, cost): list of node ids and total weight, or ([], inf)
+            if end cannot be reached from start
+        """
+        s, t = self._lookup(start), self._lookup(end)
+        if method == "astar":
+            cost = self.astar(s, t)
+        elif method == "dijkstra":
+            cost = self.dijkstra(s, t)
+        else:
+            raise ValueError(f"Unknown routing method: {method}")
+        return [self.node_ids[i] for i in self._path_to(t)], self.weight_value(cost)
+
+    def distances_from(self, start):
+        # Costs from start to every node as an array (inf where unreachable)
+        self.dijkstra(self._lookup(start))
+        return np.array(self._dist)
+
+    def weight_value(self, cost):
+        # A weight or route cost in the input weight type (inf stays inf)
+        if self.weight_type is int and math.isfinite(cost):
+            return int(cost)
+        return cost
+
+    def _lookup(self, node):
+        try:
+            return self.index[node]
+        except KeyError:
+            raise ValueError(f"Unknown node {node}") from None
+
+    def to_dict(self):
+        # Legacy {node: {'coords': (x, y), 'edges': {neighbour: weight}}} form used for drawing
+        graph = {}
+        for u, node in enumerate(self.node_ids):
+            edges = {}
+            for i in range(self._indptr[u], self._indptr[u + 1]):
+                edges[self.node_ids[self._indices[i]]] = self.weight_value(self._weights[i])
+            graph[node] = {'coords': tuple(self.coords[u]), 'edges': edges}
+        return graph
+
+    def fingerprint(self):
+        # Content hash of the compiled graph, to tell whether derived data is stale
+        digest = hashlib.sha1()
+        for array in (np.asarray(self.node_ids), self.coords, self.indptr, self.indices, self.weights):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        digest.update(b"directed" if self.directed else b"undirected")
+        return digest.hexdigest()
+
+    def save(self, filename):
+        # Store the compiled arrays so large graphs load without rebuilding
+        np.savez(filename, node_ids=np.asarray(self.node_ids), coords=self.coords,
+                 indptr=self.indptr, indices=self.indices, weights=self.weights,
+                 directed=self.directed, integer_weights=self.weight_type is int)
+
+    @classmethod
+    def load(cls, filename):
+        data = np.load(filename)
+        graph = cls.__new__(cls)
+        graph.node_ids = data['node_ids'].tolist()
+        graph.index = {node: i for i, node in enumerate(graph.node_ids)}
+        graph.coords = data['coords']
+        graph.directed = bool(data['directed'])
+        graph.weight_type = int if 'integer_weights' in data and data['integer_weights'] else float
+        n = len(graph.node_ids)
+        indptr = data['indptr']
+        src = np.repeat(np.arange(n), np.diff(indptr))
+        graph._compile(src, data['indices'].astype(np.int64), data['weights'])
+        return graph
+
+
+def lattice_graph(rows, cols, spacing=1.0, weight=1.0):
+    # Grid of RFID stations joined to their 4 neighbours, for testing at scale
+    ids = np.arange(rows * cols)
+    ys, xs = np.divmod(ids, cols)
+    coords = np.column_stack([xs * spacing, ys * spacing])
+    right = ids[xs < cols - 1]
+    down = ids[ys < rows - 1]
+    src = np.concatenate([right, down])
+    dst = np.concatenate([right + 1, down + cols])
+    edges = np.column_stack([src, dst, np.full(len(src), weight)])
+    return TrackGraph(ids.tolist(), coords, edges)
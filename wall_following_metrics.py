@@ -0,0 +1,205 @@
+# Lap and tracking-error metrics for the wall follower
+# Updated incrementally every step with bounded memory, optionally streamed
+# to a CSV or compact binary log for tuning and regression runs
+import csv
+import math
+
+import numpy as np
+
+# One record per robot per logged step (28 bytes)
+LOG_DTYPE = np.dtype([
+    ("step", "<u4"),
+    ("robot", "<u2"),
+    ("lap", "<u2"),
+    ("x", "<f4"),
+    ("y", "<f4"),
+    ("cross_track", "<f4"),    # Signed distance to the centre line (px, positive to the right)
+    ("progress", "<f4"),       # Signed distance travelled along the track (px)
+    ("heading_error", "<f4"),  # Heading minus the track direction of travel (rad)
+])
+
+LOST_DISTANCE = 120  # Cross-track distance (px) from which a robot no longer follows the track
+
+
+class MetricsLog:
+    """
+    Streams metric records to disk with a fixed-size buffer
+
+    A path ending in .csv gives a CSV file with a header row, anything
+    else raw little-endian LOG_DTYPE records (read back with read_log).
+    Records are collected in a preallocated buffer and written out when
+    it fills, so memory stays constant however long the run.
+
+    Args:
+        path: Output file
+        every: Log every N-th step
+        buffer_rows: Records held before a write
+    """
+
+    def __init__(self, path, every=1, buffer_rows=4096):
+        self.path = path
+        self.every = max(1, every)
+        self.rows_written = 0
+        self._buffer = np.zeros(buffer_rows, dtype=LOG_DTYPE)
+        self._count = 0
+        self._csv = path.lower().endswith(".csv")
+        self._file = open(path, "w", newline="") if self._csv else open(path, "wb")
+        if self._csv:
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(LOG_DTYPE.names)
+
+    def write(self, step, **fields):
+        # One record per robot; fields are scalars or arrays over the robots
+        if step % self.every:
+            return
+        n = max(np.size(value) for value in fields.values())
+        if self._count + n > len(self._buffer):
+            self.flush()
+            if n > len(self._buffer):
+                self._buffer = np.zeros(n, dtype=LOG_DTYPE)
+        rows = self._buffer[self._count:self._count + n]
+        rows["step"] = step
+        rows["robot"] = np.arange(n)
+        for name, value in fields.items():
+            rows[name] = np.ravel(value)
+        self._count += n
+
+    def flush(self):
+        rows = self._buffer[:self._count]
+        if self._csv:
+            self._writer.writerows(rows.tolist())
+        else:
+            rows.tofile(self._file)
+        self.rows_written += self._count
+        self._count = 0
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def read_log(path):
+    # Records of a MetricsLog file as a LOG_DTYPE structured array
+    if path.lower().endswith(".csv"):
+        return np.atleast_1d(np.genfromtxt(path, delimiter=",", names=True, dtype=LOG_DTYPE))
+    return np.fromfile(path, dtype=LOG_DTYPE)
+
+
+class TrackMetrics:
+    """
+    Tracking metrics of one or more robots on a closed track
+
+    Each update() projects the poses onto the track centre line and
+    updates cross-track error, progress along the track (unwrapped across
+    laps, negative when driving the other way round), heading error
+    against the track direction of travel, and lap times. Only running
+    sums and extremes are kept, so memory does not grow with the run.
+
+    A pose further than lost_distance from the centre line projects onto
+    it all the same, so such steps earn no progress and no laps (cutting
+    across the infield gains nothing). The robot is flagged as lost from
+    the first of them on; off_track tells whether it is off at the moment.
+
+    Args:
+        track: Closed PolylineTrack (last point equal to the first)
+        dt: Simulated time per step (s)
+        x, y: Start positions; progress counts from their projections
+        log: Optional MetricsLog the per-step values are written to
+        lost_distance: Cross-track distance (px) beyond which a robot is off the track
+    """
+
+    def __init__(self, track, dt, x, y, log=None, lost_distance=LOST_DISTANCE):
+        self.track = track
+        self.dt = dt
+        self.log = log
+        self.lost_distance = lost_distance
+        _, self._prev_arc, _ = track.project(x, y)
+        shape = np.shape(self._prev_arc)
+        self.steps = 0
+        self.cross_track = np.zeros(shape)
+        self.heading_error = np.zeros(shape)
+        self.direction = np.zeros(shape)
+        self.progress = np.zeros(shape)
+        self.laps = np.zeros(shape, dtype=int)
+        self.off_track = np.zeros(shape, dtype=bool)
+        self.lost = np.zeros(shape, dtype=bool)
+        self.off_track_steps = np.zeros(shape, dtype=int)
+        self.last_lap_time = np.full(shape, np.nan)
+        self.best_lap_time = np.full(shape, np.inf)
+        self._lap_start = np.zeros(shape)
+        self._sum_squared_cross = np.zeros(shape)
+        self._max_cross = np.zeros(shape)
+        self._sum_abs_heading = np.zeros(shape)
+
+    @property
+    def time(self):
+        return self.steps * self.dt
+
+    def update(self, x, y, angle):
+        # Call once per simulation step with the new poses
+        length = self.track.length
+        self.cross_track, arc, self.direction = self.track.project(x, y, signed=True)
+        # Arc length jumps by about one track length at the start line
+        delta = (arc - self._prev_arc + length / 2) % length - length / 2
+        self._prev_arc = arc
+        # Off the track the projection means nothing (it can jump across the
+        # loop), so those steps earn no progress
+        self.off_track = np.abs(self.cross_track) > self.lost_distance
+        self.lost = self.lost | self.off_track
+        self.off_track_steps = self.off_track_steps + self.off_track
+        self.progress = self.progress + np.where(self.off_track, 0.0, delta)
+        self.steps += 1
+
+        travel = np.where(self.progress < 0, self.direction + math.pi, self.direction)
+        self.heading_error = (angle - travel + math.pi) % (2 * math.pi) - math.pi
+
+        laps = (np.abs(self.progress) // length).astype(int)
+        new_lap = laps > self.laps
+        if new_lap.any():
+            now = self.time
+            lap_time = np.where(new_lap, now - self._lap_start, self.last_lap_time)
+            self.last_lap_time = lap_time
+            self.best_lap_time = np.where(new_lap, np.minimum(self.best_lap_time, lap_time), self.best_lap_time)
+            self._lap_start = np.where(new_lap, now, self._lap_start)
+        self.laps = np.maximum(self.laps, laps)
+
+        abs_cross = np.abs(self.cross_track)
+        self._sum_squared_cross += abs_cross ** 2
+        self._max_cross = np.maximum(self._max_cross, abs_cross)
+        self._sum_abs_heading += np.abs(self.heading_error)
+
+        if self.log is not None:
+            self.log.write(self.steps, lap=self.laps, x=x, y=y, cross_track=self.cross_track,
+                           progress=self.progress, heading_error=self.heading_error)
+
+    def summary(self):
+        """
+        Metrics of the run so far
+
+        Returns:
+            Dict of 'steps', 'time', 'laps' (fraction), 'progress' (px),
+            'rms_cross_track' and 'max_cross_track' (px),
+            'mean_abs_heading_error' (rad), 'last_lap_time' and
+            'best_lap_time' (s, nan / inf before the first lap), 'lost'
+            (ever beyond lost_distance) and 'off_track_time' (s). Floats and
+            bools for one robot, arrays for several.
+        """
+        steps = max(1, self.steps)
+        values = {
+            "laps": np.abs(self.progress) / self.track.length,
+            "progress": self.progress,
+            "rms_cross_track": np.sqrt(self._sum_squared_cross / steps),
+            "max_cross_track": self._max_cross,
+            "mean_abs_heading_error": self._sum_abs_heading / steps,
+            "last_lap_time": self.last_lap_time,
+            "best_lap_time": self.best_lap_time,
+            "off_track_time": self.off_track_steps * self.dt,
+        }
+        if np.ndim(self.progress) == 0:
+            values = {name: float(value) for name, value in values.items()}
+            values["lost"] = bool(self.lost)
+        else:
+            values = {name: np.array(value) for name, value in values.items()}
+            values["lost"] = self.lost.copy()
+        return {"steps": self.steps, "time": self.time, **values}
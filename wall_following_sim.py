@@ -0,0 +1,175 @@
+# Wall following simulation with a fixed time step
+# The robot, sensors and PID of Wall_Following.py without the window, so it
+# can be stepped headless, reproducibly and much faster than real time
+#
+# Speed goal: thousands of simulated robot-seconds per second of wall time,
+# reached as batch throughput. A step costs a few dozen NumPy calls however
+# many robots it moves, so one robot runs at only about 150-250x real time,
+# while a batch of 100 to 1000 robots (gain arrays, see WallFollowingSim)
+# gives about 5000-6000 robot-seconds per second. Run many gain sets as one
+# batch rather than many single-robot simulations.
+import math
+import os
+import sys
+
+import numpy as np
+import pygame
+
+from pid import PID
+from ray_sensor import cast_rays, wall_mask
+from track_geometry import PolylineTrack
+
+# occupancy_map is shared with the pygame simulation in robot-maze-simulation/src
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "robot-maze-simulation", "src"))
+from occupancy_map import OccupancyMap  # noqa: E402
+
+# Track setup
+WIDTH, HEIGHT = 1000, 600
+track_path = [
+    (200, 150), (800, 150),
+    (800, 200), (850, 300), (800, 400),
+    (800, 450), (200, 450),
+    (200, 400), (150, 300), (200, 200),
+    (200, 150)
+]
+TRACK_WIDTH = 10
+
+# Robot setup
+FPS = 60
+START = (210, 300)
+speed = 2 * FPS  # px/s (the script drove 2 px per 60 Hz frame)
+min_speed = 0.5 * FPS  # px/s, floor of the slow-down near a wall ahead
+sensor_side_distance = 30  # jarak sensor samping
+sensor_front_distance = 40
+SENSOR_RANGE = 60
+SENSOR_ANGLES = np.array([math.pi / 2, -math.pi / 2, 0.0])  # Left, right, front relative to the heading
+
+# PID parameters
+Kp = 0.008
+Ki = 0.0001
+Kd = 0.002
+
+
+def build_track():
+    # The track as drawn on screen: black line on white
+    track = pygame.Surface((WIDTH, HEIGHT))
+    track.fill((255, 255, 255))  # background putih
+    pygame.draw.lines(track, (0, 0, 0), False, track_path, TRACK_WIDTH)
+    return track
+
+
+def build_track_map():
+    # The drawn track as an OccupancyMap, the map container of the maze
+    # simulations. The track is a thick polyline rather than rectangles,
+    # so its grid comes from the pygame drawing instead of from_walls.
+    return OccupancyMap(wall_mask(build_track()).T, metadata={"kind": "wall_following"})
+
+
+def build_wall_mask():
+    # Track as a [x, y] boolean array of wall pixels, C-contiguous for cast_rays
+    return np.ascontiguousarray(build_track_map().grid.T)
+
+
+def build_track_geometry():
+    # Track as line segments, for exact sensing without a raster
+    return PolylineTrack(track_path, TRACK_WIDTH)
+
+
+class WallFollowingSim:
+    """
+    Wall following robot(s) stepped with a fixed simulated dt
+
+    The PID sees the same dt every step whatever the frame rate, so a
+    run is reproducible and can go as fast as the machine allows. Motion
+    follows dt as well: the robot drives at speed px/s, and the steering
+    correction (tuned per 60 Hz frame in the script) is applied as a turn
+    rate, so a smaller dt refines the same trajectory. Gains
+    may be arrays: then there is one robot per gain set, all sensed and
+    stepped together, which is the fastest way to run many of them.
+
+    Args:
+        Kp, Ki, Kd: PID gains (scalars, or arrays for a batch of robots)
+        dt: Simulated time per step (s)
+        start: Start position (x, y)
+        start_angle: Initial heading (radians)
+        wall: Wall mask to drive on (default: the track of the script)
+        track: PolylineTrack to sense analytically instead of a wall mask
+            (float distances, any track size)
+    """
+
+    def __init__(self, Kp=Kp, Ki=Ki, Kd=Kd, dt=1 / FPS, start=START, start_angle=0.0, wall=None, track=None):
+        self.track = track
+        if track is None:
+            self.wall = build_wall_mask() if wall is None else wall
+        else:
+            self.wall = None
+        self.dt = dt
+        # prev_error starts at 0 like the script's controller
+        self.pid = PID(Kp, Ki, Kd, dt=dt, initial_error=0.0)
+        shape = self.pid.shape
+        self.x = np.full(shape, float(start[0]))
+        self.y = np.full(shape, float(start[1]))
+        self.angle = np.full(shape, float(start_angle))
+        self.left_dist = self.right_dist = self.front_dist = np.zeros(shape)
+        self.steps = 0
+
+    @property
+    def time(self):
+        return self.steps * self.dt
+
+    def cast(self, x, y, angles, max_distance=SENSOR_RANGE):
+        # Ray distances on the wall mask, or exact ones on the track geometry
+        if self.track is not None:
+            return self.track.cast_rays(x, y, angles, max_distance)
+        return cast_rays(self.wall, x, y, angles, max_distance)
+
+    def sense(self):
+        # Left, right and front distances of every robot, cast in one call
+        distances = self.cast(self.x[..., None], self.y[..., None], self.angle[..., None] + SENSOR_ANGLES)
+        return distances[..., 0], distances[..., 1], distances[..., 2]
+
+    def step(self):
+        # Sense at the current pose, correct the heading and drive one step
+        self.left_dist, self.right_dist, self.front_dist = self.sense()
+
+        # PID control for angle correction based on side distance error
+        correction = self.pid.update(self.left_dist, self.right_dist)
+
+        # Safety check front sensor: slow down proportionally if too close
+        front = self.front_dist
+        current_speed = np.where(front < 20, np.maximum(min_speed, speed * (front / 20)), speed)
+
+        self.angle = self.angle - correction * (self.dt * FPS)
+        self.x = self.x + current_speed * self.dt * np.cos(self.angle)
+        self.y = self.y + current_speed * self.dt * np.sin(self.angle)
+        self.steps += 1
+
+    def run(self, steps, callback=None):
+        """
+        Advance a number of steps headless
+
+        Args:
+            steps: Number of dt steps
+            callback: Optional function called with the sim after every step;
+                returning True stops the run early
+
+        Returns:
+            state() after the last step
+        """
+        for _ in range(steps):
+            self.step()
+            if callback is not None and callback(self):
+                break
+        return self.state()
+
+    def state(self):
+        # Snapshot of the pose and last readings (floats for one robot, arrays for a batch)
+        values = {"x": self.x, "y": self.y, "angle": self.angle, "left_dist": self.left_dist,
+                  "right_dist": self.right_dist, "front_dist": self.front_dist}
+        if self.pid.shape == ():
+            values = {name: value.item() for name, value in values.items()}
+        else:
+            values = {name: value.copy() for name, value in values.items()}
+        values["steps"] = self.steps
+        values["time"] = self.time
+        return values
@@ -0,0 +1,282 @@
+# Headless, parallel PID gain tuner for Wall_Following.py
+# Runs wall_following_sim (the script's robot, sensors and PID at a fixed
+# dt) on the track_path course and searches the gains with CMA-ES
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+from wall_following_sim import (FPS, HEIGHT, START, TRACK_WIDTH, WIDTH, WallFollowingSim,  # noqa: E402
+                                build_track_geometry, build_wall_mask)
+from wall_following_metrics import TrackMetrics  # noqa: E402
+
+# Scoring. The side sensors balance (left_dist == right_dist) with the track
+# line between them, so the controller follows the line itself.
+TARGET_OFFSET = 0        # Distance from the track line the robot should keep (px)
+COLLISION_ANGLE = math.radians(45)  # Reaching the line steeper than this is a collision
+STALL_STEPS = 300        # Window for the progress check
+STALL_PROGRESS = 50      # Minimum progress (px) within that window
+LAP_PENALTY = 1000.0     # Cost of a missing lap
+COLLISION_PENALTY = 1000.0
+
+GAIN_NAMES = ("Kp", "Ki", "Kd")
+SCRIPT_GAINS = (0.008, 0.0001, 0.002)
+
+
+class Course:
+    """
+    Wall pixels and the track centre line, for sensing and scoring
+
+    Scoring uses TrackMetrics on the centre line geometry: distance to
+    the line (cross-track error), progress along it and the local track
+    direction.
+    """
+
+    def __init__(self):
+        self.wall = build_wall_mask()
+        self.geometry = build_track_geometry()
+        self.length = self.geometry.length
+
+
+_course = None
+
+
+def _get_course():
+    # One Course per process, built on first use
+    global _course
+    if _course is None:
+        _course = Course()
+    return _course
+
+
+def evaluate(gains, laps=2, max_steps=5000, start_angle=-math.pi / 2, dt=1 / FPS):
+    """
+    Drive the course with one gain set and score the run
+
+    Crossing the line while running along it is how the controller
+    follows it; reaching it at more than COLLISION_ANGLE to the track is a
+    collision. The run stops early on a collision, when the robot loses
+    the line or leaves the screen, or when it stops making progress, so
+    failing candidates cost little time.
+
+    Returns:
+        Dict with 'cost' (lower is better), 'laps' completed (fraction),
+        'rms_error' (px from TARGET_OFFSET), 'collided', 'reason' and
+        'steps'
+    """
+    Kp, Ki, Kd = gains
+    course = _get_course()
+    sim = WallFollowingSim(Kp, Ki, Kd, dt, START, start_angle, course.wall)
+    metrics = TrackMetrics(course.geometry, dt, *START)
+    history = [0.0]
+    squared_error = 0.0
+    collided = False
+    reason = "max_steps"
+    goal = laps * course.length
+
+    step = 0
+    while step < max_steps:
+        sim.step()
+        x, y, angle = sim.x.item(), sim.y.item(), sim.angle.item()
+        step += 1
+
+        metrics.update(x, y, angle)
+        wall_distance = abs(metrics.cross_track.item())
+        progress = metrics.progress.item()
+        direction = metrics.direction.item()
+        squared_error += (wall_distance - TARGET_OFFSET) ** 2
+        history.append(abs(progress))
+
+        if wall_distance < TRACK_WIDTH / 2:
+            # Angle between the heading and the track line, either way along it
+            crossing = abs((angle - direction + math.pi / 2) % math.pi - math.pi / 2)
+            if crossing > COLLISION_ANGLE:
+                collided, reason = True, "collision"
+                break
+        if metrics.lost.item() or not (0 <= x < WIDTH and 0 <= y < HEIGHT):
+            reason = "lost"
+            break
+        if abs(progress) >= goal:
+            reason = "done"
+            break
+        if step >= STALL_STEPS and history[-1] - history[-1 - STALL_STEPS] < STALL_PROGRESS:
+            reason = "stalled"
+            break
+
+    completed = min(abs(progress) / course.length, laps)
+    rms_error = math.sqrt(squared_error / max(1, step))
+    cost = rms_error + LAP_PENALTY * (laps - completed) + COLLISION_PENALTY * collided
+    return {"cost": cost, "laps": completed, "rms_error": rms_error, "collided": collided,
+            "reason": reason, "steps": step}
+
+
+def _evaluate_job(args):
+    # One (gains, options) pair from the process pool
+    gains, options = args
+    return evaluate(gains, **options)
+
+
+class CMAES:
+    """
+    Minimal (mu/mu_w, lambda) CMA-ES for a handful of parameters
+
+    ask() returns a population to evaluate (in parallel) and tell() takes
+    their costs; the step size and covariance adapt between generations.
+    """
+
+    def __init__(self, mean, sigma, population=None, seed=None):
+        self.mean = np.asarray(mean, dtype=float)
+        self.sigma = float(sigma)
+        n = len(self.mean)
+        self.n = n
+        self.population = population or 4 + int(3 * math.log(n))
+        self.mu = self.population // 2
+        weights = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = weights / weights.sum()
+        self.mu_eff = 1.0 / (self.weights ** 2).sum()
+
+        self.c_sigma = (self.mu_eff + 2) / (n + self.mu_eff + 5)
+        self.d_sigma = 1 + 2 * max(0.0, math.sqrt((self.mu_eff - 1) / (n + 1)) - 1) + self.c_sigma
+        self.c_c = (4 + self.mu_eff / n) / (n + 4 + 2 * self.mu_eff / n)
+        self.c_1 = 2 / ((n + 1.3) ** 2 + self.mu_eff)
+        self.c_mu = min(1 - self.c_1, 2 * (self.mu_eff - 2 + 1 / self.mu_eff) / ((n + 2) ** 2 + self.mu_eff))
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n * n))
+
+        self.p_sigma = np.zeros(n)
+        self.p_c = np.zeros(n)
+        self.C = np.eye(n)
+        self.B = np.eye(n)
+        self.D = np.ones(n)
+        self.generation = 0
+        self.rng = np.random.default_rng(seed)
+        self._y = None
+
+    def ask(self):
+        z = self.rng.standard_normal((self.population, self.n))
+        self._y = z @ (self.B * self.D).T
+        return self.mean + self.sigma * self._y
+
+    def tell(self, costs):
+        order = np.argsort(costs)[:self.mu]
+        y = self._y[order]
+        y_w = self.weights @ y
+        self.mean = self.mean + self.sigma * y_w
+
+        inv_sqrt_C = self.B @ np.diag(1 / self.D) @ self.B.T
+        self.p_sigma = (1 - self.c_sigma) * self.p_sigma \
+            + math.sqrt(self.c_sigma * (2 - self.c_sigma) * self.mu_eff) * (inv_sqrt_C @ y_w)
+        norm = np.linalg.norm(self.p_sigma)
+        self.generation += 1
+        h_sigma = norm / math.sqrt(1 - (1 - self.c_sigma) ** (2 * self.generation)) \
+            < (1.4 + 2 / (self.n + 1)) * self.chi_n
+        self.p_c = (1 - self.c_c) * self.p_c + h_sigma * math.sqrt(self.c_c * (2 - self.c_c) * self.mu_eff) * y_w
+
+        rank_mu = (self.weights[:, None] * y).T @ y
+        self.C = (1 - self.c_1 - self.c_mu) * self.C \
+            + self.c_1 * (np.outer(self.p_c, self.p_c) + (not h_sigma) * self.c_c * (2 - self.c_c) * self.C) \
+            + self.c_mu * rank_mu
+        self.sigma *= math.exp((self.c_sigma / self.d_sigma) * (norm / self.chi_n - 1))
+
+        self.C = (self.C + self.C.T) / 2
+        eigenvalues, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(eigenvalues, 1e-20))
+
+
+def tune(start=SCRIPT_GAINS, sigma=2.0, generations=40, population=None, workers=None,
+         target_cost=None, seed=None, verbose=True, **options):
+    """
+    Search PID gains with CMA-ES, each generation evaluated across a process pool
+
+    When the search distribution collapses before the generation budget
+    is used up, the search restarts with twice the population (IPOP), which
+    helps on this rugged cost landscape.
+
+    The search runs on the gains divided by the magnitude of the start
+    gains, so gains of very different size are explored evenly. Gains may
+    change sign: with the script's sensor layout the sign decides whether
+    the robot is pulled toward the line or pushed away from it.
+
+    Args:
+        start: Initial (Kp, Ki, Kd)
+        sigma: Initial step size, relative to the start gains
+        generations: Upper bound on generations
+        population: Candidates per generation (default: max(CMA-ES default, workers))
+        workers: Processes in the pool (default: CPU count)
+        target_cost: Stop once a candidate scores below this
+        seed: Random seed for reproducible searches
+        **options: Passed on to evaluate() (laps, max_steps, start_angle)
+
+    Returns:
+        (best gains, best score dict)
+    """
+    workers = workers or os.cpu_count() or 1
+    start = np.asarray(start, dtype=float)
+    scale = np.where(start != 0, np.abs(start), 1e-3)
+    population = population or max(4 + int(3 * math.log(len(start))), workers)
+    es = CMAES(start / scale, sigma, population, seed)
+
+    best_gains, best = tuple(start), evaluate(start, **options)
+    if verbose:
+        print(f"start    {_format(best_gains, best)}")
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for generation in range(generations):
+            candidates = es.ask() * scale
+            scores = list(pool.map(_evaluate_job, [(c, options) for c in candidates]))
+            costs = np.array([s["cost"] for s in scores])
+            es.tell(costs)
+
+            i = int(np.argmin(costs))
+            if costs[i] < best["cost"]:
+                best_gains, best = tuple(candidates[i]), scores[i]
+            if verbose:
+                print(f"gen {generation + 1:3d}  {_format(best_gains, best)}  sigma={es.sigma:.3f}")
+            if target_cost is not None and best["cost"] <= target_cost:
+                break
+            if es.sigma * es.D.max() < 1e-3:
+                # Converged: restart with a larger population
+                es = CMAES(start / scale, sigma, es.population * 2, int(es.rng.integers(2 ** 31)))
+                if verbose:
+                    print(f"restart with population {es.population}")
+    return best_gains, best
+
+
+def _format(gains, score):
+    text = " ".join(f"{name}={value:.5g}" for name, value in zip(GAIN_NAMES, gains))
+    return (f"{text}  cost={score['cost']:.2f} laps={score['laps']:.2f} "
+            f"rms={score['rms_error']:.1f}px {score['reason']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the Wall_Following.py PID gains headless")
+    parser.add_argument("--start", type=float, nargs=3, default=SCRIPT_GAINS, metavar=GAIN_NAMES)
+    parser.add_argument("--sigma", type=float, default=2.0, help="initial search step relative to the start gains")
+    parser.add_argument("--generations", type=int, default=40)
+    parser.add_argument("--population", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--laps", type=int, default=2)
+    parser.add_argument("--max-steps", type=int, default=5000)
+    parser.add_argument("--start-angle", type=float, default=-90,
+                        help="initial heading in degrees (the script's 0 drives straight at the far wall)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", help="write the tuned gains to this JSON file")
+    args = parser.parse_args()
+
+    start_time = time.perf_counter()
+    gains, score = tune(args.start, args.sigma, args.generations, args.population, args.workers,
+                        seed=args.seed, laps=args.laps, max_steps=args.max_steps,
+                        start_angle=math.radians(args.start_angle))
+    print(f"\nBest: {_format(gains, score)}  ({time.perf_counter() - start_time:.1f} s)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"gains": dict(zip(GAIN_NAMES, gains)), "score": score}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
+import argparse
+import time
+
 import matplotlib.pyplot as plt
-import numpy as np
+
+from grid_world import GridWorld
 
 class Robot:
     def __init__(self, x, y, orientation):
@@ -23,29 +27,35 @@ class Robot:
     def get_position(self):
         return (self.x, self.y)
 
-def detect_distance():
-    # Simulasi jarak, misalkan jarak infinite jika berada di jalur
-    return float('inf')  # Menggunakan infinity untuk simulasi
-
-def simulate_robot():
-    robot = Robot(0, 0, 1)  # Posisi awal (0, 0) menghadap Timur
-    path = []
-
-    for _ in range(20):  # Simulasi selama 20 langkah
-        distance = detect_distance()
-        
-        if distance == float('inf'):
-            robot.turn()  # Berbelok jika jarak infinite
-        else:
-            robot.move()  # Melanjutkan bergerak
+# Peta contoh: '#' dinding, '.' jalan; baris pertama adalah sisi utara, (0, 0) di kiri bawah
+MAP = [
+    "..........#.....",
+    ".########.#.###.",
+    ".#......#...#...",
+    ".#.####.#####.#.",
+    ".#.#..#.......#.",
+    ".#.#..#########.",
+    "...#............",
+    "####.##########.",
+    "................",
+]
 
-        path.append(robot.get_position())
+def detect_distance(world, robot):
+    # Jarak (jumlah sel kosong) ke dinding di depan robot
+    return world.distance(robot.x, robot.y, robot.orientation)
 
-    return path
+def simulate_robot(world, robot, hand="right", max_steps=None, goal=None):
+    # Mengikuti dinding dengan aturan tangan kanan/kiri sampai tujuan,
+    # siklus (keadaan x, y, arah berulang) atau batas langkah
+    result = world.follow_wall(robot.x, robot.y, robot.orientation, hand, max_steps, goal)
+    robot.x, robot.y, robot.orientation = result["x"], result["y"], result["orientation"]
+    return result
 
-def plot_path(path):
-    x, y = zip(*path)
-    plt.plot(x, y, marker='o', label='Jalur Robot')
+def plot_path(path, world=None):
+    if world is not None:
+        plt.imshow(world.to_array(), origin='lower', cmap='Greys', interpolation='nearest')
+    x, y = path[:, 0], path[:, 1]
+    plt.plot(x, y, marker='o' if len(path) < 500 else None, label='Jalur Robot')
     plt.title('Jalur Robot Melewati Peta')
     plt.xlabel('Posisi X')
     plt.ylabel('Posisi Y')
@@ -54,6 +64,37 @@ def plot_path(path):
     plt.legend()
     plt.show()
 
+def main():
+    parser = argparse.ArgumentParser(description="Wall following on a grid world")
+    parser.add_argument("--hand", choices=["right", "left"], default="right")
+    parser.add_argument("--size", type=int, default=None,
+                        help="use a random SIZE x SIZE world instead of the example map (e.g. 1000)")
+    parser.add_argument("--density", type=float, default=0.3, help="wall density of the random world")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--goal", type=int, nargs=2, default=None, metavar=("X", "Y"))
+    parser.add_argument("--no-plot", action="store_true")
+    args = parser.parse_args()
+
+    if args.size:
+        world = GridWorld.random(args.size, args.size, args.density, args.seed)
+        world.set_wall(0, 0, False)
+    else:
+        world = GridWorld.from_strings(MAP)
+    robot = Robot(0, 0, 1)  # Posisi awal (0, 0) menghadap Timur
+    print(f"Jarak ke dinding di depan: {detect_distance(world, robot)}")
+
+    start_time = time.perf_counter()
+    result = simulate_robot(world, robot, args.hand, args.max_steps, args.goal)
+    elapsed = time.perf_counter() - start_time
+    print(f"{world.width}x{world.height} grid: {result['reason']} after {result['steps']} steps "
+          f"({elapsed:.3f} s), robot at {robot.get_position()}")
+    if result["reason"] == "cycle":
+        print(f"Loop of {result['cycle_length']} steps from step {result['cycle_start']}")
+
+    if not args.no_plot:
+        plot_path(result["path"], world)
+
 # Menjalankan simulasi
-robot_path = simulate_robot()
-plot_path(robot_path)
+if __name__ == "__main__":
+    main()